@@ -0,0 +1,57 @@
+"""
+Deterministic synthetic job rows for the ranking benchmarks.
+"""
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+
+SOURCES = ["greenhouse:figma", "greenhouse:stripe", "lever:plaid", "remoteok", "adzuna:in", "naukri_email", "linkedin_email"]
+COMPANIES = ["Figma", "Stripe", "Plaid", "Acme", "Globex", "Initech", "Razorpay", "Swiggy"]
+LOCATIONS = ["Remote", "India", "Bengaluru", "Berlin", "London", "New York", "Singapore"]
+TITLES = [
+    "Senior Data Analyst", "Analytics Manager", "Lead Data Analyst", "Product Analyst",
+    "Data Scientist", "Software Engineer", "Backend Engineer", "Marketing Manager",
+    "BI & Analytics Manager", "Data Science Manager", "Growth Analyst", "ML Engineer",
+]
+WORDS = (
+    "data analyst senior sql python tableau power bi lead growth product engineering team "
+    "stakeholders dashboard metrics experiment model pipeline warehouse bigquery snowflake "
+    "customer revenue insight build own drive cross functional airflow dbt aws azure gcp "
+    "pyspark nlp xgboost scikit-learn a/b testing leadership mentor strategy roadmap "
+    "and the with to of in for we you our your will on at as is are"
+).split()
+
+
+def _jd(r: random.Random) -> str:
+    return " ".join(r.choice(WORDS) for _ in range(r.randint(150, 700)))
+
+
+def synthetic_jobs(n: int, seed: int = 1, now: datetime | None = None, jd_pool: int | None = None) -> list[dict]:
+    """
+    n job rows. With jd_pool, JDs are drawn from that many pre-generated texts
+    (same length distribution), so million-row corpora fit in memory.
+    """
+    r = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    pool = [_jd(r) for _ in range(jd_pool)] if jd_pool else None
+    out = []
+    for i in range(n):
+        source = r.choice(SOURCES)
+        company = r.choice(COMPANIES)
+        out.append({
+            "id": i + 1,
+            "source": source,
+            "company": company,
+            "title": r.choice(TITLES),
+            "location": r.choice(LOCATIONS),
+            "url": f"https://jobs.example.com/{company.lower()}/{i + 1}",
+            "external_id": str(i + 1),
+            "posted_at": (now - timedelta(seconds=r.randint(0, 45 * 86400))).isoformat().replace("+00:00", "Z")
+            if r.random() > 0.05 else None,
+            "jd_text": r.choice(pool) if pool else _jd(r),
+            "salary": None,
+            "tags": None,
+            "visa": None,
+        })
+    return out
@@ -0,0 +1,58 @@
+"""
+Scalar score_job() loop vs the columnar score_jobs_batch() engine.
+
+Checks that both agree to 1e-6 and rank consistently, then reports
+jobs/s for each.
+
+    python -m benchmarks.ranking_batch --jobs 50000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.corpus import synthetic_jobs
+from src.ranking.batch import score_jobs_batch
+from src.ranking.scoring import score_job
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("ranking_batch")
+    ap.add_argument("--jobs", type=int, default=50000)
+    ap.add_argument("--profile", type=str, default=str(ROOT / "profile.json"))
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    profile = json.loads(Path(args.profile).read_text(encoding="utf-8"))
+    jobs = synthetic_jobs(args.jobs)
+
+    scalar_best = batch_best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        scalar = [score_job(j, profile) for j in jobs]
+        scalar_best = min(scalar_best, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scores, order = score_jobs_batch(jobs, profile, now=datetime.now(timezone.utc))
+        batch_best = min(batch_best, time.perf_counter() - start)
+
+    max_diff = max((abs(a - b) for a, b in zip(scalar, scores.tolist())), default=0.0)
+    # The two runs read the clock at different moments, so jobs near a 4-dp
+    # boundary may round apart; only require the order to be consistent.
+    ranked = [scalar[i] for i in order.tolist()]
+    same_order = all(a >= b - 1e-4 - 1e-6 for a, b in zip(ranked, ranked[1:]))
+
+    print(f"[scalar] {scalar_best:.3f}s  {len(jobs) / scalar_best:>10.0f} jobs/s")
+    print(f"[ batch] {batch_best:.3f}s  {len(jobs) / batch_best:>10.0f} jobs/s")
+    print(f"[ok] speedup {scalar_best / batch_best:.2f}x  max |diff|={max_diff:.2e}  order consistent={same_order}")
+    return 0 if max_diff <= 1e-6 and same_order else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Microbenchmarks for the ranking hot paths: score_job, keyword_score,
+normalize_age, _parse_dt, seed_seedscore, explain_job_score and rank_jobs.
+
+Each function runs over a synthetic corpus per size (per-job functions over
+at most --max-calls jobs, rank_jobs over the whole corpus). Reports ops/s,
+best of --repeat passes of at least --min-time, and allocations from a
+separate tracemalloc pass over --alloc-sample calls. Results can be saved as a JSON baseline; against a
+baseline the run fails (exit 1) when any ops/s drops by more than
+--threshold. Baselines are machine-specific: compare runs from one host.
+
+    python -m benchmarks.ranking_micro --sizes 1k,10k --save-baseline benchmarks/baselines/ranking.json
+    python -m benchmarks.ranking_micro --sizes 1k,10k --baseline benchmarks/baselines/ranking.json --threshold 0.15
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.corpus import synthetic_jobs
+from src.ranking.scoring import _parse_dt, explain_job_score, keyword_score, normalize_age, rank_jobs, score_job
+from src.ranking.seed_boost import seed_index, seed_seedscore
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Distinct JDs above this corpus size are drawn from a pool of this many.
+_JD_POOL = 5000
+
+
+def _size(text: str) -> int:
+    text = text.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+def _cases(profile: dict) -> dict:
+    """name -> per-job call; rank_jobs is timed over the whole corpus separately."""
+    keywords = list(profile.get("keywords") or [])
+    return {
+        "score_job": lambda j: score_job(j, profile),
+        "keyword_score": lambda j: keyword_score(j.get("jd_text") or "", keywords),
+        "normalize_age": lambda j: normalize_age(j.get("posted_at")),
+        "_parse_dt": lambda j: _parse_dt(j.get("posted_at")),
+        "seed_seedscore": lambda j: seed_seedscore(j, profile),
+        "explain_job_score": lambda j: explain_job_score(j, profile),
+    }
+
+
+def _time_per_job(fn, jobs: list[dict], repeat: int, min_time: float) -> float:
+    # Cheap functions loop over the jobs until a pass lasts min_time, so
+    # timer and scheduler noise stay small against the measured work.
+    start = time.perf_counter()
+    for j in jobs:
+        fn(j)
+    loops = max(1, math.ceil(min_time / max(time.perf_counter() - start, 1e-9)))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            for j in jobs:
+                fn(j)
+        best = min(best, (time.perf_counter() - start) / loops)
+    return len(jobs) / best if best > 0 else float("inf")
+
+
+def _allocs(run) -> tuple[float, int]:
+    """(peak KiB, allocated blocks still live) while running `run`."""
+    tracemalloc.start()
+    try:
+        before = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        after = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    return peak / 1024, after - before
+
+
+def run(sizes: list[int], profile: dict, repeat: int, max_calls: int, alloc_sample: int, rank_limit: int,
+        only: set[str] | None = None, min_time: float = 0.2) -> dict:
+    seed_index()  # load once, outside the timings
+    cases = _cases(profile)
+    results: dict[str, dict] = {}
+    for n in sizes:
+        jobs = synthetic_jobs(n, jd_pool=_JD_POOL if n > _JD_POOL else None)
+        calls = jobs[:max_calls]
+        sample = jobs[:alloc_sample]
+        for name, fn in cases.items():
+            if only and name not in only:
+                continue
+            ops = _time_per_job(fn, calls, repeat, min_time)
+            peak_kb, live = _allocs(lambda: [fn(j) for j in sample])
+            results[f"{name}@{n}"] = {
+                "ops_per_s": round(ops, 1),
+                "calls": len(calls),
+                "alloc_peak_kb_per_1k": round(peak_kb * 1000 / max(1, len(sample)), 2),
+                "live_blocks": live,
+            }
+        if not only or "rank_jobs" in only:
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rank_jobs(jobs, profile, limit=rank_limit)
+                best = min(best, time.perf_counter() - start)
+            peak_kb, live = _allocs(lambda: rank_jobs(sample, profile, limit=rank_limit))
+            results[f"rank_jobs@{n}"] = {
+                "ops_per_s": round(n / best, 1),  # jobs ranked per second
+                "calls": n,
+                "alloc_peak_kb_per_1k": round(peak_kb * 1000 / max(1, len(sample)), 2),
+                "live_blocks": live,
+            }
+        del jobs, calls, sample
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def regressions(current: dict, baseline: dict, threshold: float) -> list[str]:
+    out = []
+    for key, cur in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or not base.get("ops_per_s"):
+            continue
+        change = cur["ops_per_s"] / base["ops_per_s"] - 1.0
+        if change < -threshold:
+            out.append(f"{key}: {base['ops_per_s']:.0f} -> {cur['ops_per_s']:.0f} ops/s ({change:+.1%})")
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("ranking_micro")
+    ap.add_argument("--sizes", type=str, default="1k,10k", help="corpus sizes, e.g. 1k,10k,100k,1m")
+    ap.add_argument("--profile", type=str, default=str(ROOT / "profile.json"))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--max-calls", type=int, default=20000, help="jobs per timed pass of a per-job function")
+    ap.add_argument("--min-time", type=float, default=0.2, help="seconds per timed pass of a per-job function")
+    ap.add_argument("--alloc-sample", type=int, default=1000, help="calls traced for allocations")
+    ap.add_argument("--rank-limit", type=int, default=50)
+    ap.add_argument("--only", type=str, default=None, help="comma-separated function names")
+    ap.add_argument("--baseline", type=str, default=None, help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed ops/s drop vs baseline (0.2 = 20%%)")
+    ap.add_argument("--save-baseline", type=str, default=None, help="write this run as a baseline JSON")
+    args = ap.parse_args()
+
+    profile = json.loads(Path(args.profile).read_text(encoding="utf-8"))
+    sizes = [_size(s) for s in args.sizes.split(",") if s.strip()]
+    only = {s.strip() for s in args.only.split(",")} if args.only else None
+    result = run(sizes, profile, args.repeat, args.max_calls, args.alloc_sample, args.rank_limit, only, args.min_time)
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+    for key, r in result["results"].items():
+        line = f"[{key:>26}] {r['ops_per_s']:>12.0f} ops/s  {r['alloc_peak_kb_per_1k']:>9.1f} KiB peak/1k calls  live={r['live_blocks']}"
+        base = (baseline or {}).get("results", {}).get(key)
+        if base and base.get("ops_per_s"):
+            line += f"  ({r['ops_per_s'] / base['ops_per_s'] - 1.0:+.1%} vs baseline)"
+        print(line)
+
+    if args.save_baseline:
+        out = Path(args.save_baseline)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"[ok] baseline saved to {out}")
+    if baseline is not None:
+        bad = regressions(result, baseline, args.threshold)
+        for b in bad:
+            print(f"[regression] {b}")
+        if bad:
+            return 1
+        print(f"[ok] no regression beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
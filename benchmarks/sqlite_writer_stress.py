@@ -0,0 +1,128 @@
+"""
+Concurrency stress run for SQLite job writes.
+
+Spawns N writer threads that each upsert small batches of jobs, first with a
+private connection per thread that commits on its own (the old behaviour),
+then through the shared single-writer queue. Reports throughput and the number
+of "database is locked" failures for each mode.
+
+    python -m benchmarks.sqlite_writer_stress --threads 8 --ops 200 --batch 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def _rows(thread_id: int, op: int, batch: int) -> list[dict]:
+    out = []
+    for k in range(batch):
+        n = f"{thread_id}-{op}-{k}"
+        out.append({
+            "source": f"greenhouse:stress{thread_id}",
+            "company": f"stress{thread_id}",
+            "title": f"Data Analyst {n}",
+            "location": "Remote",
+            "url": f"https://boards.greenhouse.io/stress{thread_id}/jobs/{n}",
+            "external_id": n,
+            "posted_at": "2026-01-01T00:00:00Z",
+            "jd_text": "SQL Python Tableau " * 20,
+            "salary": None,
+            "tags": None,
+            "visa": None,
+        })
+    return out
+
+
+def _run_mode(db, mode: str, threads: int, ops: int, batch: int, busy_ms: int) -> dict:
+    errors = {"locked": 0, "other": 0, "failed_rows": 0}
+    lock = threading.Lock()
+
+    def worker(tid: int) -> None:
+        conn = None
+        if mode == "direct":
+            conn = sqlite3.connect(db.DB_PATH, timeout=busy_ms / 1000.0)
+            conn.row_factory = sqlite3.Row
+        for op in range(ops):
+            try:
+                if mode == "direct":
+                    stats = db.upsert_jobs(_rows(tid, op, batch), conn)
+                else:
+                    stats = db.upsert_jobs(_rows(tid, op, batch))
+                if stats["failed"]:
+                    with lock:
+                        errors["failed_rows"] += stats["failed"]
+            except sqlite3.OperationalError as exc:
+                with lock:
+                    errors["locked" if "locked" in str(exc) else "other"] += 1
+                if conn is not None:
+                    conn.rollback()
+            except Exception:
+                with lock:
+                    errors["other"] += 1
+        if conn is not None:
+            conn.close()
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total_ops = threads * ops
+    written = total_ops * batch - errors["failed_rows"] - (errors["locked"] + errors["other"]) * batch
+    return {
+        "mode": mode,
+        "elapsed_s": round(elapsed, 3),
+        "ops_per_s": round(total_ops / elapsed, 1) if elapsed else 0.0,
+        "rows_per_s": round(written / elapsed, 1) if elapsed else 0.0,
+        "locked_errors": errors["locked"],
+        "other_errors": errors["other"],
+        "failed_rows": errors["failed_rows"],
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser("sqlite_writer_stress")
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--ops", type=int, default=200, help="upsert calls per thread")
+    ap.add_argument("--batch", type=int, default=5, help="rows per upsert call")
+    ap.add_argument("--direct-busy-ms", type=int, default=0,
+                    help="busy timeout for the per-thread connections (0 = fail fast on lock)")
+    ap.add_argument("--window-ms", type=int, default=5)
+    args = ap.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="jb-stress-")
+    results = []
+    for mode in ("direct", "writer"):
+        path = str(Path(tmpdir) / f"{mode}.sqlite3")
+        os.environ["JOB_BUTLER_DB"] = path
+        os.environ["JOB_BUTLER_SQLITE_WRITE_WINDOW_MS"] = str(args.window_ms)
+        os.environ.pop("DATABASE_URL", None)
+        from src.storage import db
+        db.DB_PATH = path
+        db.close_sqlite_writer()
+        db.init_db()
+        results.append(_run_mode(db, mode, args.threads, args.ops, args.batch, args.direct_busy_ms))
+        db.close_sqlite_writer()
+
+    for r in results:
+        print(
+            f"[{r['mode']:>6}] {r['elapsed_s']:>7.3f}s  {r['ops_per_s']:>8.1f} ops/s  "
+            f"{r['rows_per_s']:>9.1f} rows written/s  locked={r['locked_errors']} other={r['other_errors']} failed_rows={r['failed_rows']}"
+        )
+    direct, writer = results
+    if direct["rows_per_s"]:
+        print(f"[ok] writer/direct write throughput: {writer['rows_per_s'] / direct['rows_per_s']:.2f}x")
+    return 1 if writer["locked_errors"] or writer["other_errors"] or writer["failed_rows"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,7 @@ def send_alert(jobs:list[dict], top:int=10):
     user=os.getenv('EMAIL_USER'); pwd=os.getenv('EMAIL_PASS')
     from_addr=os.getenv('EMAIL_FROM','Job Butler <alerts@example.com>'); to_addr=os.getenv('EMAIL_TO')
     if not all([host,port,user,pwd,to_addr]):
-        print('Email settings missing; skipping send.'); return
+        print('Email settings missing; skipping send.'); return False
     rows=''
     for i,j in enumerate(jobs[:top],1):
         rows+=f"<p><b>{i}. {j.get('title','')} — {j.get('company','')}</b><br/>{j.get('location','')} | score: {j.get('_score')}<br/><a href='{j.get('url','')}'>Open</a></p>"
@@ -18,3 +18,4 @@ def send_alert(jobs:list[dict], top:int=10):
     msg.attach(MIMEText(html,'html'))
     with smtplib.SMTP(host, port) as s:
         s.starttls(); s.login(user, pwd); s.sendmail(from_addr, [to_addr], msg.as_string()); print(f'Alert sent to {to_addr}')
+    return True
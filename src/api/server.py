@@ -1,12 +1,12 @@
 from __future__ import annotations
-from fastapi import FastAPI, Body, Query, HTTPException, Depends, Request
+from fastapi import FastAPI, Body, Query, HTTPException, Depends, Request, BackgroundTasks
 from fastapi.responses import RedirectResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from datetime import datetime, timezone, timedelta
 from typing import Generator
 import contextlib
-import json, os, subprocess, time, secrets, smtplib, sys, re, traceback
+import json, os, subprocess, threading, time, secrets, smtplib, sys, re, traceback
 from email.message import EmailMessage
 from urllib.parse import urlencode, parse_qs
 from uuid import uuid4
@@ -21,12 +21,24 @@ from src.storage.gmail_connections import (
     get_fresh_access_token,
 )
 
-from src.ranking.scoring import rank_jobs
+from src.ranking.score_cache import fill_scores, rank_jobs_cached, invalidate_persona_scores
+from src.ranking.scoring import rank_jobs_pruned
+from src.ranking.parallel import rank_jobs_parallel
+from src.ranking.engines import SERVING_ENGINES, resolve_engine
+from src.ranking.inverted_index import rank_jobs_indexed
+from src.ranking.tfidf import rank_jobs_tfidf
+from src.ranking.lsh import rank_jobs_seed_similar, similar_jobs
+from src.ranking.pushdown import rank_jobs_pushdown
+from src.ranking.shards import ShardCoordinator
+from src.ranking.feeds import feed_total, invalidate_persona_feed, prune_stale_rankings, read_feed
 from src.gmail.job_alerts import ingest_gmail_job_alerts
+from src.storage.activity import prune_activity
+from src.storage.maintenance import db_size_report, run_db_maintenance, maybe_run_db_maintenance
 from src.storage.db import (
     get_conn,
     get_pg_pool,
     close_pg_pool,
+    close_sqlite_writer,
     init_db,
     execute as db_execute,
     is_postgres,
@@ -34,7 +46,10 @@ from src.storage.db import (
     dedupe_jobs,
     upsert_jobs,
     ensure_harvest_packs,
+    jobs_query_sql,
+    JOB_LIST_COLUMNS,
 )
+from src.storage.features import sync_vocabulary, refresh_job_features
 from src.harvest.sources import dedupe, to_rows
 from src.harvest.packs import run_harvest_pack
 from src.utils.firebase_admin_client import (
@@ -68,10 +83,16 @@ def _startup_init_db() -> None:
         init_db()
     except Exception as exc:
         print(f"[warn] init_db failed: {exc}")
+        return
+    try:
+        sync_vocabulary()
+    except Exception as exc:
+        print(f"[warn] feature vocabulary sync failed: {exc}")
 
 @app.on_event("shutdown")
 def _shutdown() -> None:
     close_pg_pool()
+    close_sqlite_writer()
 
 def _get_cors_origins() -> list[str]:
     base = [
@@ -109,6 +130,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _write_conn(conn):
+    # On SQLite, job writes go through the shared writer thread (conn=None)
+    # rather than this request's connection.
+    return conn if is_postgres() else None
+
+def _prune_stale_rankings() -> None:
+    try:
+        prune_stale_rankings()
+    except Exception as exc:
+        print(f"[warn] score cache prune failed: {exc}")
+
+def _fill_score_cache(profiles=()) -> None:
+    # /api/jobs only reads job_scores; harvests and persona saves fill it.
+    try:
+        fill_scores(profiles)
+    except Exception as exc:
+        print(f"[warn] score cache fill failed: {exc}")
+
+_DB_MAINTENANCE_LOCK = threading.Lock()
+
+def _maybe_db_maintenance() -> dict | None:
+    # Runs as a background task after the response; a run already in
+    # progress covers the churn that scheduled this one.
+    if not _DB_MAINTENANCE_LOCK.acquire(blocking=False):
+        return None
+    try:
+        _prune_stale_rankings()
+        return maybe_run_db_maintenance()
+    except Exception as exc:
+        print(f"[warn] db maintenance failed: {exc}")
+        return None
+    finally:
+        _DB_MAINTENANCE_LOCK.release()
+
 def q(sql, params=()):
     if is_postgres():
         pool = get_pg_pool()
@@ -144,6 +199,15 @@ class PackCreateIn(BaseModel):
     config: dict | None = None
     slug: str | None = None
 
+_SHARDS: ShardCoordinator | None = None
+
+def shard_coordinator() -> ShardCoordinator | None:
+    """Coordinator over the JOB_BUTLER_SHARDS workers; None when none are configured."""
+    global _SHARDS
+    if _SHARDS is None:
+        _SHARDS = ShardCoordinator.from_env()
+    return _SHARDS
+
 def load_profile_for_uid(uid: str | None) -> dict:
     """Load persona for a given uid, falling back to profile.json if needed."""
     profile: dict | None = None
@@ -541,6 +605,8 @@ def _run_pack(pack: dict, conn) -> dict:
     error_text = None
     inserted = 0
     updated = 0
+    unchanged = 0
+    failed = 0
     marked_inactive = 0
     archived = 0
     source_errors: list[dict] = []
@@ -550,19 +616,15 @@ def _run_pack(pack: dict, conn) -> dict:
         jobs, source_errors = run_harvest_pack(pack.get("config", {}) or {}, profile)
         rows = to_rows(dedupe(jobs))
 
-        row = db_execute(conn, "SELECT COUNT(*) AS count FROM jobs").fetchone()
-        before = row["count"] if row else 0
-
         if rows:
-            upsert_jobs(rows, conn)
-
-        row = db_execute(conn, "SELECT COUNT(*) AS count FROM jobs").fetchone()
-        after = row["count"] if row else 0
-
-        inserted = max(after - before, 0)
-        updated = max(len(rows) - inserted, 0)
-        marked_inactive, archived = maintain_jobs(conn)
-        if source_errors and status == "ok":
+            stats = upsert_jobs(rows, _write_conn(conn))
+            inserted = stats["inserted"]
+            updated = stats["updated"]
+            unchanged = stats["unchanged"]
+            failed = stats["failed"]
+
+        marked_inactive, archived = maintain_jobs(_write_conn(conn))
+        if (source_errors or failed) and status == "ok":
             status = "partial"
     except Exception as exc:
         status = "error"
@@ -574,8 +636,8 @@ def _run_pack(pack: dict, conn) -> dict:
         """
         INSERT INTO harvest_pack_runs
             (pack_slug, started_at, finished_at, status, inserted_count, updated_count,
-             inactive_marked_count, archived_count, error_text)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+             unchanged_count, failed_count, inactive_marked_count, archived_count, error_text)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (
             pack.get("slug"),
@@ -584,6 +646,8 @@ def _run_pack(pack: dict, conn) -> dict:
             status,
             inserted,
             updated,
+            unchanged,
+            failed,
             marked_inactive,
             archived,
             error_text,
@@ -609,6 +673,8 @@ def _run_pack(pack: dict, conn) -> dict:
         "status": status,
         "inserted": inserted,
         "updated": updated,
+        "unchanged": unchanged,
+        "failed": failed,
         "marked_inactive": marked_inactive,
         "archived": archived,
         "error": error_text,
@@ -749,7 +815,7 @@ def admin_delete_pack(slug: str, conn=Depends(db_conn)):
         raise HTTPException(status_code=500, detail=str(exc))
 
 @app.post("/api/admin/packs/{slug}/run")
-def admin_run_pack(slug: str, conn=Depends(db_conn)):
+def admin_run_pack(slug: str, background_tasks: BackgroundTasks, conn=Depends(db_conn)):
     try:
         ensure_harvest_packs(conn)
         row = db_execute(conn, "SELECT * FROM harvest_packs WHERE slug = ?", (slug,)).fetchone()
@@ -761,10 +827,13 @@ def admin_run_pack(slug: str, conn=Depends(db_conn)):
     except Exception as exc:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(exc))
-    return _run_pack(pack, conn)
+    result = _run_pack(pack, conn)
+    background_tasks.add_task(_fill_score_cache)
+    background_tasks.add_task(_maybe_db_maintenance)
+    return result
 
 @app.post("/api/admin/packs/run-enabled")
-def admin_run_enabled_packs(conn=Depends(db_conn)):
+def admin_run_enabled_packs(background_tasks: BackgroundTasks, conn=Depends(db_conn)):
     try:
         ensure_harvest_packs(conn)
         packs = _list_packs(conn, enabled_only=True)
@@ -784,22 +853,27 @@ def admin_run_enabled_packs(conn=Depends(db_conn)):
                     "status": "error",
                     "inserted": 0,
                     "updated": 0,
+                    "unchanged": 0,
+                    "failed": 0,
                     "marked_inactive": 0,
                     "archived": 0,
                     "error": str(exc),
                 }
             )
+    background_tasks.add_task(_fill_score_cache)
+    background_tasks.add_task(_maybe_db_maintenance)
     return {"ok": True, "ran_packs": len(results), "results": results}
 
 @app.post("/api/admin/harvest-all")
 @app.post("/api/admin/harvest/run")
-def admin_harvest_all(conn=Depends(db_conn)):
+def admin_harvest_all(background_tasks: BackgroundTasks, conn=Depends(db_conn)):
     try:
         row = db_execute(conn, "SELECT COUNT(*) AS count FROM jobs").fetchone()
         before = row["count"] if row else 0
 
         subprocess.run([sys.executable, "-m", "src.main", "seed-harvest"], check=False)
-        marked_inactive, archived = maintain_jobs(conn)
+        marked_inactive, archived = maintain_jobs(_write_conn(conn))
+        background_tasks.add_task(_maybe_db_maintenance)
 
         row = db_execute(conn, "SELECT COUNT(*) AS count FROM jobs").fetchone()
         after = row["count"] if row else 0
@@ -816,24 +890,68 @@ def admin_harvest_all(conn=Depends(db_conn)):
         raise HTTPException(status_code=500, detail=str(exc))
 
 @app.post("/api/admin/cleanup")
-def admin_cleanup(conn=Depends(db_conn)):
+def admin_cleanup(background_tasks: BackgroundTasks, conn=Depends(db_conn)):
     try:
-        marked_inactive, archived = maintain_jobs(conn)
+        marked_inactive, archived = maintain_jobs(_write_conn(conn))
         deduped = dedupe_jobs(conn)
+        activity = prune_activity(conn=_write_conn(conn))
+        background_tasks.add_task(_maybe_db_maintenance)
         return {
             "marked_inactive": marked_inactive,
             "archived": archived,
             "deduped": deduped,
+            "alerts_pruned": activity["alerts_pruned"],
+            "actions_pruned": activity["actions_pruned"],
+            "db_maintenance": "scheduled",
         }
     except Exception as exc:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(exc))
 
+@app.get("/api/admin/db-stats")
+def admin_db_stats():
+    try:
+        return db_size_report()
+    except Exception as exc:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(exc))
+
+@app.post("/api/admin/db-maintenance")
+def admin_db_maintenance(force: bool = False, full: bool = False):
+    try:
+        if force or full:
+            return {"ran": True, "result": run_db_maintenance(full=full)}
+        result = maybe_run_db_maintenance()
+        return {"ran": result is not None, "result": result}
+    except Exception as exc:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(exc))
+
+def _refresh_features_for_persona(persona: dict) -> None:
+    try:
+        sync_vocabulary([persona])
+        refresh_job_features()
+    except Exception as exc:
+        print(f"[warn] feature refresh failed: {exc}")
+    _fill_score_cache([persona])
+
 @app.post("/persona")
-def save_persona(p: PersonaIn):
+def save_persona(p: PersonaIn, background_tasks: BackgroundTasks):
     os.makedirs("personas", exist_ok=True)
-    with open(f"personas/{p.uid}.json", "w", encoding="utf-8") as f:
+    path = f"personas/{p.uid}.json"
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                old = json.load(f)
+            invalidate_persona_scores(old)
+            invalidate_persona_feed(old)
+        except Exception as exc:
+            print(f"[warn] score cache invalidation failed: {exc}")
+    with open(path, "w", encoding="utf-8") as f:
         json.dump(p.persona, f, indent=2)
+    # New persona terms get vocabulary bits; existing jobs are extended in the background.
+    background_tasks.add_task(_refresh_features_for_persona, p.persona)
+    background_tasks.add_task(_prune_stale_rankings)
     return {"saved": True}
 
 @app.get("/persona")
@@ -841,6 +959,15 @@ def get_persona(uid: str = Query(...)):
     """Return the persona for this uid, or fall back to profile.json."""
     return load_profile_for_uid(uid)
 
+def _full_job_rows(ids: list[int]) -> list[dict]:
+    # The unscored listing is scanned and filtered on JOB_LIST_COLUMNS (the
+    # covering index); only the page's rows are read in full.
+    if not ids:
+        return []
+    marks = ",".join("?" for _ in ids)
+    by_id = {r["id"]: r for r in q(f"SELECT * FROM jobs WHERE id IN ({marks})", tuple(ids))}
+    return [by_id[i] for i in ids if i in by_id]
+
 @app.get("/jobs")
 @app.get("/api/jobs")
 def jobs(
@@ -853,28 +980,44 @@ def jobs(
     limit: int = 50,
     offset: int = 0,
     use_scoring: bool = True,
+    include_inactive: bool = False,
+    engine: str | None = Query(
+        default=None,
+        description=f"ranking engine: {', '.join(SERVING_ENGINES)} (default JOB_BUTLER_RANK_ENGINE or rank_jobs)",
+    ),
 ):
+    if engine is not None and not use_scoring:
+        raise HTTPException(status_code=400, detail="engine= conflicts with use_scoring=false")
     limit = max(1, min(limit, 200))
     offset = max(0, offset)
-    # 1) Base: fetch jobs by recency (same as before)
-    if is_postgres():
-        # posted_at is TEXT in Postgres schema; created_at is TIMESTAMP.
-        # Only cast posted_at when it looks like an ISO/date string, otherwise fall back to created_at.
-        rows = q(
-            """
-            SELECT *
-              FROM jobs
-             ORDER BY
-               CASE
-                 WHEN posted_at IS NULL OR posted_at = '' THEN created_at
-                 WHEN posted_at ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}' THEN posted_at::timestamptz
-                 ELSE created_at
-               END DESC,
-               created_at DESC
-            """
-        )
-    else:
-        rows = q("SELECT * FROM jobs ORDER BY COALESCE(posted_at, created_at) DESC")
+    # 1) Base: fetch active jobs by recency; the JD text is only needed for scoring
+    profile = load_profile_for_uid(uid)
+    scoring = use_scoring and bool(profile)
+    if scoring:
+        try:
+            engine = resolve_engine(engine, source, contains, include_inactive)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if scoring and engine == "feed":
+        # O(page): the feed is merged incrementally and ordered for decay.
+        page = read_feed(profile, limit, offset)
+        total = feed_total(profile)
+        next_offset = offset + limit if offset + limit < total else None
+        return {"items": page, "nextOffset": next_offset, "total": total}
+    if scoring and engine == "sharded":
+        try:
+            page, total = shard_coordinator().rank(profile, limit, offset, source, contains)
+        except RuntimeError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        next_offset = offset + limit if offset + limit < total else None
+        return {"items": page, "nextOffset": next_offset, "total": total}
+    if scoring and engine == "pushdown":
+        # Only the SQL-scored candidates leave the database.
+        with get_pg_pool().connection() as conn:
+            page, total = rank_jobs_pushdown(profile, limit, offset, source, contains, include_inactive, conn=conn)
+        next_offset = offset + limit if offset + limit < total else None
+        return {"items": page, "nextOffset": next_offset, "total": total}
+    rows = q(jobs_query_sql(include_inactive, None if scoring else JOB_LIST_COLUMNS, with_features=scoring))
 
     # 2) Optional filters: source + text search (same as before)
     if source:
@@ -892,16 +1035,51 @@ def jobs(
             ).lower()
         ]
 
-    # 3) Load persona/global profile and apply scoring
-    profile = load_profile_for_uid(uid)
-    if use_scoring and profile:
-        rows = rank_jobs(rows, profile)
-
+    # 3) Apply persona/global profile scoring; only the requested page is
+    #    materialized and explained.
     total = len(rows)
-    page = rows[offset : offset + limit]
+    pruning = None
+    if scoring and engine == "pruned":
+        page, pruning = rank_jobs_pruned(rows, profile, limit, offset)
+    elif scoring and engine == "indexed":
+        page = rank_jobs_indexed(rows, profile, limit, offset)
+    elif scoring and engine == "tfidf":
+        page = rank_jobs_tfidf(rows, profile, limit, offset)
+    elif scoring and engine == "seed_similar":
+        page = rank_jobs_seed_similar(rows, profile, limit, offset)
+    elif scoring and engine == "parallel":
+        # Small corpora fall back to the serial ranker inside rank_jobs_parallel.
+        page = rank_jobs_parallel(rows, profile, limit, offset)
+    elif scoring:
+        page = rank_jobs_cached(rows, profile, limit=limit, offset=offset)
+    else:
+        page = _full_job_rows([r["id"] for r in rows[offset : offset + limit]])
     next_offset = offset + limit if offset + limit < total else None
 
-    return {"items": page, "nextOffset": next_offset, "total": total}
+    resp = {"items": page, "nextOffset": next_offset, "total": total}
+    if pruning is not None:
+        resp["pruning"] = pruning
+    return resp
+
+@app.get("/api/jobs/{job_id}/similar")
+def jobs_similar(job_id: int, limit: int = 10, include_inactive: bool = False):
+    """Jobs most like this one, from the LSH index over job text."""
+    limit = max(1, min(limit, 100))
+    # Over-fetch so inactive neighbours can be dropped without a second lookup.
+    near = similar_jobs(job_id, limit if include_inactive else limit * 2)
+    if near is None:
+        raise HTTPException(status_code=404, detail="job not found or not indexed yet")
+    if not near:
+        return {"items": []}
+    marks = ",".join("?" for _ in near)
+    rows = {r["id"]: r for r in q(f"SELECT {', '.join(JOB_LIST_COLUMNS)} FROM jobs WHERE id IN ({marks})", tuple(i for i, _ in near))}
+    items = []
+    for i, sim in near:
+        r = rows.get(i)
+        if r is None or not (include_inactive or r.get("is_active")):
+            continue
+        items.append({**r, "_similarity": round(sim, 4)})
+    return {"items": items[:limit]}
 
 @app.get("/auth/gmail/start")
 def gmail_auth_start(uid: str = Query(...)):
@@ -0,0 +1,40 @@
+# src/api/shard_worker.py
+
+from __future__ import annotations
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from src.ranking.shards import ShardWorker
+
+
+class RankIn(BaseModel):
+    profile: dict
+    k: int
+    now: float
+    source: str | None = None
+    contains: str | None = None
+
+
+def create_shard_app(shard: int, shards: int) -> FastAPI:
+    """A ranking worker holding shard `shard` of `shards` in memory (see ShardCoordinator)."""
+    worker = ShardWorker(shard, shards)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Load the shard before serving, so /health reports what /rank ranks.
+        worker.refresh(force=True)
+        yield
+
+    app = FastAPI(title=f"job-butler shard {shard}/{shards}", lifespan=lifespan)
+
+    @app.get("/health")
+    def health():
+        return worker.health()
+
+    @app.post("/rank")
+    def rank(body: RankIn):
+        return worker.rank(body.profile, max(0, body.k), body.now, body.source, body.contains)
+
+    return app
@@ -0,0 +1,250 @@
+from __future__ import annotations
+import mailbox
+import math
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import format_datetime
+from html import escape
+from typing import Dict, List
+
+# Deterministic synthetic data for load and scale testing: job rows for every
+# source prefix the harvesters write, personas in the profile.json shape,
+# seeds, and Naukri/LinkedIn alert emails as mbox. The same seed (and anchor
+# time) always yields the same output.
+
+GREENHOUSE_BOARDS = ["figma", "stripe", "airbnb", "databricks", "notion", "coinbase"]
+LEVER_COMPANIES = ["plaid", "netflix", "palantir", "razorpay", "swiggy", "zeta"]
+ADZUNA_COUNTRIES = ["in", "gb", "us", "sg"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Tyrell", "Cyberdyne", "Soylent"]
+# Greenhouse updated_at values carry the board's local offset.
+_GH_TZ = timezone(timedelta(hours=-4))
+# (source kind, share of jobs)
+SOURCE_MIX = [("greenhouse", 0.25), ("lever", 0.2), ("remoteok", 0.15), ("adzuna", 0.2), ("naukri_email", 0.1), ("linkedin_email", 0.1)]
+
+LOCATIONS = ["Remote", "India", "Bengaluru", "Mumbai", "Hyderabad", "Pune", "Delhi NCR", "Berlin", "London",
+             "New York", "San Francisco", "Singapore", "Dublin", "Amsterdam", "Toronto"]
+SENIORITY = ["", "Senior ", "Lead ", "Principal ", "Staff ", "Junior ", "Sr. "]
+ROLES = ["Data Analyst", "Analytics Manager", "Product Analyst", "Data Scientist", "Data Engineer",
+         "BI Developer", "Machine Learning Engineer", "Software Engineer", "Backend Engineer", "Frontend Engineer",
+         "Product Manager", "Growth Analyst", "Data Science Manager", "Analytics Engineer", "Marketing Manager",
+         "DevOps Engineer", "Business Analyst", "Research Scientist", "Product Analytics Lead", "BI & Analytics Manager"]
+SKILLS = ["SQL", "Python", "Tableau", "Power BI", "PySpark", "dbt", "Airflow", "BigQuery", "Snowflake", "AWS",
+          "Azure", "GCP", "A/B testing", "scikit-learn", "XGBoost", "NLP", "Looker", "Kafka", "Kubernetes",
+          "Docker", "Java", "Go", "React", "TypeScript", "Node.js", "C++", "Excel", "R", "Spark", "Redshift"]
+DOMAINS = ["Tech/Product", "FinTech/BFSI", "E-commerce/Retail", "SaaS/Cloud", "Consulting/IT Services", "HealthTech", "EdTech"]
+FILLER = (
+    "we are looking for a motivated teammate to join our growing team you will work closely with stakeholders "
+    "across product engineering and business to build reliable pipelines dashboards and models that drive "
+    "decisions our culture values ownership curiosity and clear communication you will mentor others define "
+    "metrics run experiments and own the roadmap for your area responsibilities include partnering with "
+    "leadership translating ambiguous questions into analyses and shipping insights at scale benefits include "
+    "flexible hours health insurance learning budget and equity"
+).split()
+
+
+def _pick_source(r: random.Random) -> str:
+    x, acc = r.random(), 0.0
+    for kind, share in SOURCE_MIX:
+        acc += share
+        if x < acc:
+            return kind
+    return SOURCE_MIX[-1][0]
+
+
+def _jd(r: random.Random, words: int, skills: list[str]) -> str:
+    # Prose filler with the job's skills sprinkled in, in paragraphs.
+    out: list[str] = []
+    for i in range(words):
+        out.append(r.choice(skills) if skills and r.random() < 0.06 else r.choice(FILLER))
+        if i and i % 60 == 0:
+            out.append("\n\n")
+    return " ".join(out).replace(" \n\n ", "\n\n")
+
+
+def jd_length(r: random.Random, mean: int, sigma: float, lo: int, hi: int) -> int:
+    """Word count from a log-normal with the given mean, clipped to [lo, hi]."""
+    mu = math.log(max(1, mean)) - sigma * sigma / 2
+    return int(min(hi, max(lo, r.lognormvariate(mu, sigma))))
+
+
+def _posting(r: random.Random, i: int, kind: str, now: datetime, jd_words: int) -> dict:
+    title = (r.choice(SENIORITY) + r.choice(ROLES)).strip()
+    skills = r.sample(SKILLS, r.randint(3, 8))
+    posted = now - timedelta(seconds=r.randint(0, 60 * 86400))
+    location = r.choice(LOCATIONS)
+    job = {"title": title, "location": location, "jd_text": _jd(r, jd_words, skills), "salary": None, "tags": ",".join(skills), "visa": None}
+    # URLs, ids and posted_at in the shapes each harvester stores.
+    if kind == "greenhouse":
+        board = r.choice(GREENHOUSE_BOARDS)
+        ext = str(4000000 + i)
+        job.update(source=f"greenhouse:{board}", company=board, external_id=ext,
+                   url=f"https://boards.greenhouse.io/{board}/jobs/{ext}",
+                   posted_at=posted.astimezone(_GH_TZ if r.random() < 0.5 else timezone.utc).isoformat(timespec="seconds"))
+    elif kind == "lever":
+        comp = r.choice(LEVER_COMPANIES)
+        ext = str(uuid.UUID(int=r.getrandbits(128)))
+        job.update(source=f"lever:{comp}", company=comp, external_id=ext,
+                   url=f"https://jobs.lever.co/{comp}/{ext}", posted_at=str(int(posted.timestamp() * 1000)))
+    elif kind == "remoteok":
+        ext = str(100000 + i)
+        job.update(source="remoteok", company=r.choice(COMPANIES), external_id=ext, location="Remote",
+                   url=f"https://remoteok.com/remote-jobs/{ext}", posted_at=str(int(posted.timestamp())))
+    elif kind == "adzuna":
+        country = r.choice(ADZUNA_COUNTRIES)
+        ext = str(3000000000 + i)
+        job.update(source=f"adzuna:{country}", company=r.choice(COMPANIES), external_id=ext,
+                   url=f"https://www.adzuna.{'co.uk' if country == 'gb' else country}/details/{ext}",
+                   posted_at=posted.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                   salary=f"{r.randint(8, 60)}00000" if country == "in" else None)
+    elif kind == "naukri_email":
+        slug = title.lower().replace(" ", "-").replace("&", "and").replace(".", "")
+        job.update(source="naukri_email", company="Company", external_id=None, location="",
+                   url=f"https://www.naukri.com/job-listings-{slug}-{i}", posted_at=None, jd_text=title, tags=None)
+    else:  # linkedin_email
+        ext = str(3900000000 + i)
+        job.update(source="linkedin_email", company="", external_id=None, location="",
+                   url=f"https://www.linkedin.com/jobs/view/{ext}/",
+                   posted_at=posted.replace(tzinfo=None).isoformat(timespec="seconds"), jd_text="", tags=None)
+    return job
+
+
+def synthetic_postings(
+    n: int,
+    seed: int = 1,
+    dup_rate: float = 0.05,
+    jd_mean: int = 400,
+    jd_sigma: float = 0.5,
+    jd_min: int = 40,
+    jd_max: int = 2500,
+    now: datetime | None = None,
+) -> List[Dict]:
+    """
+    n job rows ready for upsert_jobs (via to_rows). A dup_rate share are
+    duplicates of an earlier row: half re-posts (same source and id, as a
+    re-harvest sees them), half cross-posts (same company, title and JD under
+    another source and URL). JD lengths are log-normal around jd_mean words.
+    """
+    r = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    out: list[dict] = []
+    for i in range(n):
+        if out and r.random() < dup_rate:
+            orig = r.choice(out)
+            if r.random() < 0.5:
+                out.append(dict(orig))
+                continue
+            kind = _pick_source(r)
+            dup = _posting(r, i, kind, now, 0)
+            dup.update(company=orig["company"] or dup["company"], title=orig["title"], jd_text=orig["jd_text"] or dup["jd_text"])
+            out.append(dup)
+            continue
+        kind = _pick_source(r)
+        out.append(_posting(r, i, kind, now, jd_length(r, jd_mean, jd_sigma, jd_min, jd_max)))
+    return out
+
+
+def synthetic_personas(n: int, seed: int = 1) -> Dict[str, dict]:
+    """{uid: persona} in the profile.json shape; uids are stable for a seed."""
+    r = random.Random(seed)
+    out: dict[str, dict] = {}
+    for i in range(n):
+        uid = "fx" + "".join(r.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(26))
+        roles = r.sample(ROLES, r.randint(2, 6))
+        must = r.sample(SKILLS, r.randint(3, 6))
+        nice = r.sample([s for s in SKILLS if s not in must], r.randint(2, 8))
+        out[uid] = {
+            "name": f"Fixture User {i + 1}",
+            "contact": {"email": f"fixture{i + 1}@example.com"},
+            "roles_target": [(r.choice(SENIORITY) + role).strip() for role in roles],
+            "locations": r.sample(LOCATIONS, r.randint(1, 4)),
+            "domains": r.sample(DOMAINS, r.randint(1, 3)),
+            "must_have": must,
+            "nice_to_have": nice,
+            "visa": {"needs_sponsorship_outside_india": r.random() < 0.5, "india": "authorized"},
+            "sources": ["greenhouse", "lever", "remoteok", "adzuna"],
+        }
+    return out
+
+
+def synthetic_seeds(jobs: List[Dict], n: int, seed: int = 1) -> List[Dict]:
+    """
+    Seeds as seed-add stores them. Drawn from the given jobs' greenhouse and
+    lever postings, so seed boosting (provider and similar-job) has hits.
+    """
+    r = random.Random(seed)
+    ats = [j for j in jobs if (j.get("source") or "").startswith(("greenhouse:", "lever:"))]
+    picks = r.sample(ats, min(n, len(ats)))
+    return [
+        {"url": j["url"], "title_hint": j["title"], "company_hint": j["company"], "notes": "fixture"}
+        for j in picks
+    ]
+
+
+def _alert_message(kind: str, jobs: List[Dict], when: datetime, n: int) -> EmailMessage:
+    msg = EmailMessage()
+    if kind == "naukri":
+        msg["From"] = "Naukri Jobs <jobalert@naukri.com>"
+        msg["Subject"] = f"{len(jobs)} new jobs matching your profile"
+        links = "".join(f'<p><a href="{escape(j["url"])}">{escape(j["title"])}</a></p>' for j in jobs)
+    else:
+        msg["From"] = "LinkedIn Job Alerts <jobalerts-noreply@linkedin.com>"
+        msg["Subject"] = f"{len(jobs)} new jobs for you"
+        links = "".join(
+            f'<p><a href="{escape(j["url"].replace("/jobs/view/", "/comm/jobs/view/"))}?trk=eml">{escape(j["title"])}</a></p>'
+            for j in jobs
+        )
+    msg["To"] = "fixture@example.com"
+    msg["Date"] = format_datetime(when)
+    msg["Message-ID"] = f"<fixture-{kind}-{n}@example.com>"
+    msg.set_content("View this email in an HTML-capable client.")
+    msg.add_alternative(f"<html><body>{links}</body></html>", subtype="html")
+    msg.set_boundary(f"fixture-{kind}-{n}")  # the default boundary is random
+    return msg
+
+
+def write_alert_mbox(path: str, kind: str, jobs: List[Dict], per_message: int = 10, now: datetime | None = None) -> int:
+    """
+    Write `jobs` (naukri_email or linkedin_email rows) as alert emails in the
+    HTML shape the IMAP ingesters parse. Returns the number of messages.
+    """
+    now = now or datetime.now(timezone.utc)
+    box = mailbox.mbox(path, create=True)
+    box.lock()
+    try:
+        box.clear()
+        count = 0
+        for start in range(0, len(jobs), per_message):
+            when = now - timedelta(hours=len(jobs) // per_message - count)
+            entry = mailbox.mboxMessage(_alert_message(kind, jobs[start : start + per_message], when, count))
+            entry.set_from("MAILER-DAEMON", when.astimezone(timezone.utc).timetuple())
+            box.add(entry)
+            count += 1
+        box.flush()
+    finally:
+        box.unlock()
+        box.close()
+    return count
+
+
+def synthetic_labels(personas: Dict[str, dict], jobs: List[Dict], per_persona: int = 50) -> Dict[str, List[str]]:
+    """
+    Relevance labels for eval-ranking, by job URL: jobs whose title holds one
+    of the persona's roles (seniority aside) and whose skills include at
+    least two of its must-haves.
+    """
+    out: dict[str, list[str]] = {}
+    for uid, p in personas.items():
+        roles = {role.lower() for role in ROLES if any(role.lower() in t.lower() for t in p.get("roles_target") or [])}
+        must = {s.lower() for s in p.get("must_have") or []}
+        hits: list[str] = []
+        for j in jobs:
+            title = (j.get("title") or "").lower()
+            tags = {t.lower() for t in (j.get("tags") or "").split(",") if t}
+            if any(role in title for role in roles) and len(tags & must) >= 2 and j["url"] not in hits:
+                hits.append(j["url"])
+                if len(hits) >= per_persona:
+                    break
+        out[uid] = hits
+    return out
@@ -2,18 +2,28 @@
 
 from __future__ import annotations
 import argparse, json, os, re, sqlite3, subprocess, sys
+from datetime import datetime, timezone
 from pathlib import Path
 from dotenv import load_dotenv
 
 # --- storage / harvest / alerts / prefill imports (these should already exist in your repo)
-from src.storage.db import init_db as db_init, upsert_jobs, fetch_all_jobs, get_conn, execute, is_postgres, get_db_label, maintain_jobs, dedupe_jobs
+from src.storage.db import init_db as db_init, upsert_jobs, fetch_all_jobs, JOB_LIST_COLUMNS, get_conn, execute, is_postgres, get_db_label, maintain_jobs, dedupe_jobs, ensure_seeds_revision
 from src.storage import gmail_connections
+from src.storage.activity import already_alerted, record_alerts, prune_activity
+from src.storage.maintenance import db_size_report, run_db_maintenance, maybe_run_db_maintenance
+from src.storage.features import sync_vocabulary, refresh_job_features
 from src.harvest.sources import dedupe, to_rows
 from src.harvest.remoteok import harvest_remoteok
 from src.harvest.adzuna import harvest_adzuna              # uses profile + ADZUNA_* from .env
 from src.harvest.greenhouse import harvest_greenhouse      # takes list of board tokens
 from src.harvest.lever import harvest_lever                # takes list of company handles
 from src.ranking.scoring import score_job                  # << use score_job; rank_jobs defined below
+from src.ranking.score_cache import fill_scores, rank_jobs_cached
+from src.ranking.scoring import rank_jobs_pruned
+from src.ranking.seed_boost import invalidate_seed_index
+from src.ranking.feeds import prune_stale_rankings, read_feed
+from src.ranking.engines import SERVING_ENGINES, resolve_engine
+from src.ranking.evaluation import DEFAULT_ENGINES, ENGINES, compare, evaluate, format_report, load_labels, load_snapshot, save_snapshot
 from src.alerts.email_alert import send_alert
 from src.prefill.prefill import build_prefill_map
 
@@ -53,6 +63,7 @@ def ensure_seeds_table():
         """
     with con:
         con.execute(schema)
+        ensure_seeds_revision(con)
     con.close()
 
 def detect_provider(url: str) -> tuple[str|None, str|None]:
@@ -82,19 +93,21 @@ def _seed_keywords() -> set[str]:
                 if len(k) >= 3: kws.add(k)
     return kws
 
-def rank_jobs(jobs: list[dict], profile: dict) -> list[dict]:
+def rank_jobs(jobs: list[dict], profile: dict, limit: int | None = None) -> list[dict]:
     """
-    Ranks jobs by calling score_job(j, profile). Assumes scoring.py applies seed boost.
-    Adds _score to each job dict and returns sorted list (desc).
+    Ranks jobs with the same score as score_job(j, profile) (seed boost included),
+    reusing cached static components from job_scores; only recency is recomputed.
+    Adds _score to each job dict and returns sorted list (desc), or its top `limit`.
     """
-    ranked: list[dict] = []
-    for j in jobs:
-        s = float(score_job(j, profile))
-        jj = dict(j)
-        jj["_score"] = round(s, 4)
-        ranked.append(jj)
-    ranked.sort(key=lambda x: x["_score"], reverse=True)
-    return ranked
+    return rank_jobs_cached(jobs, profile, limit=limit)
+
+def _fill_score_cache():
+    # Rankings only read job_scores; harvests fill it for every persona.
+    try:
+        n = fill_scores()
+        print(f"[ok] score cache filled: {n} entries")
+    except Exception as exc:
+        print(f"[warn] score cache fill failed: {exc}", file=sys.stderr)
 
 # -----------------------
 # Commands
@@ -103,6 +116,7 @@ def cmd_init_db(args):
     db_init()
     ensure_seeds_table()
     gmail_connections.ensure_table()
+    sync_vocabulary()
     con = get_conn()
     try:
         row = con.execute("SELECT COUNT(*) AS count FROM jobs").fetchone()
@@ -134,13 +148,18 @@ def cmd_harvest_live(args):
         jobs += harvest_lever(lv)
 
     jobs = dedupe(jobs)
-    upsert_jobs(to_rows(jobs))
-    print(f"[ok] Inserted {len(jobs)} live jobs.")
+    stats = upsert_jobs(to_rows(jobs))
+    print(
+        f"[ok] Upserted {len(jobs)} live jobs: inserted={stats['inserted']} updated={stats['updated']} "
+        f"unchanged={stats['unchanged']} failed={stats['failed']}"
+    )
+    _fill_score_cache()
 
 def cmd_ingest_naukri_imap(args):
     from src.naukri.email_ingest_imap import ingest as ingest_naukri
     n = ingest_naukri(days=args.since, max_msgs=args.max)
     print(f"[ok] Ingested {n} Naukri jobs from email alerts.")
+    _fill_score_cache()
 
 def cmd_ingest_linkedin_imap(args):
     try:
@@ -150,13 +169,65 @@ def cmd_ingest_linkedin_imap(args):
         return
     n = ingest_li(days=args.since, max_msgs=args.max)
     print(f"[ok] Ingested {n} LinkedIn jobs from email alerts.")
+    _fill_score_cache()
 
 def cmd_score(args):
     prof = load_profile()
-    jobs = fetch_all_jobs()
+    try:
+        engine = resolve_engine(args.engine, args.source, None, args.include_inactive)
+    except ValueError as e:
+        print(f"[error] {e}", file=sys.stderr)
+        sys.exit(2)
+    # Engine modules (numpy-backed ones included) load only when a ranking needs them.
+    if engine == "pushdown":
+        from src.ranking.pushdown import rank_jobs_pushdown
+
+        ranked, total = rank_jobs_pushdown(prof, args.top, source=args.source, include_inactive=args.include_inactive)
+        print(f"[info] ranked {total} jobs in SQL, re-ranked candidates in Python")
+        _print_ranked(ranked, args)
+        return
+    if engine == "sharded":
+        from src.ranking.shards import ShardCoordinator
+
+        try:
+            with ShardCoordinator.from_env() as coordinator:
+                ranked, total = coordinator.rank(prof, args.top, source=args.source)
+        except RuntimeError as e:
+            print(f"[error] {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"[info] ranked {total} jobs across {len(coordinator.shards)} shards")
+        _print_ranked(ranked, args)
+        return
+    if engine == "feed":
+        _print_ranked(read_feed(prof, args.top), args)
+        return
+    jobs = fetch_all_jobs(args.include_inactive, with_features=True)
     if args.source:
         jobs = [j for j in jobs if (j.get("source") or "").startswith(args.source)]
-    ranked = rank_jobs(jobs, prof)
+    if engine == "pruned":
+        ranked, stats = rank_jobs_pruned(jobs, prof, args.top)
+        print(f"[info] pruned {stats['pruned']}/{len(jobs)} jobs ({stats['pruned_pct']}%) without a keyword scan")
+    elif engine == "indexed":
+        from src.ranking.inverted_index import rank_jobs_indexed
+
+        ranked = rank_jobs_indexed(jobs, prof, limit=args.top)
+    elif engine == "tfidf":
+        from src.ranking.tfidf import rank_jobs_tfidf
+
+        ranked = rank_jobs_tfidf(jobs, prof, limit=args.top)
+    elif engine == "seed_similar":
+        from src.ranking.lsh import rank_jobs_seed_similar
+
+        ranked = rank_jobs_seed_similar(jobs, prof, limit=args.top)
+    elif engine == "parallel":
+        from src.ranking.parallel import rank_jobs_parallel
+
+        ranked = rank_jobs_parallel(jobs, prof, limit=args.top, workers=args.workers)
+    else:
+        ranked = rank_jobs(jobs, prof, limit=args.top)
+    _print_ranked(ranked, args)
+
+def _print_ranked(ranked: list[dict], args):
     for i, j in enumerate(ranked[: args.top], 1):
         s = j.get("_score")
         print(f"{i:02d}. [{s:.2f}] {j.get('title')} — {j.get('company')} | {j.get('location')} | {j.get('source')}")
@@ -164,26 +235,213 @@ def cmd_score(args):
     if args.alert:
         send_alert(ranked, top=args.top)
 
+def _persona_profiles(root: Path = ROOT) -> list[tuple[str, dict]]:
+    """(uid, persona) for every personas/<uid>.json."""
+    out = []
+    for path in sorted((root / "personas").glob("*.json")):
+        try:
+            out.append((path.stem, json.loads(path.read_text(encoding="utf-8"))))
+        except Exception as exc:
+            print(f"[warn] skipping persona {path.name}: {exc}")
+    return out
+
+def _fresh_from_feed(uid, prof, top: int, within_days) -> list[dict]:
+    # Page through the feed until `top` jobs not yet alerted are found.
+    out, offset, page = [], 0, max(top * 2, 50)
+    while len(out) < top:
+        rows = read_feed(prof, page, offset, sync=offset == 0)
+        if not rows:
+            break
+        seen = already_alerted(uid, [j.get("url") for j in rows], within_days=within_days)
+        out += [j for j in rows if j.get("url") not in seen]
+        offset += page
+    return out[:top]
+
 def cmd_alert(args):
-    prof = load_profile()
-    ranked = rank_jobs(fetch_all_jobs(), prof)
-    send_alert(ranked, top=args.top)
-    print(f"[ok] Alert sent (top {args.top}).")
+    if args.feed:
+        try:
+            resolve_engine("feed", include_inactive=args.include_inactive)
+        except ValueError as e:
+            print(f"[error] {e}", file=sys.stderr)
+            sys.exit(2)
+    targets = [(None, load_profile())]
+    if args.all_personas:
+        targets += _persona_profiles()
+    if args.feed:
+        # Persisted per-persona feeds: each ranking read is O(page).
+        for uid, prof in targets:
+            if args.fresh_only:
+                ranked = _fresh_from_feed(uid, prof, args.top, args.fresh_days)
+            else:
+                ranked = read_feed(prof, args.top)
+            if send_alert(ranked, top=args.top):
+                record_alerts(uid, ranked[: args.top])
+            print(f"[ok] Alert sent (top {args.top}){f' for {uid}' if uid else ''}.")
+        return
+    from src.ranking.multi import rank_personas
+    from src.ranking.parallel import ParallelRanker
+
+    jobs = fetch_all_jobs(args.include_inactive, with_features=True)
+    # --fresh-only filters after ranking, so it needs the whole ranking.
+    limit = None if args.fresh_only else args.top
+    # One pool for all personas: the corpus is shared with the workers once.
+    with ParallelRanker(jobs, args.workers) as ranker:
+        # Serially, several personas are ranked together in one pass over the jobs.
+        batch = rank_personas(jobs, dict(targets), limit=limit) if not ranker.parallel and len(targets) > 1 else None
+        for uid, prof in targets:
+            if batch is not None:
+                ranked = batch[uid]
+            else:
+                ranked = ranker.rank(prof, limit=limit) if ranker.parallel else rank_jobs(jobs, prof, limit=limit)
+            if args.fresh_only:
+                seen = already_alerted(uid, [j.get("url") for j in ranked], within_days=args.fresh_days)
+                ranked = [j for j in ranked if j.get("url") not in seen]
+            if send_alert(ranked, top=args.top):
+                record_alerts(uid, ranked[: args.top])
+            print(f"[ok] Alert sent (top {args.top}){f' for {uid}' if uid else ''}.")
+
+def cmd_eval_ranking(args):
+    # Personas are named as in labels files: "profile" for profile.json, else the uid.
+    personas = dict([("profile", load_profile())] + _persona_profiles())
+    labels = load_labels(args.labels)
+    if args.snapshot:
+        jobs = load_snapshot(args.snapshot)
+    else:
+        jobs = fetch_all_jobs(args.include_inactive, with_features=True)
+        if args.save_snapshot:
+            save_snapshot(jobs, args.save_snapshot)
+            print(f"[ok] corpus snapshot: {len(jobs)} jobs -> {args.save_snapshot}")
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()] if args.engines else list(DEFAULT_ENGINES)
+    if args.snapshot:
+        # Database-backed engines would rank the database, not the snapshot.
+        skipped = [e for e in engines if e in ENGINES and ENGINES[e].uses_db]
+        if skipped:
+            print(f"[warn] skipping database-backed engines with --snapshot: {', '.join(skipped)}")
+        engines = [e for e in engines if e not in skipped]
+    missing = [p for p in labels if p not in personas]
+    if missing:
+        print(f"[warn] labels for unknown personas ignored: {', '.join(missing)}")
+    result = evaluate(jobs, personas, labels, engines, k=args.k, repeat=args.repeat, memory=not args.no_memory)
+    deltas = compare(result, json.loads(Path(args.compare).read_text(encoding="utf-8"))) if args.compare else None
+    print(f"[info] {result['jobs']} jobs, {len(result['personas'])} labelled personas, k={args.k}, {args.repeat} runs each")
+    print(format_report(result, deltas))
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out = Path(args.out) if args.out else ROOT / "eval_results" / f"eval-{stamp}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(f"[ok] results saved to {out}")
+
+def cmd_gen_fixtures(args):
+    from src.harvest.fixtures import synthetic_labels, synthetic_personas, synthetic_postings, synthetic_seeds, write_alert_mbox
+    from src.ranking.dates import parse_dt
+
+    # Relative dates hang off one anchor; by default today's UTC midnight, so a
+    # seed gives the same data all day.
+    now = parse_dt(args.now) if args.now else datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if now is None:
+        print(f"[error] --now: unparseable date {args.now!r}", file=sys.stderr)
+        sys.exit(2)
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    db_init()
+    ensure_seeds_table()
+
+    jobs = synthetic_postings(args.jobs, seed=args.seed, dup_rate=args.dup_rate, jd_mean=args.jd_mean,
+                              jd_sigma=args.jd_sigma, jd_min=args.jd_min, jd_max=args.jd_max, now=now)
+    personas = synthetic_personas(args.personas, seed=args.seed)
+    persona_dir = Path(args.personas_dir) if args.personas_dir else out / "personas"
+    persona_dir.mkdir(parents=True, exist_ok=True)
+    for uid, persona in personas.items():
+        (persona_dir / f"{uid}.json").write_text(json.dumps(persona, indent=2), encoding="utf-8")
+    # Vocabulary first, so the upserts index features for the new personas' terms.
+    sync_vocabulary(personas.values())
+
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    for start in range(0, len(jobs), args.batch):
+        stats = upsert_jobs(to_rows(jobs[start : start + args.batch]))
+        for k in totals:
+            totals[k] += stats.get(k, 0)
+    print(f"[ok] jobs: {len(jobs)} generated ({get_db_label()}) inserted={totals['inserted']} "
+          f"updated={totals['updated']} unchanged={totals['unchanged']} failed={totals['failed']}")
+
+    seeds = synthetic_seeds(jobs, args.seeds, seed=args.seed)
+    con = get_conn()
+    try:
+        for s in seeds:
+            _insert_seed(con, s["url"], s["title_hint"], s["company_hint"], s["notes"])
+        con.commit()
+    finally:
+        con.close()
+    invalidate_seed_index()
+    sync_vocabulary(personas.values())
+    print(f"[ok] seeds: {len(seeds)}; personas: {len(personas)} -> {persona_dir}")
+
+    for kind, source in (("naukri", "naukri_email"), ("linkedin", "linkedin_email")):
+        path = out / f"{kind}_alerts.mbox"
+        msgs = write_alert_mbox(str(path), kind, [j for j in jobs if j["source"] == source], args.per_email, now)
+        print(f"[ok] {kind} alerts: {msgs} messages -> {path}")
+    labels = out / "labels.json"
+    labels.write_text(json.dumps(synthetic_labels(personas, jobs), indent=2), encoding="utf-8")
+    print(f"[ok] eval-ranking labels -> {labels}")
+
+def cmd_shard_worker(args):
+    import uvicorn
+    from src.api.shard_worker import create_shard_app
+
+    uvicorn.run(create_shard_app(args.shard, args.shards), host=args.host, port=args.port, log_level="warning")
 
 def cmd_prefill(args):
     mapping = build_prefill_map(ROOT, load_profile(), args.ats)
     print(json.dumps(mapping, indent=2))
 
+def _print_db_maintenance(result):
+    if not result:
+        return
+    print(f"[ok] db maintenance: tables={','.join(result['tables']) or '-'} elapsed={result['elapsed_s']}s")
+    if "reclaimed_bytes" in result:
+        print(f"    reclaimed {result['reclaimed_bytes']} bytes")
+    for note in result.get("notes") or []:
+        print(f"    [note] {note}")
+
 def cmd_maintain_jobs(args):
     marked_inactive, archived = maintain_jobs()
     print(f"[ok] jobs maintained: marked_inactive={marked_inactive} archived={archived}")
+    pruned = prune_stale_rankings()
+    print(f"[ok] stale rankings pruned: job_scores={pruned['job_scores']} persona_feeds={pruned['persona_feeds']}")
+    _print_db_maintenance(maybe_run_db_maintenance())
+
+def cmd_prune_activity(args):
+    result = prune_activity(args.days)
+    print(f"[ok] activity pruned: alerts={result['alerts_pruned']} actions={result['actions_pruned']}")
+    _print_db_maintenance(maybe_run_db_maintenance())
 
 def cmd_dedupe_jobs(args):
     deleted = dedupe_jobs()
     print(f"[ok] jobs deduped: removed={deleted}")
+    _print_db_maintenance(maybe_run_db_maintenance())
+
+def cmd_features(args):
+    size = sync_vocabulary()
+    n = refresh_job_features()
+    print(f"[ok] job features: vocabulary={size} terms, reindexed={n} jobs")
+    _fill_score_cache()
+
+def cmd_db_maintenance(args):
+    if args.report:
+        print(json.dumps(db_size_report(), indent=2, default=str))
+        return
+    if args.force or args.full:
+        result = run_db_maintenance(full=args.full)
+    else:
+        result = maybe_run_db_maintenance()
+        if result is None:
+            print("[ok] db maintenance: nothing due (churn below thresholds)")
+            return
+    _print_db_maintenance(result)
 
 def cmd_list(args):
-    jobs = fetch_all_jobs()
+    # The JD text is only needed when ranking.
+    jobs = fetch_all_jobs(args.include_inactive, None if args.rank else JOB_LIST_COLUMNS, with_features=args.rank)
     if args.source:
         jobs = [j for j in jobs if (j.get("source") or "").startswith(args.source)]
     if args.contains:
@@ -196,22 +454,27 @@ def cmd_list(args):
             return needle in text
         jobs = [j for j in jobs if match(j)]
     if args.rank:
-        jobs = rank_jobs(jobs, load_profile())
+        jobs = rank_jobs(jobs, load_profile(), limit=args.limit)
     for i, j in enumerate(jobs[: args.limit], 1):
         s = f" | score={j.get('_score'):.2f}" if args.rank and j.get("_score") is not None else ""
         print(f"{i:02d} [{j.get('source')}] {j.get('title')} — {j.get('company')} | {j.get('location')}{s}")
         print(f"    {j.get('url')}")
 
 # --- Seeds
-def cmd_seed_add(args):
-    ensure_seeds_table()
-    con = get_conn()
+def _insert_seed(con, url: str, title: str | None, company: str | None, notes: str | None) -> None:
     if is_postgres():
         sql = "INSERT INTO seeds(url, title_hint, company_hint, notes) VALUES(?,?,?,?) ON CONFLICT (url) DO NOTHING"
     else:
         sql = "INSERT OR IGNORE INTO seeds(url, title_hint, company_hint, notes) VALUES(?,?,?,?)"
-    execute(con, sql, (args.url.strip(), args.title, args.company, args.notes))
+    execute(con, sql, (url.strip(), title, company, notes))
+
+def cmd_seed_add(args):
+    ensure_seeds_table()
+    con = get_conn()
+    _insert_seed(con, args.url, args.title, args.company, args.notes)
     con.commit(); con.close()
+    invalidate_seed_index()
+    sync_vocabulary()
     print("[ok] Seed saved:", args.url)
 
 def cmd_seed_list(args):
@@ -237,6 +500,7 @@ def cmd_seed_harvest(args):
         return
 
     total = 0
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
     keywords = _seed_keywords() if args.filter_similar else set()
 
     for s in seeds:
@@ -259,10 +523,16 @@ def cmd_seed_harvest(args):
             jobs = [j for j in jobs if similar(j)]
 
         jobs = dedupe(jobs)
-        upsert_jobs(to_rows(jobs))
+        stats = upsert_jobs(to_rows(jobs))
+        for k in totals:
+            totals[k] += stats[k]
         total += len(jobs)
 
-    print(f"[ok] Inserted {total} ATS jobs from seeds.")
+    print(
+        f"[ok] Upserted {total} ATS jobs from seeds: inserted={totals['inserted']} updated={totals['updated']} "
+        f"unchanged={totals['unchanged']} failed={totals['failed']}"
+    )
+    _fill_score_cache()
 
 def _sqlite_table_exists(conn, name: str) -> bool:
     cur = execute(
@@ -408,13 +678,60 @@ def main():
     p2.add_argument("--top", type=int, default=10)
     p2.add_argument("--alert", action="store_true")
     p2.add_argument("--source", type=str, help="prefix filter, e.g., greenhouse:figma, lever:, adzuna:in")
+    p2.add_argument("--include-inactive", action="store_true", help="also consider jobs marked inactive (stale)")
+    p2.add_argument("--engine", choices=SERVING_ENGINES, default=None,
+                    help="ranking engine (default JOB_BUTLER_RANK_ENGINE or rank_jobs)")
+    p2.add_argument("--workers", type=int, default=None, help="with --engine parallel, rank in N processes (default JOB_BUTLER_RANK_WORKERS)")
     p2.set_defaults(func=cmd_score)
 
     p3 = sub.add_parser("alert")
     p3.add_argument("--top", type=int, default=10)
+    p3.add_argument("--fresh-only", action="store_true", help="skip jobs already alerted")
+    p3.add_argument("--fresh-days", type=int, default=None, help="with --fresh-only, only look back N days")
+    p3.add_argument("--include-inactive", action="store_true", help="also consider jobs marked inactive (stale)")
+    p3.add_argument("--all-personas", action="store_true", help="also alert every personas/<uid>.json (as that uid)")
+    p3.add_argument("--feed", action="store_true", help="read rankings from persisted per-persona feeds")
+    p3.add_argument("--workers", type=int, default=None, help="rank in N processes (default JOB_BUTLER_RANK_WORKERS)")
     p3.set_defaults(func=cmd_alert)
 
     # prefill
+    p_eval = sub.add_parser("eval-ranking")
+    p_eval.add_argument("--labels", type=str, required=True, help='JSON {persona: [job url|id, ...]} or {persona: {job: grade}}')
+    p_eval.add_argument("--engines", type=str, default=None, help=f"comma-separated: {', '.join(ENGINES)} (default {','.join(DEFAULT_ENGINES)})")
+    p_eval.add_argument("--k", type=int, default=10)
+    p_eval.add_argument("--repeat", type=int, default=5, help="timed runs per persona and engine")
+    p_eval.add_argument("--snapshot", type=str, default=None, help="rank a saved JSONL corpus instead of the database")
+    p_eval.add_argument("--save-snapshot", type=str, default=None, help="write the database corpus to this JSONL file first")
+    p_eval.add_argument("--include-inactive", action="store_true")
+    p_eval.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    p_eval.add_argument("--out", type=str, default=None, help="results file (default eval_results/eval-<utc>.json)")
+    p_eval.add_argument("--compare", type=str, default=None, help="earlier results file to diff against")
+    p_eval.set_defaults(func=cmd_eval_ranking)
+
+    p_fx = sub.add_parser("gen-fixtures", help="write deterministic synthetic jobs, personas, seeds and alert mboxes")
+    p_fx.add_argument("--jobs", type=int, default=10000)
+    p_fx.add_argument("--personas", type=int, default=10)
+    p_fx.add_argument("--seeds", type=int, default=20)
+    p_fx.add_argument("--seed", type=int, default=1, help="random seed; same seed and --now give the same data")
+    p_fx.add_argument("--dup-rate", type=float, default=0.05, help="share of rows that duplicate an earlier one")
+    p_fx.add_argument("--jd-mean", type=int, default=400, help="mean JD length in words (log-normal)")
+    p_fx.add_argument("--jd-sigma", type=float, default=0.5, help="log-normal sigma of JD length")
+    p_fx.add_argument("--jd-min", type=int, default=40)
+    p_fx.add_argument("--jd-max", type=int, default=2500)
+    p_fx.add_argument("--now", type=str, default=None, help="anchor for posted dates (default today 00:00 UTC)")
+    p_fx.add_argument("--out", type=str, default="fixtures", help="directory for personas, mboxes and labels")
+    p_fx.add_argument("--personas-dir", type=str, default=None, help="write personas here instead (e.g. personas)")
+    p_fx.add_argument("--per-email", type=int, default=10, help="jobs per alert email")
+    p_fx.add_argument("--batch", type=int, default=1000, help="rows per upsert_jobs call")
+    p_fx.set_defaults(func=cmd_gen_fixtures)
+
+    p_sw = sub.add_parser("shard-worker", help="serve one hash partition of the jobs for sharded ranking")
+    p_sw.add_argument("--shard", type=int, required=True, help="this worker's shard, 0..shards-1")
+    p_sw.add_argument("--shards", type=int, required=True)
+    p_sw.add_argument("--host", type=str, default="127.0.0.1")
+    p_sw.add_argument("--port", type=int, default=8700)
+    p_sw.set_defaults(func=cmd_shard_worker)
+
     p4 = sub.add_parser("prefill")
     p4.add_argument("--ats", required=True, choices=["greenhouse", "lever"])
     p4.set_defaults(func=cmd_prefill)
@@ -425,6 +742,7 @@ def main():
     p5.add_argument("--source", type=str)
     p5.add_argument("--contains", type=str)
     p5.add_argument("--rank", action="store_true")
+    p5.add_argument("--include-inactive", action="store_true", help="also consider jobs marked inactive (stale)")
     p5.set_defaults(func=cmd_list)
 
     # seeds
@@ -455,6 +773,19 @@ def main():
     p_dedupe = sub.add_parser("dedupe-jobs")
     p_dedupe.set_defaults(func=cmd_dedupe_jobs)
 
+    p_dbm = sub.add_parser("db-maintenance")
+    p_dbm.add_argument("--force", action="store_true", help="run on all tables regardless of churn")
+    p_dbm.add_argument("--full", action="store_true", help="full VACUUM (SQLite: enables incremental vacuum on old files)")
+    p_dbm.add_argument("--report", action="store_true", help="print table/index sizes and churn, then exit")
+    p_dbm.set_defaults(func=cmd_db_maintenance)
+
+    p_feat = sub.add_parser("features")
+    p_feat.set_defaults(func=cmd_features)
+
+    p_prune = sub.add_parser("prune-activity")
+    p_prune.add_argument("--days", type=int, default=None, help="retention window (default JOB_ACTIVITY_RETENTION_DAYS or 90)")
+    p_prune.set_defaults(func=cmd_prune_activity)
+
     args = ap.parse_args()
     if hasattr(args, "func"):
         args.func(args)
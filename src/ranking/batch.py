@@ -0,0 +1,101 @@
+# src/ranking/batch.py
+
+from __future__ import annotations
+from datetime import datetime
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from .matcher import CompiledPersona, compile_persona
+from .dates import as_epoch, to_epoch
+from .seed_boost import seed_seedscore
+
+ROLE_WEIGHT = 0.4
+KEYWORD_WEIGHT = 0.3
+RECENCY_WEIGHT = 0.3
+RECENCY_DAYS = 30
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required for batch scoring. Add numpy to requirements.txt.")
+
+
+def posted_epochs(jobs: list[dict]) -> "np.ndarray":
+    """posted_at as float epoch seconds; NaN where missing or unparseable."""
+    _require_numpy()
+    out = np.full(len(jobs), np.nan, dtype=np.float64)
+    for i, j in enumerate(jobs):
+        ts = to_epoch(j.get("posted_at"))
+        if ts is not None:
+            out[i] = ts
+    return out
+
+
+def recency_scores(epochs: "np.ndarray", now: float, days: int = RECENCY_DAYS) -> "np.ndarray":
+    """Vector form of normalize_age(): 1.0 when fresh, linear to 0.0 at `days`, 0.0 for NaN."""
+    age = np.maximum(0.0, (now - epochs) / 86400.0)
+    rec = np.where(age >= days, 0.0, 1.0 - age / float(days))
+    return np.nan_to_num(np.maximum(rec, 0.0), nan=0.0)
+
+
+def keyword_matrix(texts: list[str], cp: CompiledPersona) -> "np.ndarray":
+    """(jobs x distinct keywords) hit matrix over lowercased texts, one column per keyword."""
+    n = len(texts)
+    mat = np.zeros((n, len(cp.keywords)), dtype=bool)
+    for c, k in enumerate(cp.keywords):
+        mat[:, c] = np.fromiter((k in t for t in texts), dtype=bool, count=n)
+    return mat
+
+
+def score_jobs_batch(jobs: list[dict], profile: dict, now: datetime | float | None = None):
+    """
+    Columnar equivalent of score_job() over a whole list.
+    Returns (scores, order): float64 scores aligned with `jobs`, and the index
+    order rank_jobs() would produce (stable, descending by the 4-dp score).
+    """
+    _require_numpy()
+    cp = compile_persona(profile)
+    n = len(jobs)
+    now_ts = as_epoch(now)
+
+    role = np.zeros(n, dtype=bool)
+    kw = np.zeros(n, dtype=np.float64)
+
+    # Rows with current ingest-time features are matched from their bitsets;
+    # the rest get the columnar substring scan.
+    plan = cp.feature_plan() if any(j.get("_f_text_bits") is not None for j in jobs) else None
+    scan: list[int] = []
+    for i, j in enumerate(jobs):
+        if plan is not None and j.get("_f_text_bits") is not None and plan.size <= int(j.get("_f_vocab") or 0):
+            m = plan.match(j)
+            role[i] = m.role_hit
+            kw[i] = cp.keyword_fraction(m)
+        else:
+            scan.append(i)
+
+    if scan:
+        idx = np.array(scan, dtype=np.intp)
+        titles = [(jobs[i].get("title") or "").lower() for i in scan]
+        texts = [
+            " ".join((t, (jobs[i].get("jd_text") or ""), (jobs[i].get("company") or ""))).lower()
+            for t, i in zip(titles, scan)
+        ]
+        role[idx] = np.fromiter((any(r in t for r in cp.roles) for t in titles), dtype=bool, count=len(scan))
+        if cp.keyword_count and cp.keywords:
+            weights = np.array([cp.keyword_weights[k] for k in cp.keywords], dtype=np.float64)
+            hits = keyword_matrix(texts, cp).astype(np.float64) @ weights
+            kw[idx] = np.minimum(1.0, hits / max(1, cp.keyword_count))
+
+    rec = recency_scores(posted_epochs(jobs), now_ts)
+
+    scores = ROLE_WEIGHT * role + KEYWORD_WEIGHT * kw + RECENCY_WEIGHT * rec
+    seed = np.fromiter((seed_seedscore(j, profile) for j in jobs), dtype=np.float64, count=n)
+    scores = np.clip(np.maximum(scores, seed), 0.0, 1.0)
+
+    # Sort on Python's round() so ties break exactly as rank_jobs does.
+    rounded = np.fromiter((round(float(s), 4) for s in scores), dtype=np.float64, count=n)
+    order = np.argsort(-rounded, kind="stable")
+    return scores, order
@@ -0,0 +1,101 @@
+# src/ranking/dates.py
+
+from __future__ import annotations
+import re
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+# Harvested posted_at values repeat across rankings (one string per job), so
+# string parses are memoized; this bounds the memo at roughly a corpus.
+_MEMO_SIZE = 100_000
+
+# Numeric timestamps at or above this are milliseconds: 1e11 s is the year
+# 5138, 1e11 ms is 1973.
+_MS_THRESHOLD = 1e11
+
+# Epoch strings as RemoteOK ("1712345678") and Lever ("1712345678901") store
+# them. Nine digits at least, so compact dates like "20240105" stay ISO.
+_EPOCH_RE = re.compile(r"^-?\d{9,}(\.\d+)?$")
+
+
+def _from_number(x: float) -> float:
+    return x / 1000.0 if abs(x) >= _MS_THRESHOLD else x
+
+
+def _aware(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+@lru_cache(maxsize=_MEMO_SIZE)
+def _parse_str(s: str) -> float | None:
+    s = s.strip()
+    if not s:
+        return None
+    if _EPOCH_RE.match(s):
+        return _from_number(float(s))
+    iso = s[:-1] + "+00:00" if s[-1:] in ("Z", "z") else s
+    try:
+        return _aware(datetime.fromisoformat(iso)).timestamp()
+    except ValueError:
+        pass
+    # RFC 2822, as in RSS feeds and mail headers: "Tue, 05 Mar 2024 10:00:00 +0000".
+    try:
+        return _aware(parsedate_to_datetime(s)).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def to_epoch(val) -> float | None:
+    """
+    Float epoch seconds (UTC) for a posted_at value, or None if it cannot be
+    parsed. Accepts datetimes (naive = UTC), int/float epochs in seconds or
+    milliseconds, and strings holding either of those, ISO 8601 (with or
+    without a trailing Z) or RFC 2822.
+    """
+    if val is None or isinstance(val, bool):
+        return None
+    if isinstance(val, datetime):
+        return _aware(val).timestamp()
+    if isinstance(val, (int, float)):
+        return _from_number(float(val)) if val == val else None  # NaN
+    if isinstance(val, str):
+        return _parse_str(val)
+    return None
+
+
+def parse_dt(val) -> datetime | None:
+    """to_epoch() as a timezone-aware UTC datetime; None outside datetime's range."""
+    ts = to_epoch(val)
+    if ts is None:
+        return None
+    try:
+        return datetime.fromtimestamp(ts, timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def now_epoch() -> float:
+    """The reference "now" for a ranking batch; read once and passed down."""
+    return time.time()
+
+
+def as_epoch(now) -> float:
+    """A `now` argument (None, datetime or epoch seconds) as epoch seconds."""
+    if now is None:
+        return now_epoch()
+    if isinstance(now, datetime):
+        return _aware(now).timestamp()
+    return float(now)
+
+
+def recency(epoch: float | None, now: float, days: int = 30) -> float:
+    """1.0 when posted at `now`, decaying linearly to 0.0 at `days` old; 0.0 when unknown."""
+    if epoch is None:
+        return 0.0
+    age_days = max(0.0, (now - epoch) / 86400.0)
+    if age_days >= days:
+        return 0.0
+    return max(0.0, 1.0 - (age_days / float(days)))
+
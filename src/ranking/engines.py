@@ -0,0 +1,58 @@
+# src/ranking/engines.py
+
+from __future__ import annotations
+import os
+
+from src.storage.db import is_postgres
+
+from .evaluation import ENGINES
+from .shards import shard_urls
+
+# The evaluation.ENGINES entries /api/jobs and `score --engine` can serve.
+# "rank_jobs" is the default (served through the score cache).
+SERVING_ENGINES = ("rank_jobs", "parallel", "pruned", "indexed", "tfidf", "seed_similar", "feed", "pushdown", "sharded")
+
+# Engines that rank the persisted feed or the shards' active rows, so cannot
+# apply the request's filters the way the others do.
+_NO_FILTERS = ("feed",)
+_ACTIVE_ONLY = ("feed", "sharded")
+
+
+def default_engine() -> str:
+    """The engine used when a request names none (JOB_BUTLER_RANK_ENGINE, default rank_jobs)."""
+    name = (os.getenv("JOB_BUTLER_RANK_ENGINE") or "").strip()
+    return name if name in SERVING_ENGINES else "rank_jobs"
+
+
+def resolve_engine(
+    name: str | None,
+    source: str | None = None,
+    contains: str | None = None,
+    include_inactive: bool = False,
+) -> str:
+    """
+    The serving engine for `name`. Raises ValueError when a named engine is
+    unknown or cannot honour the request's filters, instead of quietly
+    ranking some other way. With no name, default_engine() is used where it
+    can serve the request and rank_jobs where it cannot.
+    """
+    if name is None or not name.strip():
+        try:
+            return _check_engine(default_engine(), source, contains, include_inactive)
+        except ValueError:
+            return "rank_jobs"
+    return _check_engine(name.strip(), source, contains, include_inactive)
+
+
+def _check_engine(name: str, source: str | None, contains: str | None, include_inactive: bool) -> str:
+    if name not in ENGINES or name not in SERVING_ENGINES:
+        raise ValueError(f"unknown engine {name!r}; one of: {', '.join(SERVING_ENGINES)}")
+    if name in _NO_FILTERS and (source or contains):
+        raise ValueError(f"engine {name!r} does not support source/contains filters")
+    if name in _ACTIVE_ONLY and include_inactive:
+        raise ValueError(f"engine {name!r} ranks active jobs only")
+    if name == "pushdown" and not is_postgres():
+        raise ValueError("engine 'pushdown' needs Postgres (DATABASE_URL)")
+    if name == "sharded" and not shard_urls():
+        raise ValueError("engine 'sharded' needs JOB_BUTLER_SHARDS")
+    return name
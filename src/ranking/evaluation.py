@@ -0,0 +1,257 @@
+# src/ranking/evaluation.py
+
+from __future__ import annotations
+import json
+import math
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+
+class Engine(NamedTuple):
+    rank: Callable[[list[dict], dict, int], list[dict]]  # (jobs, profile, k) -> top-k rows
+    uses_db: bool  # reads indexes/caches built from the database, not just `jobs`
+
+
+def _scoring_rank(jobs, profile, k):
+    from .scoring import rank_jobs
+
+    return rank_jobs(jobs, profile, limit=k)
+
+
+def _main_rank(jobs, profile, k):
+    from src.main import rank_jobs
+
+    return rank_jobs(jobs, profile, limit=k)
+
+
+def _pruned_rank(jobs, profile, k):
+    from .scoring import rank_jobs_pruned
+
+    return rank_jobs_pruned(jobs, profile, k)[0]
+
+
+def _batch_rank(jobs, profile, k):
+    from .batch import score_jobs_batch
+
+    scores, order = score_jobs_batch(jobs, profile)
+    return [dict(jobs[i], _score=round(float(scores[i]), 4)) for i in order[:k].tolist()]
+
+
+def _parallel_rank(jobs, profile, k):
+    from .parallel import rank_jobs_parallel
+
+    return rank_jobs_parallel(jobs, profile, limit=k)
+
+
+def _indexed_rank(jobs, profile, k):
+    from .inverted_index import rank_jobs_indexed
+
+    return rank_jobs_indexed(jobs, profile, limit=k)
+
+
+def _feed_rank(jobs, profile, k):
+    from .feeds import read_feed
+
+    return read_feed(profile, k)
+
+
+def _tfidf_rank(jobs, profile, k):
+    from .tfidf import rank_jobs_tfidf
+
+    return rank_jobs_tfidf(jobs, profile, limit=k)
+
+
+def _seed_similar_rank(jobs, profile, k):
+    from .lsh import rank_jobs_seed_similar
+
+    return rank_jobs_seed_similar(jobs, profile, limit=k)
+
+
+def _pushdown_rank(jobs, profile, k):
+    from .pushdown import rank_jobs_pushdown
+
+    return rank_jobs_pushdown(profile, k)[0]
+
+
+def _sharded_rank(jobs, profile, k):
+    from .parallel import rank_workers
+    from .shards import local_cluster
+
+    # In-process shards: checks the scatter-gather merge, not its latency.
+    with local_cluster(jobs, max(2, rank_workers())) as cluster:
+        return cluster.rank(profile, k)[0]
+
+
+# Engines by name; new rankers register here to be compared side by side.
+ENGINES: dict[str, Engine] = {
+    "rank_jobs": Engine(_scoring_rank, False),
+    "main.rank_jobs": Engine(_main_rank, True),
+    "pruned": Engine(_pruned_rank, False),
+    "batch": Engine(_batch_rank, False),
+    "parallel": Engine(_parallel_rank, False),
+    "indexed": Engine(_indexed_rank, True),
+    "feed": Engine(_feed_rank, True),
+    "tfidf": Engine(_tfidf_rank, True),
+    "seed_similar": Engine(_seed_similar_rank, True),
+    "pushdown": Engine(_pushdown_rank, True),  # Postgres only
+    "sharded": Engine(_sharded_rank, False),
+}
+DEFAULT_ENGINES = ("rank_jobs", "main.rank_jobs")
+
+
+# --- metrics ----------------------------------------------------------------
+
+def ndcg_at_k(ranked: list, gains: dict, k: int) -> float:
+    """NDCG@k of a ranked key list against {key: graded relevance}; 0.0 with no relevant keys."""
+    dcg = sum(gains.get(key, 0.0) / math.log2(r + 2) for r, key in enumerate(ranked[:k]))
+    ideal = sorted((g for g in gains.values() if g > 0), reverse=True)[:k]
+    idcg = sum(g / math.log2(r + 2) for r, g in enumerate(ideal))
+    return dcg / idcg if idcg > 0 else 0.0
+
+
+def recall_at_k(ranked: list, gains: dict, k: int) -> float:
+    relevant = {key for key, g in gains.items() if g > 0}
+    if not relevant:
+        return 0.0
+    return len(relevant.intersection(ranked[:k])) / len(relevant)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))]
+
+
+# --- inputs -----------------------------------------------------------------
+
+def load_labels(path: str | Path) -> dict[str, dict]:
+    """
+    Relevance labels: {persona: [job, ...]} or {persona: {job: grade}}, where
+    a job is its url (stable across databases) or its id. Listed jobs without
+    a grade count as 1.
+    """
+    raw = json.loads(Path(path).read_text(encoding="utf-8"))
+    out: dict[str, dict] = {}
+    for persona, jobs in raw.items():
+        gains = jobs if isinstance(jobs, dict) else {j: 1.0 for j in jobs}
+        out[persona] = {_label_key(k): float(g) for k, g in gains.items()}
+    return out
+
+
+def _label_key(k):
+    if isinstance(k, int):
+        return k
+    s = str(k)
+    return int(s) if s.isdigit() else s
+
+
+def _job_keys(row: dict, by_url: bool) -> object:
+    return row.get("url") if by_url else row.get("id")
+
+
+def save_snapshot(jobs: list[dict], path: str | Path) -> None:
+    """Write a corpus snapshot as JSON lines (feature columns dropped)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for j in jobs:
+            f.write(json.dumps({k: v for k, v in j.items() if not k.startswith("_f_")}, default=str) + "\n")
+
+
+def load_snapshot(path: str | Path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# --- runs -------------------------------------------------------------------
+
+def evaluate(
+    jobs: list[dict],
+    personas: dict[str, dict],
+    labels: dict[str, dict],
+    engines: list[str],
+    k: int = 10,
+    repeat: int = 5,
+    memory: bool = True,
+) -> dict:
+    """
+    Rank `jobs` for every labelled persona with each engine. Reports mean
+    NDCG@k / recall@k over personas, p50/p95 latency over all (persona, run)
+    timings, and the peak traced allocation of one run (tracemalloc slows a
+    run down, so it is measured separately from the timings).
+    """
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        raise ValueError(f"unknown engine(s): {', '.join(unknown)}; known: {', '.join(ENGINES)}")
+    names = [p for p in personas if p in labels]
+    results: dict[str, dict] = {}
+    for name in engines:
+        engine = ENGINES[name]
+        ndcg, recall, timings, peaks, per_persona = [], [], [], [], {}
+        for persona in names:
+            profile, gains = personas[persona], labels[persona]
+            by_url = any(isinstance(key, str) for key in gains)
+            ranked: list[dict] = []
+            for _ in range(max(1, repeat)):
+                start = time.perf_counter()
+                ranked = engine.rank(jobs, profile, k)
+                timings.append(time.perf_counter() - start)
+            if memory:
+                tracemalloc.start()
+                try:
+                    engine.rank(jobs, profile, k)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+            keys = [_job_keys(r, by_url) for r in ranked]
+            n, r = ndcg_at_k(keys, gains, k), recall_at_k(keys, gains, k)
+            ndcg.append(n)
+            recall.append(r)
+            per_persona[persona] = {"ndcg": round(n, 4), "recall": round(r, 4)}
+        results[name] = {
+            f"ndcg@{k}": round(sum(ndcg) / len(ndcg), 4) if ndcg else 0.0,
+            f"recall@{k}": round(sum(recall) / len(recall), 4) if recall else 0.0,
+            "p50_ms": round(1000 * percentile(timings, 50), 2),
+            "p95_ms": round(1000 * percentile(timings, 95), 2),
+            "peak_kb": round(max(peaks) / 1024, 1) if peaks else None,
+            "personas": per_persona,
+        }
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "k": k,
+        "repeat": repeat,
+        "jobs": len(jobs),
+        "personas": names,
+        "engines": results,
+    }
+
+
+def compare(current: dict, previous: dict) -> dict[str, dict]:
+    """Per-engine metric deltas (current - previous) for engines in both runs."""
+    out: dict[str, dict] = {}
+    for name, cur in current["engines"].items():
+        prev = previous.get("engines", {}).get(name)
+        if prev is None:
+            continue
+        out[name] = {
+            m: round(cur[m] - prev[m], 4)
+            for m in cur
+            if m != "personas" and isinstance(cur[m], (int, float)) and isinstance(prev.get(m), (int, float))
+        }
+    return out
+
+
+def format_report(result: dict, deltas: dict | None = None) -> str:
+    k = result["k"]
+    cols = [f"ndcg@{k}", f"recall@{k}", "p50_ms", "p95_ms", "peak_kb"]
+    width = max([len("engine")] + [len(n) for n in result["engines"]])
+    lines = [f"{'engine':<{width}}  " + "  ".join(f"{c:>10}" for c in cols)]
+    for name, r in result["engines"].items():
+        lines.append(f"{name:<{width}}  " + "  ".join(f"{'-' if r[c] is None else r[c]:>10}" for c in cols))
+        d = (deltas or {}).get(name)
+        if d:
+            lines.append(f"{'  vs prev':<{width}}  " + "  ".join(f"{d[c]:>+10}" if c in d else f"{'':>10}" for c in cols))
+    return "\n".join(lines)
@@ -0,0 +1,427 @@
+# src/ranking/feeds.py
+
+from __future__ import annotations
+import heapq
+import hashlib
+import time
+
+from src.storage.db import (
+    get_conn,
+    execute,
+    is_postgres,
+    run_write,
+    jobs_order_columns,
+    jobs_order_key,
+    jobs_order_sql,
+    jobs_query_sql,
+    _ensure_persona_feeds,
+)
+from src.storage.features import features_generation, known_personas
+
+from .dates import now_epoch, recency, to_epoch
+from .matcher import compile_persona
+from .score_cache import _prune_scores, scores_key
+from .scoring import (
+    SEED_REASON,
+    _ranked_row,
+    _recency_reason,
+    _static_reasons,
+    combine_score,
+)
+from .seed_boost import seed_seedscore
+
+# normalize_age() decays linearly to zero over this many days.
+FEED_DAYS = 30
+_DECAY = 0.3 / (FEED_DAYS * 86400.0)
+
+# A feed is re-synced at most this often (seconds) unless this process wrote
+# job features since; reads in between touch only the page.
+_SYNC_TTL = 5.0
+# Re-read feature rows this far behind the watermark (late commits).
+_OVERLAP = "5 minutes"
+_WRITE_CHUNK = 1000
+_BOUND_EPS = 1e-9
+
+_SYNCED: dict[str, tuple[float, int]] = {}
+
+# Part of the feed key; bumped when stored columns are derived differently
+# (2: posted_epoch parsed by dates.to_epoch, which also reads epoch strings),
+# so existing feeds are rebuilt rather than mixed with new rows.
+_FEED_FORMAT = "2"
+
+
+def feed_key(profile: dict) -> str:
+    """Feeds are keyed like the score cache: persona match fields + seed digest."""
+    return hashlib.sha256(f"{scores_key(profile)}:{_FEED_FORMAT}".encode("utf-8")).hexdigest()
+
+
+def _active_sql(alias: str = "jobs") -> str:
+    return f"{alias}.is_active" if is_postgres() else f"{alias}.is_active = 1"
+
+
+def _feed_entry(j: dict, profile: dict, cp) -> tuple:
+    m = cp.match(j)
+    role_hit = m.role_hit
+    keyword = cp.keyword_fraction(m)
+    seed = seed_seedscore(j, profile, m)
+    static = combine_score(role_hit, keyword, 0.0, 0.0)
+    epoch = to_epoch(j.get("posted_at"))
+    # The fresh part of the score at time t is static + 0.3 - _DECAY * (t - epoch),
+    # so ordering by decay_key orders fresh jobs at every t.
+    decay_key = static + _DECAY * epoch if epoch is not None else None
+    # floor is the job's final (rounded) score once its recency term is 0.
+    floor = round(combine_score(role_hit, keyword, 0.0, seed), 4)
+    why = "\n".join(_static_reasons(cp, m))
+    return (j["id"], j.get("content_hash"), int(role_hit), keyword, seed, floor, decay_key, epoch, why)
+
+
+# --- sync -------------------------------------------------------------------
+
+def _feature_watermark(conn):
+    row = execute(conn, "SELECT MAX(updated_at) AS w FROM job_features").fetchone()
+    w = row["w"] if row else None
+    return None if w is None else str(w)
+
+
+def _changed_jobs(conn, key: str, watermark: str | None) -> list[dict]:
+    if watermark is None:
+        return [dict(r) for r in execute(conn, jobs_query_sql(True, with_features=True)).fetchall()]
+    since = (
+        f"?::timestamptz - interval '{_OVERLAP}'" if is_postgres() else f"datetime(?, '-{_OVERLAP}')"
+    )
+    distinct = "IS DISTINCT FROM" if is_postgres() else "IS NOT"
+    rows = execute(
+        conn,
+        f"""
+        SELECT jobs.*, f.vocab_size AS _f_vocab, f.title_bits AS _f_title_bits, f.text_bits AS _f_text_bits
+          FROM job_features f
+          JOIN jobs ON jobs.id = f.job_id AND jobs.content_hash = f.content_hash
+          LEFT JOIN persona_feeds pf ON pf.persona_key = ? AND pf.job_id = jobs.id
+         WHERE f.updated_at >= {since}
+           AND pf.content_hash {distinct} jobs.content_hash
+        """,
+        (key, watermark),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def _write_feed(conn, key: str, entries: list[tuple], watermark: str | None, full: bool, now_ts: float,
+                final: bool = True) -> int:
+    """
+    Upsert feed rows. Only the `final` write of a sync retires decayed rows
+    and moves the watermark, so a sync that stops part-way is re-read in full
+    next time rather than skipping the rows it never wrote.
+    """
+    _ensure_persona_feeds(conn)
+    ts = "NOW()" if is_postgres() else "datetime('now')"
+    if full:
+        execute(conn, "DELETE FROM persona_feeds WHERE persona_key = ?", (key,))
+    for job_id, content_hash, role_hit, keyword, seed, floor, decay_key, epoch, why in entries:
+        execute(
+            conn,
+            f"""
+            INSERT INTO persona_feeds (persona_key, job_id, content_hash, role_hit, keyword, seed, floor,
+                                       decay_key, posted_epoch, why, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {ts})
+            ON CONFLICT (persona_key, job_id) DO UPDATE SET
+              content_hash = EXCLUDED.content_hash,
+              role_hit = EXCLUDED.role_hit,
+              keyword = EXCLUDED.keyword,
+              seed = EXCLUDED.seed,
+              floor = EXCLUDED.floor,
+              decay_key = EXCLUDED.decay_key,
+              posted_epoch = EXCLUDED.posted_epoch,
+              why = EXCLUDED.why,
+              updated_at = EXCLUDED.updated_at
+            """,
+            (key, job_id, content_hash, role_hit, keyword, seed, floor, decay_key, epoch, why),
+        )
+    if not final:
+        return len(entries)
+    # Fully decayed jobs leave the decay order: their recency term is 0 from
+    # now on, so floor alone ranks them. Inactive jobs stay (they are filtered
+    # at read time and return if re-harvested) until maintain_jobs deletes them.
+    execute(
+        conn,
+        "UPDATE persona_feeds SET decay_key = NULL WHERE persona_key = ? AND decay_key IS NOT NULL AND posted_epoch < ?",
+        (key, now_ts - FEED_DAYS * 86400.0),
+    )
+    built = ", built_at = EXCLUDED.built_at" if full else ""
+    execute(
+        conn,
+        f"""
+        INSERT INTO persona_feed_state (persona_key, watermark, built_at, synced_at)
+        VALUES (?, ?, {ts}, {ts})
+        ON CONFLICT (persona_key) DO UPDATE SET
+          watermark = EXCLUDED.watermark,
+          synced_at = EXCLUDED.synced_at{built}
+        """,
+        (key, watermark),
+    )
+    return len(entries)
+
+
+def sync_feed(profile: dict, conn=None, force: bool = False) -> dict:
+    """
+    Bring the persona's feed up to date: build it on first use, then merge in
+    jobs whose features changed since the last sync (new or re-harvested
+    content) and retire fully decayed ones from the decay order. Returns
+    {"merged", "full"}.
+    """
+    key = feed_key(profile)
+    gen = features_generation()
+    last = _SYNCED.get(key)
+    if not force and last is not None and last[1] == gen and time.monotonic() - last[0] < _SYNC_TTL:
+        return {"merged": 0, "full": False}
+
+    cp = compile_persona(profile)
+    read_conn = conn if conn is not None else get_conn()
+    try:
+        _ensure_persona_feeds(read_conn)
+        state = execute(read_conn, "SELECT watermark FROM persona_feed_state WHERE persona_key = ?", (key,)).fetchone()
+        full = state is None
+        watermark = _feature_watermark(read_conn)
+        jobs = _changed_jobs(read_conn, key, None if full else state["watermark"])
+        if not is_postgres():
+            read_conn.commit()
+    finally:
+        if conn is None:
+            read_conn.close()
+
+    entries = []
+    for j in jobs:
+        try:
+            entries.append(_feed_entry(j, profile, cp))
+        except Exception:
+            continue
+    now_ts = now_epoch()
+    if full:
+        run_write(conn, _write_feed, key, entries, watermark, True, now_ts)
+    else:
+        starts = range(0, max(1, len(entries)), _WRITE_CHUNK)
+        for i in starts:
+            final = i == starts[-1]
+            run_write(conn, _write_feed, key, entries[i : i + _WRITE_CHUNK], watermark, False, now_ts, final)
+    _SYNCED[key] = (time.monotonic(), gen)
+    return {"merged": len(entries), "full": full}
+
+
+def invalidate_persona_feed(profile: dict, conn=None) -> int:
+    """Drop the persona's feed (call before it is overwritten)."""
+    key = feed_key(profile)
+    _SYNCED.pop(key, None)
+
+    def _drop(c, k):
+        _ensure_persona_feeds(c)
+        cur = execute(c, "DELETE FROM persona_feeds WHERE persona_key = ?", (k,))
+        execute(c, "DELETE FROM persona_feed_state WHERE persona_key = ?", (k,))
+        return max(cur.rowcount or 0, 0)
+
+    return run_write(conn, _drop, key)
+
+
+def _prune_feeds(conn, keep: list[str]) -> int:
+    _ensure_persona_feeds(conn)
+    if keep:
+        marks = ", ".join(["?"] * len(keep))
+        cur = execute(conn, f"DELETE FROM persona_feeds WHERE persona_key NOT IN ({marks})", tuple(keep))
+        execute(conn, f"DELETE FROM persona_feed_state WHERE persona_key NOT IN ({marks})", tuple(keep))
+    else:
+        cur = execute(conn, "DELETE FROM persona_feeds")
+        execute(conn, "DELETE FROM persona_feed_state")
+    return max(cur.rowcount or 0, 0)
+
+
+def prune_stale_rankings(profiles=(), conn=None) -> dict:
+    """
+    Delete cached scores and feeds whose key matches no current persona
+    (profile.json, personas/*.json and `profiles`). Keys include the persona
+    hash and the seed digest, so persona edits and seed changes otherwise
+    leave the old rows behind for good.
+    """
+    personas = known_personas() + list(profiles)
+    score_keys = sorted({scores_key(p) for p in personas})
+    feed_keys = sorted({feed_key(p) for p in personas})
+    for k in list(_SYNCED):
+        if k not in feed_keys:
+            _SYNCED.pop(k, None)
+    return {
+        "job_scores": run_write(conn, _prune_scores, score_keys),
+        "persona_feeds": run_write(conn, _prune_feeds, feed_keys),
+    }
+
+
+# --- read -------------------------------------------------------------------
+
+class _Stream:
+    """
+    Feed rows in descending `column` order, ties in jobs_query_sql() order,
+    each with its jobs_order_key() as "tie". Pages continue from the last
+    `column` value, skipping the rows already read at that value.
+    """
+
+    def __init__(self, conn, key: str, column: str, batch: int):
+        self.conn, self.key, self.column, self.batch = conn, key, column, batch
+        self.rows: list[dict] = []
+        self.pos = 0
+        self.after: float | None = None
+        self.skip = 0
+        self.done = False
+
+    def _fetch(self) -> None:
+        col = f"pf.{self.column}"
+        where = f"pf.persona_key = ? AND {col} IS NOT NULL AND {_active_sql()}"
+        params: tuple = (self.key,)
+        if self.after is not None:
+            where += f" AND {col} <= ?"
+            params += (self.after,)
+        rows = execute(
+            self.conn,
+            f"""
+            SELECT pf.job_id, pf.role_hit, pf.keyword, pf.seed, {col} AS k, jobs.id, jobs.posted_at,
+                   {jobs_order_columns()}
+              FROM persona_feeds pf
+              JOIN jobs ON jobs.id = pf.job_id
+             WHERE {where}
+             ORDER BY {col} DESC, {jobs_order_sql()}
+             LIMIT ? OFFSET ?
+            """,
+            (*params, self.batch, self.skip),
+        ).fetchall()
+        self.rows = [dict(r) for r in rows]
+        for r in self.rows:
+            r["tie"] = jobs_order_key(r)
+        self.pos = 0
+        if len(self.rows) < self.batch:
+            self.done = True
+        if self.rows:
+            last = self.rows[-1]["k"]
+            at_last = sum(1 for r in self.rows if r["k"] == last)
+            self.skip = self.skip + at_last if last == self.after else at_last
+            self.after = last
+
+    def peek(self) -> dict | None:
+        if self.pos >= len(self.rows):
+            if self.done:
+                return None
+            self._fetch()
+            if not self.rows:
+                return None
+        return self.rows[self.pos]
+
+    def pop(self) -> dict | None:
+        row = self.peek()
+        if row is not None:
+            self.pos += 1
+        return row
+
+
+def _load_page(conn, key: str, job_ids: list[int]) -> dict:
+    if not job_ids:
+        return {}
+    marks = ", ".join(["?"] * len(job_ids))
+    rows = execute(
+        conn,
+        f"""
+        SELECT jobs.*, pf.why AS _feed_why
+          FROM persona_feeds pf
+          JOIN jobs ON jobs.id = pf.job_id
+         WHERE pf.persona_key = ? AND pf.job_id IN ({marks})
+        """,
+        (key, *job_ids),
+    ).fetchall()
+    return {r["id"]: dict(r) for r in rows}
+
+
+def feed_total(profile: dict, conn=None) -> int:
+    """Active jobs in the persona's feed."""
+    read_conn = conn if conn is not None else get_conn()
+    try:
+        row = execute(
+            read_conn,
+            f"SELECT COUNT(*) AS n FROM persona_feeds pf JOIN jobs ON jobs.id = pf.job_id WHERE pf.persona_key = ? AND {_active_sql()}",
+            (feed_key(profile),),
+        ).fetchone()
+        return int(row["n"])
+    finally:
+        if conn is None:
+            read_conn.close()
+
+
+def read_feed(profile: dict, limit: int, offset: int = 0, conn=None, sync: bool = True) -> list[dict]:
+    """
+    The window [offset, offset + limit) of the persona's ranking, read from its
+    feed. Two index-ordered streams are merged threshold-style: by decay_key
+    (fresh jobs, whose decayed score keeps that order) and by floor (the
+    score without recency, all jobs). Reading stops once the next rows of both
+    streams bound below the K-th (score, id), so the cost is proportional to
+    the page, not the corpus. Scores, _why and the order of tied scores
+    match rank_jobs() over jobs_query_sql() rows.
+    """
+    if sync:
+        sync_feed(profile, conn)
+    key = feed_key(profile)
+    k = offset + limit
+    if k <= 0:
+        return []
+    now_ts = now_epoch()
+    fresh_shift = 0.3 - _DECAY * now_ts
+
+    read_conn = conn if conn is not None else get_conn()
+    try:
+        batch = max(64, k)
+        streams = [_Stream(read_conn, key, "decay_key", batch), _Stream(read_conn, key, "floor", batch)]
+        heap: list[tuple[float, tuple, int]] = []  # (score, tie, job_id); root = current K-th best
+        seen: set[int] = set()
+        parts: dict[int, tuple[float, float]] = {}  # job_id -> (recency, seed)
+        while True:
+            d, f = streams[0].peek(), streams[1].peek()
+            if d is None and f is None:
+                break
+            # Unseen jobs score at most `d_bound` from recency, or exactly their
+            # floor otherwise; floor-stream order also bounds their tie key.
+            d_bound = round(min(1.0, d["k"] + fresh_shift + _BOUND_EPS), 4) if d is not None else -1.0
+            full = len(heap) >= k
+            d_beaten = full and heap[0][0] > d_bound
+            f_beaten = full and (f is None or heap[0][:2] > (f["k"], f["tie"]))
+            if d_beaten and f_beaten:
+                break
+            if d is None or d_beaten:
+                s = streams[1]
+            elif f is None or f_beaten:
+                s = streams[0]
+            else:
+                s = streams[0] if d["k"] + fresh_shift >= f["k"] else streams[1]
+            row = s.pop()
+            jid = row["job_id"]
+            if jid in seen:
+                continue
+            seen.add(jid)
+            rec = recency(to_epoch(row["posted_at"]), now_ts, FEED_DAYS)
+            sc = round(combine_score(bool(row["role_hit"]), row["keyword"], rec, row["seed"]), 4)
+            parts[jid] = (rec, row["seed"])
+            item = (sc, row["tie"], jid)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+        top = sorted(heap, reverse=True)[offset:]
+        rows = _load_page(read_conn, key, [jid for _, _, jid in top])
+    finally:
+        if conn is None:
+            read_conn.close()
+
+    page = []
+    for sc, _, jid in top:
+        j = rows.get(jid)
+        if j is None:
+            continue
+        rec, seed = parts[jid]
+        why = j.pop("_feed_why", None)
+        reasons = why.split("\n") if why else []
+        reasons.append(_recency_reason(rec))
+        if seed >= 0.5:
+            reasons.append(SEED_REASON)
+        page.append(_ranked_row(j, sc, reasons))
+    return page
@@ -0,0 +1,301 @@
+# src/ranking/inverted_index.py
+
+from __future__ import annotations
+import bisect
+import threading
+import time
+
+from src.storage.db import get_conn, execute, is_postgres
+from src.storage.features import _TOKEN_RE, features_generation
+
+from .matcher import compile_persona
+from .dates import now_epoch, to_epoch
+from .scoring import _evaluate, _ranked_row, rank_jobs, top_k_indices
+from .seed_boost import _persona_lists, seed_index
+
+RECENCY_DAYS = 30
+
+# How often (seconds) the index checks job_features for rows written by other
+# processes; writes from this process are picked up on the next lookup.
+_REFRESH_TTL = 2.0
+# Re-read rows this far behind the watermark, so rows from transactions that
+# committed late are not missed. Re-reading an unchanged row is a no-op.
+_OVERLAP = "5 minutes"
+# Candidate share of the index above which rank_jobs_indexed just scans.
+_FULL_SCAN_RATIO = 0.9
+# Full rebuild once this share of indexed ids no longer has a features row.
+_REBUILD_RATIO = 0.2
+
+
+def _insort(plist: list[int], job_id: int) -> None:
+    # Ids mostly arrive in increasing order.
+    if not plist or plist[-1] < job_id:
+        plist.append(job_id)
+    else:
+        i = bisect.bisect_left(plist, job_id)
+        if i == len(plist) or plist[i] != job_id:
+            plist.insert(i, job_id)
+
+
+def _discard(plist: list[int], job_id: int) -> None:
+    i = bisect.bisect_left(plist, job_id)
+    if i < len(plist) and plist[i] == job_id:
+        del plist[i]
+
+
+class InvertedIndex:
+    """
+    Token -> sorted job-id posting lists, used to find the jobs that can score
+    above zero for a persona without scanning the rest.
+
+    The "text" field holds the normalized tokens of "title jd company" (the
+    job_features.tokens column); the "meta" field holds source and location
+    tokens for the seed provider/location checks. Matching is by substring, so
+    a persona term maps to every indexed token containing each of its own
+    tokens; that gives a superset of the jobs the term can hit. Posting dates
+    are kept sorted for the recency tail.
+    """
+
+    def __init__(self):
+        self.postings: dict[str, dict[str, list[int]]] = {"text": {}, "meta": {}}
+        self.docs: dict[int, tuple] = {}  # id -> (content_hash, text tokens, meta tokens, epoch)
+        self.by_date: list[tuple[float, int]] = []
+        self.watermark = None
+        self._expand: dict[tuple[str, str], list[str]] = {}
+        self._generation = -1
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # --- maintenance ---------------------------------------------------------
+
+    def _remove(self, job_id: int) -> None:
+        doc = self.docs.pop(job_id, None)
+        if doc is None:
+            return
+        _, text, meta, epoch = doc
+        for field, toks in (("text", text), ("meta", meta)):
+            postings = self.postings[field]
+            for t in toks:
+                plist = postings.get(t)
+                if plist is not None:
+                    _discard(plist, job_id)
+        if epoch is not None:
+            i = bisect.bisect_left(self.by_date, (epoch, job_id))
+            if i < len(self.by_date) and self.by_date[i] == (epoch, job_id):
+                del self.by_date[i]
+
+    def add(self, job_id: int, content_hash: str | None, tokens: str | None, source: str | None,
+            location: str | None, posted_at) -> None:
+        """Index (or re-index) one job; a no-op when its content_hash is unchanged."""
+        doc = self.docs.get(job_id)
+        if doc is not None and content_hash and doc[0] == content_hash:
+            return
+        self._remove(job_id)
+        text = tuple((tokens or "").split())
+        meta = tuple(set(_TOKEN_RE.findall(f"{source or ''} {location or ''}".lower())))
+        epoch = to_epoch(posted_at)
+        for field, toks in (("text", text), ("meta", meta)):
+            postings = self.postings[field]
+            for t in toks:
+                plist = postings.get(t)
+                if plist is None:
+                    postings[t] = plist = []
+                    # Keep memoized term expansions complete.
+                    for (f, needle), expanded in self._expand.items():
+                        if f == field and needle in t:
+                            expanded.append(t)
+                _insort(plist, job_id)
+        if epoch is not None:
+            bisect.insort(self.by_date, (epoch, job_id))
+        self.docs[job_id] = (content_hash, text, meta, epoch)
+
+    def _load(self, conn, since=None) -> int:
+        sql = """
+            SELECT j.id, j.source, j.location, j.posted_at, f.content_hash, f.tokens, f.updated_at
+              FROM job_features f
+              JOIN jobs j ON j.id = f.job_id AND j.content_hash = f.content_hash
+        """
+        params: tuple = ()
+        if since is not None:
+            if is_postgres():
+                sql += f" WHERE f.updated_at >= ?::timestamptz - interval '{_OVERLAP}'"
+            else:
+                sql += f" WHERE f.updated_at >= datetime(?, '-{_OVERLAP}')"
+            params = (since,)
+        n = 0
+        watermark = self.watermark
+        for r in execute(conn, sql, params).fetchall():
+            self.add(r["id"], r["content_hash"], r["tokens"], r["source"], r["location"], r["posted_at"])
+            if r["updated_at"] is not None and (watermark is None or r["updated_at"] > watermark):
+                watermark = r["updated_at"]
+            n += 1
+        self.watermark = watermark
+        return n
+
+    def rebuild(self, conn=None) -> int:
+        """Index every job with current features from scratch."""
+        own = conn is None
+        conn = conn or get_conn()
+        try:
+            with self._lock:
+                fresh = InvertedIndex()
+                n = fresh._load(conn)
+                self.postings, self.docs, self.by_date = fresh.postings, fresh.docs, fresh.by_date
+                self.watermark, self._expand = fresh.watermark, {}
+                self._checked_at = time.monotonic()
+            return n
+        finally:
+            if own:
+                conn.close()
+
+    def refresh(self, conn=None, force: bool = False) -> int:
+        """
+        Catch up with job_features rows written since the last refresh (e.g.
+        after a harvest). Throttled unless this process wrote features or force.
+        """
+        gen = features_generation()
+        now = time.monotonic()
+        if not force and gen == self._generation and now - self._checked_at < _REFRESH_TTL:
+            return 0
+        own = conn is None
+        conn = conn or get_conn()
+        try:
+            if self.watermark is None:
+                n = self.rebuild(conn)
+            else:
+                with self._lock:
+                    n = self._load(conn, self.watermark)
+                live = execute(conn, "SELECT COUNT(*) AS n FROM job_features").fetchone()["n"]
+                if len(self.docs) - int(live) > _REBUILD_RATIO * max(1, len(self.docs)):
+                    n = self.rebuild(conn)  # drop ids of deleted jobs
+            self._generation = gen
+            self._checked_at = time.monotonic()
+            return n
+        finally:
+            if own:
+                conn.close()
+
+    # --- lookup --------------------------------------------------------------
+
+    def current(self, job: dict) -> bool:
+        """True when the job is indexed at its current content."""
+        doc = self.docs.get(job.get("id"))
+        return doc is not None and doc[0] is not None and doc[0] == job.get("content_hash")
+
+    def _expanded(self, field: str, needle: str) -> list[str]:
+        key = (field, needle)
+        toks = self._expand.get(key)
+        if toks is None:
+            toks = [t for t in self.postings[field] if needle in t]
+            self._expand[key] = toks
+        return toks
+
+    def term_ids(self, term: str, field: str = "text") -> set[int] | None:
+        """
+        Superset of the indexed jobs whose field text contains `term` as a
+        substring; None when the term has no tokens to look up (matches anything).
+        """
+        needles = _TOKEN_RE.findall(term.lower())
+        if not needles:
+            return None
+        postings = self.postings[field]
+        out: set[int] | None = None
+        # Every token of the term lies inside one token of the text.
+        for needle in sorted(set(needles), key=len, reverse=True):
+            ids: set[int] = set()
+            for t in self._expanded(field, needle):
+                ids.update(postings[t])
+            out = ids if out is None else out & ids
+            if not out:
+                break
+        return out
+
+    def recent_ids(self, now: float, days: int = RECENCY_DAYS) -> list[int]:
+        """Jobs posted within `days` of now (they get a non-zero recency term)."""
+        i = bisect.bisect_left(self.by_date, (now - days * 86400.0, -1))
+        return [job_id for _, job_id in self.by_date[i:]]
+
+    def candidates(self, profile: dict, now: float | None = None) -> set[int] | None:
+        """
+        Indexed job ids that can score above zero for this persona: a role or
+        keyword hit, any seed signal, or a recent posting. None when the persona
+        has a term that matches everything (then every job is a candidate).
+        """
+        cp = compile_persona(profile)
+        lookups: list[tuple[str, str]] = [(r, "text") for r in cp.roles]
+        lookups += [(k, "text") for k in cp.keywords]
+        seeds = seed_index()
+        if not seeds.empty:
+            pl = _persona_lists(profile)
+            if pl.empty_skill:
+                return None
+            lookups += [(f"greenhouse:{t}", "meta") for t in seeds.tokens["gh"]]
+            lookups += [(f"lever:{t}", "meta") for t in seeds.tokens["lv"]]
+            lookups += [(h, "text") for h in seeds.tokens["comp"] | seeds.tokens["title"]]
+            lookups += [(l, "meta") for l in pl.locations]
+        out: set[int] = set()
+        with self._lock:
+            for term, field in lookups:
+                ids = self.term_ids(term, field)
+                if ids is None:
+                    return None
+                out |= ids
+            now = now if now is not None else now_epoch()
+            out.update(self.recent_ids(now))
+        return out
+
+
+_INDEX: InvertedIndex | None = None
+_INDEX_LOCK = threading.Lock()
+
+
+def job_index(refresh: bool = True) -> InvertedIndex:
+    """The process-wide index, built on first use and caught up on each call."""
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = InvertedIndex()
+    if refresh:
+        _INDEX.refresh()
+    return _INDEX
+
+
+def rank_jobs_indexed(jobs: list[dict], profile: dict, limit: int | None = None, offset: int = 0,
+                      index: InvertedIndex | None = None) -> list[dict]:
+    """
+    rank_jobs() that scores only candidate jobs from the inverted index, plus
+    any job the index does not hold at its current content. Every other job
+    scores exactly 0.0 and keeps its input position among the zero scores, so
+    the result is the same window rank_jobs() returns.
+    """
+    index = index or job_index()
+    now = now_epoch()
+    cand = index.candidates(profile, now)
+    if cand is None or len(cand) >= _FULL_SCAN_RATIO * len(index.docs):
+        # Broad personas: filtering would cost more than it saves.
+        return rank_jobs(jobs, profile, limit=limit, offset=offset)
+
+    cp = compile_persona(profile)
+    positive: list[int] = []
+    scores: dict[int, float] = {}
+    for i, j in enumerate(jobs):
+        if j.get("id") in cand or not index.current(j):
+            try:
+                sc = round(_evaluate(j, profile, cp, cp.match(j), explain=False, now=now).score, 4)
+            except Exception:
+                sc = 0.0
+            if sc > 0.0:
+                scores[i] = sc
+                positive.append(i)
+
+    k = None if limit is None else offset + limit
+    order = [positive[p] for p in top_k_indices([scores[i] for i in positive], k)]
+    if k is None or len(order) < k:
+        # Zero scores follow in input order, as in a stable sort.
+        need = None if k is None else k - len(order)
+        zeros = (i for i in range(len(jobs)) if i not in scores)
+        order.extend(zeros if need is None else (i for _, i in zip(range(need), zeros)))
+    return [
+        _ranked_row(jobs[i], scores.get(i, 0.0), _evaluate(jobs[i], profile, cp, cp.match(jobs[i]), now=now).reasons)
+        for i in order[offset:]
+    ]
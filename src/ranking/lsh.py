@@ -0,0 +1,272 @@
+# src/ranking/lsh.py
+
+from __future__ import annotations
+import threading
+import time
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from src.storage.db import get_conn, execute
+from src.utils.url_norm import url_hash
+
+from .dates import now_epoch
+from .matcher import compile_persona
+from .scoring import _evaluate, _ranked_row, top_k_indices
+from .seed_boost import _read_seeds, seed_index
+from .tfidf import TfidfIndex, tfidf_index
+
+# MinHash signature of NUM_PERM values, split into BANDS bands of ROWS values.
+# Two jobs share a bucket in some band with probability 1 - (1 - J^ROWS)^BANDS
+# for Jaccard similarity J: about 0.5 at J = 0.5 and above 0.99 at J = 0.75.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# A prime above every hashed column, so (a * x + b) % _PRIME is a permutation.
+_PRIME = np.uint64(4294967311) if np is not None else 4294967311
+
+# Jobs at least this similar to a seeded job are boosted to their similarity.
+SEED_SIMILARITY = 0.5
+SEED_SIMILAR_REASON = "Similar to a job you saved as a seed"
+# Seed neighbours are recomputed at most this often unless seeds or jobs change.
+_SEED_TTL = 5.0
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required for the LSH index. Add numpy to requirements.txt.")
+
+
+class LshIndex:
+    """
+    MinHash LSH over the TF-IDF index's hashed term sets, for near-neighbour
+    lookups ("jobs like this one") without scanning the corpus.
+
+    Signatures are computed from the same rows TfidfIndex keeps, so the LSH
+    catches up with each harvest through the TF-IDF index: sync() re-hashes
+    only jobs whose content_hash changed and drops removed ids. A query reads
+    its BANDS buckets and ranks the candidates by signature agreement, an
+    estimate of Jaccard similarity.
+    """
+
+    def __init__(self, tfidf: TfidfIndex | None = None, seed: int = 1):
+        _require_numpy()
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, NUM_PERM, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+        self.tfidf = tfidf
+        self.sigs: dict[int, tuple[str | None, int]] = {}  # id -> (content_hash, matrix row)
+        # Signatures live in one matrix so candidates are compared in bulk;
+        # buckets hold matrix rows, freed rows are reused.
+        self._mat = np.zeros((0, NUM_PERM), dtype=np.uint64)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._free: list[int] = []
+        self._used = 0
+        self.buckets: list[dict[bytes, set[int]]] = [{} for _ in range(BANDS)]
+        self._revision = -1
+        self._lock = threading.Lock()
+
+    def signature(self, cols: "np.ndarray") -> "np.ndarray":
+        """MinHash signature of a set of hashed columns."""
+        if len(cols) == 0:
+            return np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+        x = cols.astype(np.uint64)[:, None]
+        return ((x * self._a + self._b) % _PRIME).min(axis=0)
+
+    def _bands(self, sig: "np.ndarray") -> list[bytes]:
+        return [sig[b * ROWS : (b + 1) * ROWS].tobytes() for b in range(BANDS)]
+
+    def _row(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._used == len(self._mat):
+            grow = max(1024, len(self._mat))
+            self._mat = np.vstack([self._mat, np.zeros((grow, NUM_PERM), dtype=np.uint64)])
+            self._ids = np.concatenate([self._ids, np.full(grow, -1, dtype=np.int64)])
+        self._used += 1
+        return self._used - 1
+
+    def _remove(self, job_id: int) -> None:
+        entry = self.sigs.pop(job_id, None)
+        if entry is None:
+            return
+        row = entry[1]
+        for band, key in zip(self.buckets, self._bands(self._mat[row])):
+            rows = band.get(key)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del band[key]
+        self._ids[row] = -1
+        self._free.append(row)
+
+    def add(self, job_id: int, content_hash: str | None, cols: "np.ndarray") -> None:
+        """Index (or re-index) one job; a no-op when its content_hash is unchanged."""
+        entry = self.sigs.get(job_id)
+        if entry is not None and content_hash and entry[0] == content_hash:
+            return
+        self._remove(job_id)
+        sig = self.signature(cols)
+        row = self._row()
+        self._mat[row] = sig
+        self._ids[row] = job_id
+        for band, key in zip(self.buckets, self._bands(sig)):
+            band.setdefault(key, set()).add(row)
+        self.sigs[job_id] = (content_hash, row)
+
+    def sync(self) -> int:
+        """Catch up with the TF-IDF index; returns the number of jobs (re)hashed."""
+        tfidf = self.tfidf or tfidf_index()
+        # The TF-IDF index refreshes under its own lock; copy its rows (the
+        # tuples themselves are never mutated) rather than iterate them live.
+        with tfidf._lock:
+            revision = tfidf.revision
+            rows = None if revision == self._revision else dict(tfidf.rows)
+        if rows is None:
+            return 0
+        with self._lock:
+            if revision == self._revision:
+                return 0
+            for job_id in [i for i in self.sigs if i not in rows]:
+                self._remove(job_id)
+            n = 0
+            for job_id, (content_hash, cols, _) in list(rows.items()):
+                entry = self.sigs.get(job_id)
+                if entry is None or not content_hash or entry[0] != content_hash:
+                    self.add(job_id, content_hash, cols)
+                    n += 1
+            self._revision = revision
+            return n
+
+    def signature_of(self, job_id: int) -> "np.ndarray | None":
+        # A copy: the matrix row is reused once the job is re-hashed or removed.
+        with self._lock:
+            entry = self.sigs.get(job_id)
+            return None if entry is None else self._mat[entry[1]].copy()
+
+    def query(self, sig: "np.ndarray", limit: int = 10, exclude: int | None = None,
+              min_similarity: float = 0.0) -> list[tuple[int, float]]:
+        """(job id, estimated Jaccard) for the nearest indexed jobs, best first (ties: lower id)."""
+        cand: set[int] = set()
+        # Buckets, matrix and ids change together under sync(); read them as one.
+        with self._lock:
+            for band, key in zip(self.buckets, self._bands(sig)):
+                rows = band.get(key)
+                if rows:
+                    cand |= rows
+            if exclude is not None and exclude in self.sigs:
+                cand.discard(self.sigs[exclude][1])
+            if not cand:
+                return []
+            rows = np.fromiter(cand, dtype=np.int64, count=len(cand))
+            sims = (self._mat[rows] == sig).mean(axis=1)
+            ids = self._ids[rows]
+        keep = sims >= min_similarity
+        ids, sims = ids[keep], sims[keep]
+        if len(ids) > limit:
+            # Everything tied with the limit-th best stays in for the id tie-break.
+            cut = np.partition(sims, len(sims) - limit)[len(sims) - limit]
+            keep = sims >= cut
+            ids, sims = ids[keep], sims[keep]
+        order = np.lexsort((ids, -sims))[:limit]
+        return [(int(ids[r]), float(sims[r])) for r in order]
+
+    def similar(self, job_id: int, limit: int = 10) -> list[tuple[int, float]] | None:
+        """Nearest neighbours of an indexed job; None when the job is not indexed."""
+        self.sync()
+        sig = self.signature_of(job_id)
+        if sig is None:
+            return None
+        return self.query(sig, limit, exclude=job_id)
+
+
+_INDEX: LshIndex | None = None
+_INDEX_LOCK = threading.Lock()
+
+
+def lsh_index(refresh: bool = True) -> LshIndex:
+    """The process-wide LSH index over tfidf_index(), caught up on each call."""
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = LshIndex()
+    if refresh:
+        tfidf_index()
+        _INDEX.sync()
+    return _INDEX
+
+
+def similar_jobs(job_id: int, limit: int = 10, index: LshIndex | None = None) -> list[tuple[int, float]] | None:
+    """(job id, similarity) of the jobs most like `job_id`; None if it is not indexed."""
+    index = index or lsh_index()
+    return index.similar(job_id, limit)
+
+
+# --- seed boosting ------------------------------------------------------------
+
+_SEED_CACHE: dict = {"key": None, "at": 0.0, "sims": {}}
+
+
+def _seed_job_ids(seeds: list[dict]) -> list[int]:
+    hashes = [h for h in (url_hash(s.get("url") or "") for s in seeds) if h]
+    if not hashes:
+        return []
+    con = get_conn()
+    try:
+        marks = ",".join("?" for _ in hashes)
+        rows = execute(con, f"SELECT id FROM jobs WHERE url_hash IN ({marks})", tuple(hashes)).fetchall()
+    finally:
+        con.close()
+    return [r["id"] for r in rows]
+
+
+def seed_similarities(index: LshIndex | None = None, limit: int = 200) -> dict[int, float]:
+    """
+    job id -> similarity to the nearest seeded job, for jobs at least
+    SEED_SIMILARITY alike. Seeds whose URL is not a job we hold have only
+    their title/company hints, which seed_seedscore() already matches.
+    """
+    index = index or lsh_index()
+    key = (seed_index().revision, index._revision)
+    now = time.monotonic()
+    if _SEED_CACHE["key"] == key and now - _SEED_CACHE["at"] < _SEED_TTL:
+        return _SEED_CACHE["sims"]
+    sims: dict[int, float] = {}
+    for seed_id in _seed_job_ids(_read_seeds()):
+        sig = index.signature_of(seed_id)
+        if sig is None:
+            continue
+        for job_id, sim in index.query(sig, limit, exclude=seed_id, min_similarity=SEED_SIMILARITY):
+            if sim > sims.get(job_id, 0.0):
+                sims[job_id] = sim
+    _SEED_CACHE.update(key=key, at=now, sims=sims)
+    return sims
+
+
+def rank_jobs_seed_similar(jobs: list[dict], profile: dict, limit: int | None = None, offset: int = 0,
+                           index: LshIndex | None = None) -> list[dict]:
+    """
+    rank_jobs() with seed "more like this" boosting: a job near a seeded job
+    scores at least its similarity to it, as seed_seedscore() floors
+    seed-aligned jobs.
+    """
+    sims = seed_similarities(index)
+    cp = compile_persona(profile)
+    now = now_epoch()
+    scores: list[float] = []
+    for j in jobs:
+        try:
+            sc = _evaluate(j, profile, cp, cp.match(j), explain=False, now=now).score
+        except Exception:
+            sc = 0.0
+        scores.append(round(max(sc, sims.get(j.get("id"), 0.0)), 4))
+    k = None if limit is None else offset + limit
+    out = []
+    for i in top_k_indices(scores, k)[offset:]:
+        why = _evaluate(jobs[i], profile, cp, cp.match(jobs[i]), now=now).reasons
+        if jobs[i].get("id") in sims:
+            why = why + [SEED_SIMILAR_REASON]
+        out.append(_ranked_row(jobs[i], scores[i], why))
+    return out
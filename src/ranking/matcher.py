@@ -0,0 +1,182 @@
+# src/ranking/matcher.py
+
+from __future__ import annotations
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+# Persona fields that affect matching. Anything else (contact, salary, ...) can
+# change without invalidating the compiled matcher.
+PERSONA_MATCH_FIELDS = ("roles_target", "must_have", "nice_to_have", "locations")
+
+_CACHE_SIZE = 64
+
+
+def persona_hash(profile: dict) -> str:
+    """Stable hash of the persona fields that affect scoring."""
+    payload = {k: profile.get(k) or [] for k in PERSONA_MATCH_FIELDS}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class JobMatch(NamedTuple):
+    title: str              # lowercased title
+    text: str               # lowercased "title jd company" ("" when matched from stored features)
+    role_hit: bool          # any target role in title (score semantics)
+    matched_roles: tuple    # non-empty roles found in title (explain semantics)
+    hits: frozenset         # lowercased keywords found in text
+    hit_count: int          # keyword hits counted per persona entry (duplicates included)
+
+
+class CompiledPersona:
+    """
+    Persona lists lowercased, de-duplicated and compiled once, so a job needs one
+    lowercase of its text and one scan per distinct keyword. Substring semantics
+    are the same as the original per-keyword `k.lower() in text` checks.
+    Rows carrying current ingest-time features (_f_* columns) are matched from
+    their bitsets without touching the text.
+    """
+
+    __slots__ = (
+        "_plan",
+        "hash",
+        "roles",
+        "keywords",
+        "keyword_count",
+        "keyword_weights",
+        "keyword_labels",
+        "locations",
+    )
+
+    def __init__(self, profile: dict):
+        self.hash = persona_hash(profile)
+        # Empty roles are kept: score_job's `any(r in title ...)` treats "" as a hit.
+        self.roles = tuple(dict.fromkeys(str(r).lower() for r in (profile.get("roles_target") or [])))
+        kw = list(profile.get("must_have") or []) + list(profile.get("nice_to_have") or [])
+        # keyword_score divides by the raw list length and counts duplicates.
+        self.keyword_count = len(kw)
+        weights: dict[str, int] = {}
+        labels: dict[str, tuple] = {}
+        for k in kw:
+            if not k:
+                continue
+            kl = k.lower()
+            weights[kl] = weights.get(kl, 0) + 1
+            labels[kl] = labels.get(kl, ()) + ((k,) if k not in labels.get(kl, ()) else ())
+        # Longest first: a long keyword rarely hits, a hit on a short one is cheap.
+        self.keywords = tuple(sorted(weights, key=len, reverse=True))
+        self.keyword_weights = weights
+        self.keyword_labels = labels
+        self.locations = tuple(str(l).lower() for l in (profile.get("locations") or []))
+        self._plan = None
+
+    def feature_plan(self) -> "_FeaturePlan | None":
+        """Bit positions of this persona's terms in the feature vocabulary, or None if any are missing."""
+        from src.storage.features import cached_vocabulary
+
+        vocab = cached_vocabulary()
+        if self._plan is None or self._plan[0] is not vocab:
+            self._plan = (vocab, _FeaturePlan.build(self, vocab))
+        return self._plan[1]
+
+    def match(self, job: dict) -> JobMatch:
+        if job.get("_f_text_bits") is not None:
+            plan = self.feature_plan()
+            if plan is not None and plan.size <= int(job.get("_f_vocab") or 0):
+                return plan.match(job)
+        title = (job.get("title") or "").lower()
+        text = " ".join((title, (job.get("jd_text") or ""), (job.get("company") or ""))).lower()
+        hits = frozenset(k for k in self.keywords if k in text)
+        weights = self.keyword_weights
+        return JobMatch(
+            title=title,
+            text=text,
+            role_hit=any(r in title for r in self.roles),
+            matched_roles=tuple(r for r in self.roles if r and r in title),
+            hits=hits,
+            hit_count=sum(weights[k] for k in hits),
+        )
+
+    def keyword_fraction(self, m: JobMatch) -> float:
+        if not self.keyword_count:
+            return 0.0
+        return min(1.0, m.hit_count / max(1, self.keyword_count))
+
+    def hit_labels(self, m: JobMatch) -> list[str]:
+        """Persona spellings of the matched keywords, as explain_job_score lists them."""
+        return [label for k in m.hits for label in self.keyword_labels[k]]
+
+
+class _FeaturePlan:
+    """Scores a job from its stored title/text bitsets instead of scanning its text."""
+
+    __slots__ = ("size", "roles", "empty_role", "keyword_bits", "keyword_mask", "unit_weights", "weights")
+
+    @classmethod
+    def build(cls, cp: CompiledPersona, vocab: dict[str, int]) -> "_FeaturePlan | None":
+        roles = [r for r in cp.roles if r]
+        if any(r not in vocab for r in roles) or any(k not in vocab for k in cp.keywords):
+            return None
+        plan = cls()
+        plan.roles = tuple((r, vocab[r]) for r in roles)
+        plan.empty_role = len(roles) != len(cp.roles)
+        plan.keyword_bits = tuple((k, vocab[k]) for k in cp.keywords)
+        plan.keyword_mask = 0
+        for _, bit in plan.keyword_bits:
+            plan.keyword_mask |= 1 << bit
+        plan.weights = cp.keyword_weights
+        plan.unit_weights = all(w == 1 for w in cp.keyword_weights.values())
+        plan.size = 1 + max([b for _, b in plan.roles] + [b for _, b in plan.keyword_bits], default=-1)
+        return plan
+
+    def match(self, job: dict) -> JobMatch:
+        title_bits = int(job.get("_f_title_bits") or "0", 16)
+        text_bits = int(job.get("_f_text_bits") or "0", 16)
+        matched_roles = tuple(r for r, bit in self.roles if title_bits >> bit & 1)
+        hit_bits = text_bits & self.keyword_mask
+        if hit_bits:
+            hits = frozenset(k for k, bit in self.keyword_bits if hit_bits >> bit & 1)
+            hit_count = hit_bits.bit_count() if self.unit_weights else sum(self.weights[k] for k in hits)
+        else:
+            hits, hit_count = frozenset(), 0
+        return JobMatch(
+            title=(job.get("title") or "").lower(),
+            text="",
+            role_hit=self.empty_role or bool(matched_roles),
+            matched_roles=matched_roles,
+            hits=hits,
+            hit_count=hit_count,
+        )
+
+
+_COMPILED: "OrderedDict[tuple, CompiledPersona]" = OrderedDict()
+_COMPILED_LOCK = threading.Lock()
+
+
+def _cache_key(profile: dict) -> tuple:
+    # Cheaper than persona_hash() and good enough to find an existing entry;
+    # score_job calls this once per job.
+    return tuple(
+        tuple(str(x) for x in (profile.get(k) or [])) for k in PERSONA_MATCH_FIELDS
+    )
+
+
+def compile_persona(profile: dict) -> CompiledPersona:
+    """Return the compiled matcher for this persona, building it on first use."""
+    key = _cache_key(profile)
+    with _COMPILED_LOCK:
+        cp = _COMPILED.get(key)
+        if cp is not None:
+            _COMPILED.move_to_end(key)
+            return cp
+    # Built outside the lock; a concurrent build of the same persona is
+    # identical, and the first one stored wins.
+    cp = CompiledPersona(profile)
+    with _COMPILED_LOCK:
+        cp = _COMPILED.setdefault(key, cp)
+        _COMPILED.move_to_end(key)
+        if len(_COMPILED) > _CACHE_SIZE:
+            _COMPILED.popitem(last=False)
+    return cp
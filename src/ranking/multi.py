@@ -0,0 +1,201 @@
+# src/ranking/multi.py
+
+from __future__ import annotations
+import heapq
+from datetime import datetime
+
+from .dates import as_epoch, recency, to_epoch
+from .matcher import CompiledPersona, compile_persona
+from .scoring import _evaluate, _ranked_row, combine_score, top_k_indices
+from .seed_boost import _persona_lists, seed_job_signals, seed_score_from
+
+
+class _UnionPlan:
+    """
+    Every persona's roles, keywords and locations merged into one term table,
+    each term listing the personas (and keyword weights) it belongs to. A job
+    is matched once against the union, and each hit is credited to its
+    personas, so shared terms are scanned once per job rather than once per
+    persona.
+    """
+
+    def __init__(self, cps: list[CompiledPersona], profiles: list[dict]):
+        self.size = len(cps)
+        self.roles: dict[str, list[int]] = {}
+        self.keywords: dict[str, list[tuple[int, int]]] = {}
+        self.locations: dict[str, list[int]] = {}
+        self.empty_role = [False] * self.size
+        self.keyword_count = [cp.keyword_count for cp in cps]
+        self.any_skill = []
+        self.empty_skill = []
+        self.empty_location = [False] * self.size
+        for p, (cp, profile) in enumerate(zip(cps, profiles)):
+            for r in cp.roles:
+                if r:
+                    self.roles.setdefault(r, []).append(p)
+                else:
+                    self.empty_role[p] = True
+            for k in cp.keywords:
+                self.keywords.setdefault(k, []).append((p, cp.keyword_weights[k]))
+            pl = _persona_lists(profile)
+            self.any_skill.append(pl.any_skill)
+            self.empty_skill.append(pl.empty_skill)
+            for l in pl.locations:
+                if l:
+                    self.locations.setdefault(l, []).append(p)
+                else:
+                    self.empty_location[p] = True
+        # Longest first, as in CompiledPersona.
+        self.role_terms = tuple(sorted(self.roles, key=len, reverse=True))
+        self.keyword_terms = tuple(sorted(self.keywords, key=len, reverse=True))
+        self._bits = None
+
+    def bit_plan(self):
+        """(size, role mask, keyword mask, bit -> term) over the feature vocabulary, or None."""
+        if self._bits is None:
+            from src.storage.features import cached_vocabulary
+
+            vocab = cached_vocabulary()
+            terms = set(self.roles) | set(self.keywords)
+            if any(t not in vocab for t in terms):
+                self._bits = (None,)
+            else:
+                role_mask = 0
+                for t in self.roles:
+                    role_mask |= 1 << vocab[t]
+                kw_mask = 0
+                for t in self.keywords:
+                    kw_mask |= 1 << vocab[t]
+                names = {vocab[t]: t for t in terms}
+                size = 1 + max(names, default=-1)
+                self._bits = ((size, role_mask, kw_mask, names),)
+        return self._bits[0]
+
+
+def _set_bits(x: int, names: dict[int, str]) -> list[str]:
+    out = []
+    while x:
+        low = x & -x
+        out.append(names[low.bit_length() - 1])
+        x ^= low
+    return out
+
+
+def rank_personas(
+    jobs: list[dict],
+    profiles: dict[str, dict],
+    limit: int | None = None,
+    offset: int = 0,
+    now: datetime | float | None = None,
+) -> dict[str, list[dict]]:
+    """
+    rank_jobs() for several personas in one pass over the jobs.
+
+    Each job is lowercased (or read from its stored feature bits), dated and
+    seed-checked once; role/keyword hits against the union of all persona
+    terms are credited per persona; recency uses one clock reading for the
+    whole batch. Returns {name: window} with the same rows, order and _why
+    rank_jobs(jobs, profile, limit, offset) gives each persona.
+    """
+    names = list(profiles)
+    plist = [profiles[n] or {} for n in names]
+    cps = [compile_persona(p) for p in plist]
+    plan = _UnionPlan(cps, plist)
+    P = plan.size
+    now = as_epoch(now)
+    k = None if limit is None else offset + limit
+    bits = plan.bit_plan() if any(j.get("_f_text_bits") is not None for j in jobs) else None
+
+    heaps: list[list[tuple[float, int]]] = [[] for _ in range(P)]
+    all_scores: list[list[float]] = [[] for _ in range(P)] if k is None else []
+
+    for i, j in enumerate(jobs):
+        try:
+            title = (j.get("title") or "").lower()
+            if bits is not None and j.get("_f_text_bits") is not None and bits[0] <= int(j.get("_f_vocab") or 0):
+                title_bits = int(j.get("_f_title_bits") or "0", 16)
+                text_bits = int(j.get("_f_text_bits") or "0", 16)
+                role_hits = _set_bits(title_bits & bits[1], bits[3])
+                kw_hits = _set_bits(text_bits & bits[2], bits[3])
+            else:
+                text = " ".join((title, (j.get("jd_text") or ""), (j.get("company") or ""))).lower()
+                role_hits = [r for r in plan.role_terms if r in title]
+                kw_hits = [t for t in plan.keyword_terms if t in text]
+
+            role_hit = list(plan.empty_role)
+            for r in role_hits:
+                for p in plan.roles.get(r, ()):
+                    role_hit[p] = True
+            hit_count = [0] * P
+            skills_hit = [False] * P
+            signals = seed_job_signals(j)
+            jd = None
+            for t in kw_hits:
+                in_jd_or_title = False
+                if signals is not None:
+                    # seed skills are checked against title and JD (not company).
+                    if t in title:
+                        in_jd_or_title = True
+                    else:
+                        if jd is None:
+                            jd = (j.get("jd_text") or "").lower()
+                        in_jd_or_title = t in jd
+                for p, w in plan.keywords[t]:
+                    hit_count[p] += w
+                    if in_jd_or_title:
+                        skills_hit[p] = True
+
+            rec = recency(to_epoch(j.get("posted_at")), now)
+
+            if signals is not None:
+                loc = (j.get("location") or "").lower()
+                loc_hit = [bool(loc) and e for e in plan.empty_location]
+                if loc:
+                    for l, ps in plan.locations.items():
+                        if l in loc:
+                            for p in ps:
+                                loc_hit[p] = True
+        except Exception:
+            role_hit, hit_count, signals, rec = None, None, None, 0.0
+
+        # Personas mostly share (role, keyword, seed) inputs for a job, so the
+        # rounded score is computed once per distinct combination.
+        memo: dict[tuple, float] = {}
+        for p in range(P):
+            if role_hit is None:
+                sc = 0.0
+            else:
+                count = plan.keyword_count[p]
+                kw = min(1.0, hit_count[p] / max(1, count)) if count else 0.0
+                if signals is None:
+                    seed = 0.0
+                else:
+                    skills = plan.any_skill[p] and (plan.empty_skill[p] or skills_hit[p])
+                    seed = seed_score_from(signals, skills, loc_hit[p])
+                key = (role_hit[p], kw, seed)
+                sc = memo.get(key)
+                if sc is None:
+                    sc = memo[key] = round(combine_score(role_hit[p], kw, rec, seed), 4)
+            if k is None:
+                all_scores[p].append(sc)
+                continue
+            heap = heaps[p]
+            item = (sc, -i)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    out: dict[str, list[dict]] = {}
+    for p, name in enumerate(names):
+        if k is None:
+            scores = all_scores[p]
+            window = [(scores[i], i) for i in top_k_indices(scores, None)][offset:]
+        else:
+            window = [(sc, -ni) for sc, ni in sorted(heaps[p], reverse=True)][offset:]
+        profile, cp = plist[p], cps[p]
+        out[name] = [
+            _ranked_row(jobs[i], sc, _evaluate(jobs[i], profile, cp, cp.match(jobs[i]), now=now).reasons)
+            for sc, i in window
+        ]
+    return out
@@ -0,0 +1,229 @@
+# src/ranking/parallel.py
+
+from __future__ import annotations
+import gc
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from .matcher import compile_persona
+from .dates import now_epoch
+from .scoring import _evaluate, _ranked_row, rank_jobs, top_k_indices
+from . import matcher, seed_boost
+
+logger = logging.getLogger(__name__)
+
+# Chunks per worker: enough to even out uneven rows without much IPC.
+_CHUNKS_PER_WORKER = 4
+
+# Set in each worker by _init_worker; the parent's list, shared copy-on-write.
+_JOBS: list[dict] = []
+
+
+def rank_workers() -> int:
+    """Worker processes for parallel ranking (JOB_BUTLER_RANK_WORKERS; 0/1 = serial)."""
+    try:
+        return max(0, int(os.getenv("JOB_BUTLER_RANK_WORKERS", "0")))
+    except ValueError:
+        return 0
+
+
+def parallel_min_jobs() -> int:
+    """Corpus size below which the process pool is not worth starting."""
+    try:
+        return int(os.getenv("JOB_BUTLER_RANK_PARALLEL_MIN", "20000"))
+    except ValueError:
+        return 20000
+
+
+def rank_timeout() -> float:
+    """Seconds to wait for the workers' scores before ranking serially instead."""
+    try:
+        return float(os.getenv("JOB_BUTLER_RANK_TIMEOUT_S", "60"))
+    except ValueError:
+        return 60.0
+
+
+def fork_available() -> bool:
+    return "fork" in mp.get_all_start_methods()
+
+
+def _init_worker(jobs: list[dict]) -> None:
+    # Under fork the initializer args are inherited, not pickled, so the corpus
+    # is never copied up front. Every module lock a worker can take is
+    # replaced, in case another parent thread held it at fork time, and the
+    # seed index is pinned to the parent's snapshot so workers never query
+    # the database.
+    from src.storage import features
+
+    global _JOBS
+    _JOBS = jobs
+    seed_boost._INDEX_LOCK = threading.Lock()
+    matcher._COMPILED_LOCK = threading.Lock()
+    features._VOCAB_LOCK = threading.Lock()
+    seed_boost.freeze_seed_index()
+
+
+def _ping(_=None) -> int:
+    return os.getpid()
+
+
+def _score_chunk(profile: dict, lo: int, hi: int, k: int | None, now: float):
+    cp = compile_persona(profile)
+    scores: list[float] = []
+    for j in _JOBS[lo:hi]:
+        try:
+            sc = _evaluate(j, profile, cp, cp.match(j), explain=False, now=now).score
+        except Exception:
+            sc = 0.0
+        scores.append(round(sc, 4))
+    if k is None:
+        return lo, scores
+    return lo, [(scores[i], lo + i) for i in top_k_indices(scores, k)]
+
+
+class ParallelRanker:
+    """
+    A process pool over one corpus, for ranking it against one or more personas.
+
+    Workers are forked once with the job list and read it copy-on-write; each
+    rank() call sends only the persona and index ranges, and gets back per-chunk
+    top-K (score, index) pairs that are merged in the parent. Results are the
+    same rows, order and _why as rank_jobs(). Where fork is unavailable, or with
+    fewer than two workers, rank() runs serially.
+    """
+
+    def __init__(self, jobs: list[dict], workers: int | None = None):
+        self.jobs = jobs
+        self.workers = rank_workers() if workers is None else workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._failed = False
+
+    def __enter__(self) -> "ParallelRanker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def parallel(self) -> bool:
+        return not self._failed and self.workers > 1 and len(self.jobs) > 1 and fork_available()
+
+    def _start(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Warm what workers read, so they inherit it rather than load it.
+            seed_boost.seed_index()
+            try:
+                from src.storage.features import cached_vocabulary
+
+                cached_vocabulary()
+            except Exception:
+                pass
+            # Frozen objects are skipped by the collector, so workers do not
+            # touch (and copy) the pages holding the corpus during GC.
+            gc.freeze()
+            try:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=mp.get_context("fork"),
+                    initializer=_init_worker,
+                    initargs=(self.jobs,),
+                )
+                # Fork all workers now, while the objects are frozen.
+                list(self._pool.map(_ping, range(self.workers), timeout=rank_timeout()))
+            finally:
+                gc.unfreeze()
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _abandon(self) -> None:
+        # Stuck workers would block shutdown(wait=True); stop them instead.
+        pool, self._pool = self._pool, None
+        self._failed = True
+        if pool is None:
+            return
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            proc.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _serial_scores(self, profile: dict, k: int | None, now: float) -> list[tuple[float, int]]:
+        cp = compile_persona(profile)
+        scores = []
+        for j in self.jobs:
+            try:
+                sc = _evaluate(j, profile, cp, cp.match(j), explain=False, now=now).score
+            except Exception:
+                sc = 0.0
+            scores.append(round(sc, 4))
+        return [(scores[i], i) for i in top_k_indices(scores, k)]
+
+    def scores(self, profile: dict, k: int | None = None, now: float | None = None) -> list[tuple[float, int]]:
+        """
+        (score, index) pairs for the k best jobs (all when k is None), best
+        first, stable. If the workers fail or take longer than rank_timeout(),
+        the pool is abandoned and this and later calls rank serially.
+        """
+        now = now_epoch() if now is None else now
+        if not self.parallel:
+            return self._serial_scores(profile, k, now)
+        try:
+            return self._parallel_scores(profile, k, now)
+        except (FutureTimeoutError, BrokenProcessPool) as exc:
+            logger.warning("parallel ranking failed (%s); ranking serially", type(exc).__name__)
+            self._abandon()
+            return self._serial_scores(profile, k, now)
+
+    def _parallel_scores(self, profile: dict, k: int | None, now: float) -> list[tuple[float, int]]:
+        n = len(self.jobs)
+        pool = self._start()
+        chunks = self.workers * _CHUNKS_PER_WORKER
+        step = max(1, -(-n // chunks))
+        futures = [pool.submit(_score_chunk, profile, lo, min(n, lo + step), k, now) for lo in range(0, n, step)]
+        deadline = time.monotonic() + rank_timeout()
+
+        def result(f):
+            return f.result(timeout=max(0.0, deadline - time.monotonic()))[1]
+
+        if k is None:
+            scores: list[float] = []
+            for f in futures:  # submitted in index order
+                scores.extend(result(f))
+            return [(scores[i], i) for i in top_k_indices(scores, None)]
+        pairs = [p for f in futures for p in result(f)]
+        # Each chunk's top-K holds every job of the global top-K it contains, so
+        # the merged prefix equals a stable sort over all jobs.
+        pairs.sort(key=lambda p: (-p[0], p[1]))
+        return pairs[:k]
+
+    def rank(self, profile: dict, limit: int | None = None, offset: int = 0) -> list[dict]:
+        """Same contract as rank_jobs(jobs, profile, limit, offset)."""
+        k = None if limit is None else offset + limit
+        now = now_epoch()
+        page = self.scores(profile, k, now)[offset:]
+        cp = compile_persona(profile)
+        return [
+            _ranked_row(self.jobs[i], sc, _evaluate(self.jobs[i], profile, cp, cp.match(self.jobs[i]), now=now).reasons)
+            for sc, i in page
+        ]
+
+
+def rank_jobs_parallel(jobs: list[dict], profile: dict, limit: int | None = None, offset: int = 0, workers: int | None = None) -> list[dict]:
+    """
+    rank_jobs() spread over a process pool. Falls back to rank_jobs() for
+    corpora below JOB_BUTLER_RANK_PARALLEL_MIN or when only one worker is
+    available.
+    """
+    if len(jobs) < parallel_min_jobs():
+        return rank_jobs(jobs, profile, limit=limit, offset=offset)
+    with ParallelRanker(jobs, workers) as ranker:
+        if not ranker.parallel:
+            return rank_jobs(jobs, profile, limit=limit, offset=offset)
+        return ranker.rank(profile, limit=limit, offset=offset)
@@ -0,0 +1,198 @@
+# src/ranking/pushdown.py
+
+from __future__ import annotations
+import os
+
+from src.storage.db import JOB_ORDER_FIELDS, get_conn, execute, is_postgres, jobs_order_columns, jobs_order_key
+
+from .dates import _MS_THRESHOLD, now_epoch
+from .matcher import compile_persona
+from .scoring import rank_jobs
+from .seed_boost import _persona_lists, seed_index
+
+RECENCY_DAYS = 30
+
+# posted_at shapes the SQL score parses, as dates.to_epoch reads them. Other
+# values count as "posted now" in the bound, so they are never pruned wrongly.
+# No "?" in these: execute() rewrites every "?" into a placeholder.
+_EPOCH_RE = r"^-{0,1}[0-9]{9,}(\.[0-9]+){0,1}$"
+_ISO_RE = (r"^[0-9]{4}-[0-9]{2}-[0-9]{2}"
+           r"([T ][0-9]{2}:[0-9]{2}(:[0-9]{2}(\.[0-9]+){0,1}){0,1}(Z|z|[+-][0-9]{2}(:{0,1}[0-9]{2}){0,1}){0,1}){0,1}$")
+_TZ_RE = r"[T ][0-9:.]+(Z|z|[+-][0-9]{2}(:{0,1}[0-9]{2}){0,1})$"
+
+# Epoch seconds of posted_at: NULL when missing (recency 0), -1 when SQL
+# cannot parse it (recency bounded by 1). Naive ISO values are UTC.
+_POSTED_EPOCH = f"""CASE
+          WHEN jobs.posted_at IS NULL OR btrim(jobs.posted_at) = '' THEN NULL
+          WHEN jobs.posted_at ~ '{_EPOCH_RE}' THEN
+            CASE WHEN abs(jobs.posted_at::float8) >= {_MS_THRESHOLD:.0f} THEN jobs.posted_at::float8 / 1000.0
+                 ELSE jobs.posted_at::float8 END
+          WHEN jobs.posted_at ~ '{_ISO_RE}' THEN
+            CASE WHEN jobs.posted_at ~ '{_TZ_RE}' THEN extract(epoch FROM jobs.posted_at::timestamptz)::float8
+                 ELSE extract(epoch FROM jobs.posted_at::timestamp AT TIME ZONE 'UTC')::float8 END
+          ELSE -1
+        END"""
+
+
+def pushdown_pool() -> int:
+    """Candidates pre-selected in SQL per ranking (JOB_BUTLER_PUSHDOWN_POOL)."""
+    try:
+        return max(1, int(os.getenv("JOB_BUTLER_PUSHDOWN_POOL", "300")))
+    except ValueError:
+        return 300
+
+
+def _require_postgres() -> None:
+    if not is_postgres():
+        raise RuntimeError("SQL ranking pushdown needs Postgres (DATABASE_URL).")
+
+
+def _any_position(terms, column: str) -> tuple[str, list]:
+    # position() keeps score_job's substring semantics ("" is in everything).
+    terms = list(terms)
+    if not terms:
+        return "FALSE", []
+    return "(" + " OR ".join(f"position(? in {column}) > 0" for _ in terms) + ")", terms
+
+
+def persona_score_sql(profile: dict, now: float | None = None) -> tuple[str, list]:
+    """
+    SQL expression (and its parameters) for an upper bound on score_job()
+    over the x.* columns rank_jobs_pushdown() selects:
+
+      max(0.4*role + 0.3*keyword fraction + 0.3*recency, seed bound)
+
+    Role and keyword terms are exact (substring matches on the lowercased
+    title and "title jd company"); recency is exact for the posted_at shapes
+    SQL parses; the seed term is seed_upper_bound(), which assumes the JD
+    skills check hits.
+    """
+    cp = compile_persona(profile)
+    now = now_epoch() if now is None else now
+    params: list = []
+
+    role_sql, role_params = _any_position(cp.roles, "x.title_l")
+    params += role_params
+    if cp.keyword_count and cp.keywords:
+        parts = []
+        for k in cp.keywords:
+            parts.append(f"CASE WHEN position(? in x.text_l) > 0 THEN {cp.keyword_weights[k]} ELSE 0 END")
+            params.append(k)
+        kw_sql = f"LEAST(1.0::float8, ({' + '.join(parts)})::float8 / {cp.keyword_count})"
+    else:
+        kw_sql = "0.0::float8"
+    rec_sql = (f"CASE WHEN x.posted_epoch IS NULL THEN 0.0::float8 WHEN x.posted_epoch = -1 THEN 1.0::float8 "
+               f"ELSE GREATEST(0.0::float8, 1.0 - GREATEST(0.0::float8, (?::float8 - x.posted_epoch) / 86400.0) / {RECENCY_DAYS}.0) END")
+    params.append(now)
+    base = f"(CASE WHEN {role_sql} THEN 0.4::float8 ELSE 0.0::float8 END + 0.3 * {kw_sql} + 0.3 * {rec_sql})"
+
+    idx = seed_index()
+    if idx.empty:
+        return f"LEAST(1.0::float8, GREATEST(0.0::float8, {base}))", params
+    pl = _persona_lists(profile)
+    providers = [f"greenhouse:{t}" for t in sorted(idx.tokens["gh"])] + [f"lever:{t}" for t in sorted(idx.tokens["lv"])]
+    provider_sql, p_params = _any_position(providers, "x.source_l")
+    company_sql, c_params = _any_position(sorted(idx.tokens["comp"]), "x.company_l")
+    title_sql, t_params = _any_position(sorted(idx.tokens["title"]), "x.title_l")
+    loc_sql, l_params = _any_position(pl.locations, "x.location_l")
+    skills = "TRUE" if pl.any_skill else "FALSE"
+    seed_sql = (
+        f"CASE WHEN {provider_sql} AND ({title_sql} OR {skills}) THEN 1.0::float8 "
+        f"ELSE ((CASE WHEN {provider_sql} THEN 1 ELSE 0 END) + (CASE WHEN {company_sql} THEN 1 ELSE 0 END)"
+        f" + (CASE WHEN {title_sql} THEN 1 ELSE 0 END) + {1 if pl.any_skill else 0}"
+        f" + (CASE WHEN x.location_l <> '' AND {loc_sql} THEN 1 ELSE 0 END)) / 5.0 END"
+    )
+    params += p_params + t_params + p_params + c_params + t_params + l_params
+    return f"LEAST(1.0::float8, GREATEST(0.0::float8, {base}, {seed_sql}))", params
+
+
+def _filters(source: str | None, contains: str | None, include_inactive: bool) -> tuple[str, list]:
+    where, params = [], []
+    if not include_inactive:
+        where.append("jobs.is_active")
+    if source:
+        where.append("position(? in coalesce(jobs.source, '')) = 1")
+        params.append(source)
+    if contains:
+        where.append("position(? in lower(coalesce(jobs.title, '') || coalesce(jobs.company, '') || coalesce(jobs.location, ''))) > 0")
+        params.append(contains.lower())
+    return ("WHERE " + " AND ".join(where)) if where else "", params
+
+
+_CANDIDATES_SQL = """
+    SELECT jobs.*,
+           f.vocab_size AS _f_vocab, f.title_bits AS _f_title_bits, f.text_bits AS _f_text_bits,
+           {score} AS _bound,
+           {order_columns}
+      FROM jobs
+      CROSS JOIN LATERAL (
+        SELECT lower(coalesce(jobs.title, '')) AS title_l,
+               lower(coalesce(jobs.title, '') || ' ' || coalesce(jobs.jd_text, '') || ' ' || coalesce(jobs.company, '')) AS text_l,
+               lower(coalesce(jobs.source, '')) AS source_l,
+               lower(coalesce(jobs.company, '')) AS company_l,
+               lower(coalesce(jobs.location, '')) AS location_l,
+               {posted_epoch} AS posted_epoch
+      ) x
+      LEFT JOIN job_features f ON f.job_id = jobs.id AND f.content_hash = jobs.content_hash
+     {where}
+     ORDER BY _bound DESC, jobs.id DESC
+     LIMIT ? OFFSET ?
+"""
+
+_SQL_ONLY = ("_bound",) + JOB_ORDER_FIELDS
+
+
+def rank_jobs_pushdown(
+    profile: dict,
+    limit: int,
+    offset: int = 0,
+    source: str | None = None,
+    contains: str | None = None,
+    include_inactive: bool = False,
+    pool: int | None = None,
+    conn=None,
+) -> tuple[list[dict], int]:
+    """
+    Rank in Postgres first: each job gets persona_score_sql(), an upper
+    bound on its score, and only the best `pool` rows (JOB_BUTLER_PUSHDOWN_POOL)
+    are fetched and re-ranked with rank_jobs() (seed boost, explanations).
+    When the last fetched bound could still reach the page, the next rows
+    are fetched too, so the page is exactly what rank_jobs() over the whole
+    filtered table returns. Returns (page, total rows matching the filters).
+    """
+    _require_postgres()
+    k = offset + limit
+    pool = max(pool or pushdown_pool(), k)
+    now = now_epoch()
+    score_sql, score_params = persona_score_sql(profile, now)
+    where, where_params = _filters(source, contains, include_inactive)
+    sql = _CANDIDATES_SQL.format(score=score_sql, order_columns=jobs_order_columns(), posted_epoch=_POSTED_EPOCH, where=where)
+
+    own = conn is None
+    if own:
+        conn = get_conn()
+    try:
+        total = execute(conn, f"SELECT COUNT(*) AS n FROM jobs {where}", tuple(where_params)).fetchone()["n"]
+        candidates: list[dict] = []
+        fetch = pool
+        while True:
+            rows = [dict(r) for r in execute(conn, sql, tuple(score_params + where_params + [fetch, len(candidates)])).fetchall()]
+            candidates.extend(rows)
+            if len(rows) < fetch or len(candidates) >= total:
+                break
+            top = rank_jobs(candidates, profile, limit=k)
+            # Rows not fetched score at most the last bound; once that rounds
+            # below the k-th score none of them can enter the page.
+            if len(top) >= k and round(float(candidates[-1]["_bound"]) + 1e-9, 4) < top[-1]["_score"]:
+                break
+            fetch = len(candidates) * 3
+    finally:
+        if own:
+            conn.close()
+
+    # jobs_query_sql's order, so ties rank as they would over the whole table.
+    candidates.sort(key=jobs_order_key, reverse=True)
+    for r in candidates:
+        for c in _SQL_ONLY:
+            r.pop(c, None)
+    return rank_jobs(candidates, profile, limit=limit, offset=offset), int(total)
@@ -0,0 +1,224 @@
+# src/ranking/score_cache.py
+
+from __future__ import annotations
+import hashlib
+
+from src.storage.db import (
+    get_conn,
+    execute,
+    is_postgres,
+    jobs_query_sql,
+    run_write,
+    _ensure_score_cache,
+)
+from src.storage.features import known_personas
+
+from .dates import now_epoch, recency, to_epoch
+from .matcher import compile_persona
+from .scoring import SEED_REASON, _ranked_row, _recency_reason, _static_reasons, combine_score, top_k_indices
+from .seed_boost import seed_index, seed_seedscore
+
+
+def scores_key(profile: dict) -> str:
+    """
+    Cache key for a persona's static score components. Seed tokens feed the
+    seed-boost term, so they are part of the key alongside the persona hash.
+    """
+    raw = compile_persona(profile).hash + seed_index().digest
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# Job ids per IN (...) lookup.
+_ID_CHUNK = 500
+# Entries per fill_scores() write.
+_WRITE_CHUNK = 1000
+
+
+def _load_scores(conn, key: str, job_ids: list[int]) -> dict:
+    # Only the jobs being ranked; _why text is fetched separately, for the
+    # returned page only.
+    out: dict = {}
+    for i in range(0, len(job_ids), _ID_CHUNK):
+        chunk = job_ids[i : i + _ID_CHUNK]
+        marks = ", ".join(["?"] * len(chunk))
+        rows = execute(
+            conn,
+            f"SELECT job_id, content_hash, role_hit, keyword, seed FROM job_scores WHERE persona_hash = ? AND job_id IN ({marks})",
+            (key, *chunk),
+        ).fetchall()
+        for r in rows:
+            out[r["job_id"]] = (r["content_hash"], bool(r["role_hit"]), r["keyword"], r["seed"], None)
+    return out
+
+
+def _static_entry(j: dict, profile: dict, cp) -> tuple:
+    m = cp.match(j)
+    return (j.get("content_hash"), m.role_hit, cp.keyword_fraction(m), seed_seedscore(j, profile, m),
+            "\n".join(_static_reasons(cp, m)))
+
+
+def _load_why(conn, key: str, job_ids: list[int]) -> dict:
+    if not job_ids:
+        return {}
+    marks = ", ".join(["?"] * len(job_ids))
+    rows = execute(
+        conn,
+        f"SELECT job_id, why FROM job_scores WHERE persona_hash = ? AND job_id IN ({marks})",
+        (key, *job_ids),
+    ).fetchall()
+    return {r["job_id"]: r["why"] for r in rows}
+
+
+def _store_scores(conn, key: str, entries: list[tuple]) -> int:
+    _ensure_score_cache(conn)
+    ts = "NOW()" if is_postgres() else "datetime('now')"
+    for job_id, (content_hash, role_hit, keyword, seed, why) in entries:
+        execute(
+            conn,
+            f"""
+            INSERT INTO job_scores (persona_hash, job_id, content_hash, role_hit, keyword, seed, why, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, {ts})
+            ON CONFLICT (persona_hash, job_id) DO UPDATE SET
+              content_hash = EXCLUDED.content_hash,
+              role_hit = EXCLUDED.role_hit,
+              keyword = EXCLUDED.keyword,
+              seed = EXCLUDED.seed,
+              why = EXCLUDED.why,
+              updated_at = EXCLUDED.updated_at
+            """,
+            (key, job_id, content_hash, int(role_hit), keyword, seed, why),
+        )
+    return len(entries)
+
+
+def _delete_scores(conn, key: str) -> int:
+    _ensure_score_cache(conn)
+    cur = execute(conn, "DELETE FROM job_scores WHERE persona_hash = ?", (key,))
+    return max(cur.rowcount or 0, 0)
+
+
+def _prune_scores(conn, keep: list[str]) -> int:
+    _ensure_score_cache(conn)
+    if keep:
+        marks = ", ".join(["?"] * len(keep))
+        cur = execute(conn, f"DELETE FROM job_scores WHERE persona_hash NOT IN ({marks})", tuple(keep))
+    else:
+        cur = execute(conn, "DELETE FROM job_scores")
+    return max(cur.rowcount or 0, 0)
+
+
+def invalidate_persona_scores(profile: dict, conn=None) -> int:
+    """Drop cached components for this persona (call before it is overwritten)."""
+    return run_write(conn, _delete_scores, scores_key(profile))
+
+
+def fill_scores(profiles=(), conn=None) -> int:
+    """
+    Compute and store the static components of every active job whose cached
+    entry is missing or stale, for each persona on disk and in `profiles`.
+    Run after harvests and persona saves so rank_jobs_cached() only reads.
+    Returns the number of entries written.
+    """
+    personas = {scores_key(p): p for p in known_personas() + list(profiles)}
+    if not personas:
+        return 0
+    read_conn = conn if conn is not None else get_conn()
+    try:
+        jobs = [dict(r) for r in execute(read_conn, jobs_query_sql(with_features=True)).fetchall()]
+        ids = [j["id"] for j in jobs]
+        cached = {key: _load_scores(read_conn, key, ids) for key in personas}
+        if not is_postgres():
+            read_conn.commit()
+    finally:
+        if conn is None:
+            read_conn.close()
+
+    written = 0
+    for key, profile in personas.items():
+        cp = compile_persona(profile)
+        fresh = []
+        for j in jobs:
+            chash = j.get("content_hash")
+            entry = cached[key].get(j["id"])
+            if not chash or (entry is not None and entry[0] == chash):
+                continue
+            try:
+                fresh.append((j["id"], _static_entry(j, profile, cp)))
+            except Exception:
+                continue
+        for i in range(0, len(fresh), _WRITE_CHUNK):
+            written += run_write(conn, _store_scores, key, fresh[i : i + _WRITE_CHUNK])
+    return written
+
+
+def rank_jobs_cached(jobs: list[dict], profile: dict, conn=None, limit: int | None = None, offset: int = 0) -> list[dict]:
+    """
+    rank_jobs() backed by job_scores: role match, keyword fraction, seed score
+    and the static _why lines are read from the cache when the job's
+    content_hash is unchanged, and computed in memory otherwise (fill_scores()
+    stores them; reads never write). Only the recency term (and its _why
+    line) is evaluated at read time.
+
+    limit/offset select a window of the ranking as in rank_jobs(); only the
+    rows in it are copied and given a _why.
+    """
+    cp = compile_persona(profile)
+    key = scores_key(profile)
+    now = now_epoch()
+
+    read_conn = conn if conn is not None else get_conn()
+    try:
+        try:
+            cached = _load_scores(read_conn, key, [j["id"] for j in jobs if j.get("id") is not None])
+        except Exception:
+            cached = {}
+
+        entries: list[tuple | None] = []
+        scores: list[float] = []
+        recs: list[float] = []
+        for j in jobs:
+            jid = j.get("id")
+            chash = j.get("content_hash")
+            entry = cached.get(jid) if jid is not None else None
+            rec = 0.0
+            try:
+                if entry is None or not chash or entry[0] != chash:
+                    entry = _static_entry(j, profile, cp)
+                _, role_hit, keyword, seed, _ = entry
+                rec = recency(to_epoch(j.get("posted_at")), now)
+                sc = combine_score(role_hit, keyword, rec, seed)
+            except Exception:
+                # As rank_jobs(): a job that cannot be evaluated scores 0.
+                entry, sc = None, 0.0
+            scores.append(round(sc, 4))
+            entries.append(entry)
+            recs.append(rec)
+
+        k = None if limit is None else offset + limit
+        page = top_k_indices(scores, k)[offset:]
+        try:
+            whys = _load_why(read_conn, key, [jobs[i]["id"] for i in page if entries[i] is not None and entries[i][4] is None])
+        except Exception:
+            whys = {}
+    finally:
+        if conn is None:
+            read_conn.close()
+
+    ranked = []
+    for i in page:
+        if entries[i] is None:
+            ranked.append(_ranked_row(jobs[i], scores[i], []))
+            continue
+        _, _, _, seed, why = entries[i]
+        if why is None:
+            why = whys.get(jobs[i]["id"])
+            if why is None:
+                # Row vanished between reads; explain it directly.
+                cp_m = cp.match(jobs[i])
+                why = "\n".join(_static_reasons(cp, cp_m))
+        reasons = why.split("\n") if why else []
+        reasons.append(_recency_reason(recs[i]))
+        if seed >= 0.5:
+            reasons.append(SEED_REASON)
+        ranked.append(_ranked_row(jobs[i], scores[i], reasons))
+    return ranked
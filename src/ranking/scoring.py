@@ -1,54 +1,35 @@
 # src/ranking/scoring.py
 
 from __future__ import annotations
+import heapq
 import re
-from datetime import datetime, timezone
+from datetime import datetime
+from typing import NamedTuple
 
-from .seed_boost import seed_seedscore
+from src.storage.db import JOB_FEATURE_FIELDS
+
+from .dates import as_epoch, now_epoch, parse_dt, recency, to_epoch
+from .matcher import CompiledPersona, JobMatch, compile_persona
+from .seed_boost import seed_seedscore, seed_upper_bound
 
 
 # --- time / recency ---------------------------------------------------------
 
 def _parse_dt(val) -> datetime | None:
     """
-    Parse various ISO-ish strings or datetime objects and return
-    a timezone-aware UTC datetime. Returns None if parsing fails.
+    Parse a posted_at value (see dates.to_epoch for the accepted formats) and
+    return a timezone-aware UTC datetime. Returns None if parsing fails.
     """
-    if not val:
-        return None
-
-    if isinstance(val, datetime):
-        return val if val.tzinfo else val.replace(tzinfo=timezone.utc)
-
-    if isinstance(val, str):
-        s = val.strip()
-        # Accept both "...Z" and "+00:00" and plain "YYYY-MM-DDTHH:MM:SS"
-        if s.endswith("Z"):
-            s = s[:-1] + "+00:00"
-        try:
-            dt = datetime.fromisoformat(s)
-        except Exception:
-            return None
-        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
-
-    return None
+    return parse_dt(val)
 
 
-def normalize_age(posted_at: str | datetime | None, days: int = 30) -> float:
+def normalize_age(posted_at, days: int = 30, now: datetime | float | None = None) -> float:
     """
     Recency score in [0,1]: 1.0 if posted today, linearly decays to 0.0 by N days.
-    Timezone-safe (handles aware/naive timestamps).
+    Timezone-safe (handles aware/naive timestamps). Pass `now` (a datetime or
+    epoch seconds) to score a batch against one clock reading.
     """
-    dt = _parse_dt(posted_at)
-    if not dt:
-        return 0.0
-
-    now = datetime.now(timezone.utc)
-    # Use total_seconds for finer granularity; fall back to day bucket
-    age_days = max(0.0, (now - dt).total_seconds() / 86400.0)
-    if age_days >= days:
-        return 0.0
-    return max(0.0, 1.0 - (age_days / float(days)))
+    return recency(to_epoch(posted_at), as_epoch(now), days)
 
 
 # --- text / keyword matching ------------------------------------------------
@@ -67,40 +48,134 @@ def keyword_score(text: str, keywords: list[str]) -> float:
 
 # --- main job score ---------------------------------------------------------
 
-def score_job(j: dict, profile: dict) -> float:
-    """
-    Overall score in [0,1].
-      - Title role match (0.4)
-      - Keyword hits across title/JD/company (0.3)
-      - Recency (0.3, fades by 30 days)
-      - Seed boost: ensures seed-aligned jobs float to the top (max with base score)
-    """
-    title = (j.get("title") or "").lower()
-    jd    = (j.get("jd_text") or "").lower()
-    comp  = (j.get("company") or "").lower()
+class ScoreExplanation(NamedTuple):
+    score: float            # final score in [0,1], as score_job() returns it
+    components: dict        # weighted parts: role, keywords, recency, base (their sum), seed
+    reasons: list           # human-readable lines, as explain_job_score() returns them
+    codes: list             # machine-readable reason codes, parallel to reasons
 
-    # profile knobs
-    roles = [r.lower() for r in (profile.get("roles_target") or [])]
-    must  = profile.get("must_have") or []
-    nice  = profile.get("nice_to_have") or []
-    kw    = must + nice
 
-    s = 0.0
+# Reason codes (stable identifiers for the lines in `reasons`).
+ROLE_MATCH = "role_match"
+ROLE_MISS = "role_miss"
+KEYWORDS_MATCH = "keywords_match"
+KEYWORDS_MISS = "keywords_miss"
+POSTED_VERY_RECENT = "posted_very_recent"
+POSTED_RECENT = "posted_recent"
+POSTED_OLDER = "posted_older"
+POSTED_UNKNOWN = "posted_unknown_or_stale"
+SEED_MATCH = "seed_match"
+
+SEED_REASON = "Matches your high-priority seeds (company/title/url)"
+
+
+def _static_explanation(cp: CompiledPersona, m: JobMatch) -> tuple[list[str], list[str]]:
+    reasons: list[str] = []
+    codes: list[str] = []
 
+    # 1) Title vs roles
+    if m.matched_roles:
+        reasons.append(
+            "Title matches target role(s): " + ", ".join(sorted(set(m.matched_roles)))
+        )
+        codes.append(ROLE_MATCH)
+    elif cp.roles:
+        reasons.append("Title does not match any target roles in your persona")
+        codes.append(ROLE_MISS)
+
+    # 2) Keyword hits
+    hits = cp.hit_labels(m)
+    if hits:
+        reasons.append(
+            "Contains your skills/keywords: " + ", ".join(sorted(set(hits)))
+        )
+        codes.append(KEYWORDS_MATCH)
+    elif cp.keyword_count:
+        reasons.append("Missing most of your specified skills/keywords")
+        codes.append(KEYWORDS_MISS)
+
+    return reasons, codes
+
+
+def _static_reasons(cp: CompiledPersona, m: JobMatch) -> list[str]:
+    return _static_explanation(cp, m)[0]
+
+
+def _recency_explanation(rec: float) -> tuple[str, str]:
+    if rec >= 0.8:
+        return "Very recent posting (last few days)", POSTED_VERY_RECENT
+    if rec >= 0.5:
+        return "Recent posting (roughly within last 1–2 weeks)", POSTED_RECENT
+    if rec > 0.0:
+        return "Older posting (over ~2 weeks old)", POSTED_OLDER
+    return "Posting date missing or older than 30 days", POSTED_UNKNOWN
+
+
+def _recency_reason(rec: float) -> str:
+    return _recency_explanation(rec)[0]
+
+
+def _evaluate(j: dict, profile: dict, cp: CompiledPersona, m: JobMatch, explain: bool = True,
+              now: float | None = None) -> ScoreExplanation:
+    """
+    One evaluation of every score term; reasons are only built when explain=True.
+    `now` is the batch's reference time in epoch seconds (read here if None).
+    """
     # 1) Title match against target roles
-    if any(r in title for r in roles):
-        s += 0.4
+    role = 0.4 if m.role_hit else 0.0
 
     # 2) Keywords across title+JD+company
-    s += 0.3 * keyword_score(" ".join((title, jd, comp)), kw)
+    kw = 0.3 * cp.keyword_fraction(m)
 
     # 3) Recency
-    s += 0.3 * normalize_age(j.get("posted_at"))
+    rec = recency(to_epoch(j.get("posted_at")), now_epoch() if now is None else now)
 
     # 4) Seed boost: if a job is seed-aligned, force it to at least that seed score
-    s = max(s, seed_seedscore(j, profile))  # 0..1
+    seed = seed_seedscore(j, profile, m)  # 0..1
 
-    return min(1.0, max(0.0, float(s)))
+    # Accumulated in the original order so the float result is unchanged.
+    s = 0.0
+    if m.role_hit:
+        s += 0.4
+    s += kw
+    s += 0.3 * rec
+    base = s
+    s = max(s, seed)
+    score = min(1.0, max(0.0, float(s)))
+
+    if not explain:
+        return ScoreExplanation(score, {}, [], [])
+
+    reasons, codes = _static_explanation(cp, m)
+    text, code = _recency_explanation(rec)
+    reasons.append(text)
+    codes.append(code)
+    if seed >= 0.5:
+        reasons.append(SEED_REASON)
+        codes.append(SEED_MATCH)
+    components = {"role": role, "keywords": kw, "recency": 0.3 * rec, "base": base, "seed": seed}
+    return ScoreExplanation(score, components, reasons, codes)
+
+
+def score_and_explain(j: dict, profile: dict) -> ScoreExplanation:
+    """
+    Score, weighted component breakdown, explanation lines and reason codes
+    for one job, from a single evaluation of each term.
+    """
+    cp = compile_persona(profile)
+    return _evaluate(j, profile, cp, cp.match(j))
+
+
+def score_job(j: dict, profile: dict) -> float:
+    """
+    Overall score in [0,1].
+      - Title role match (0.4)
+      - Keyword hits across title/JD/company (0.3)
+      - Recency (0.3, fades by 30 days)
+      - Seed boost: ensures seed-aligned jobs float to the top (max with base score)
+    """
+    cp = compile_persona(profile)
+    return _evaluate(j, profile, cp, cp.match(j), explain=False).score
 
 
 def explain_job_score(j: dict, profile: dict) -> list[str]:
@@ -108,69 +183,128 @@ def explain_job_score(j: dict, profile: dict) -> list[str]:
     Human-readable explanation for why a job scored the way it did.
     Returns a list of short bullet strings.
     """
-    reasons: list[str] = []
-
-    title = (j.get("title") or "")
-    jd    = (j.get("jd_text") or "")
-    comp  = (j.get("company") or "")
-    text  = " ".join((title, jd, comp)).lower()
+    return score_and_explain(j, profile).reasons
 
-    roles = [r.lower() for r in (profile.get("roles_target") or [])]
-    must  = profile.get("must_have") or []
-    nice  = profile.get("nice_to_have") or []
-    kw    = must + nice
 
-    # 1) Title vs roles
-    matched_roles = [r for r in roles if r and r in title.lower()]
-    if matched_roles:
-        reasons.append(
-            "Title matches target role(s): " + ", ".join(sorted(set(matched_roles)))
-        )
-    elif roles:
-        reasons.append("Title does not match any target roles in your persona")
+def combine_score(role_hit: bool, keyword: float, rec: float, seed: float) -> float:
+    """score_job()'s arithmetic from stored components (keyword fraction, recency in [0,1])."""
+    # Same order of operations as _evaluate, so results are bit-identical.
+    s = 0.0
+    if role_hit:
+        s += 0.4
+    s += 0.3 * keyword
+    s += 0.3 * rec
+    s = max(s, seed)
+    return min(1.0, max(0.0, float(s)))
 
-    # 2) Keyword hits
-    hits = [k for k in kw if k and k.lower() in text]
-    if hits:
-        reasons.append(
-            "Contains your skills/keywords: " + ", ".join(sorted(set(hits)))
-        )
-    elif kw:
-        reasons.append("Missing most of your specified skills/keywords")
 
-    # 3) Recency bucket
-    rec = normalize_age(j.get("posted_at"))
-    if rec >= 0.8:
-        reasons.append("Very recent posting (last few days)")
-    elif rec >= 0.5:
-        reasons.append("Recent posting (roughly within last 1–2 weeks)")
-    elif rec > 0.0:
-        reasons.append("Older posting (over ~2 weeks old)")
-    else:
-        reasons.append("Posting date missing or older than 30 days")
+def _ranked_row(j: dict, score: float, why: list[str]) -> dict:
+    jj = dict(j)
+    if "_f_text_bits" in jj:
+        for f in JOB_FEATURE_FIELDS:
+            jj.pop(f, None)
+    jj["_score"] = score
+    jj["_why"] = why
+    return jj
 
-    # 4) Seed boost
-    seed_sc = seed_seedscore(j, profile)
-    if seed_sc >= 0.5:
-        reasons.append("Matches your high-priority seeds (company/title/url)")
 
-    return reasons
+def top_k_indices(scores: list[float], k: int | None) -> list[int]:
+    """
+    Indices of the k best scores, best first, ties in input order: the same
+    prefix a stable descending sort would give. k=None ranks everything.
+    """
+    n = len(scores)
+    if k is None or k >= n:
+        return sorted(range(n), key=scores.__getitem__, reverse=True)
+    if k <= 0:
+        return []
+    # nlargest is documented as sorted(..., reverse=True)[:k], so it is stable too.
+    return heapq.nlargest(k, range(n), key=scores.__getitem__)
 
 
-def rank_jobs(jobs: list[dict], profile: dict) -> list[dict]:
+def rank_jobs(jobs: list[dict], profile: dict, limit: int | None = None, offset: int = 0) -> list[dict]:
     """
     Convenience: compute score for each job and return a new list sorted desc by _score.
     Adds a '_score' float field and a '_why' explanation list to each returned dict.
+    The persona is compiled once and each job's text is matched once for both.
+
+    With limit, only the window [offset, offset + limit) of that ranking is
+    returned; rows outside it are never copied and get no _why.
     """
-    ranked = []
+    cp = compile_persona(profile)
+    now = now_epoch()
+    scores: list[float] = []
     for j in jobs:
         try:
-            sc = float(score_job(j, profile))
+            sc = _evaluate(j, profile, cp, cp.match(j), explain=False, now=now).score
+        except Exception:
+            sc = 0.0
+        scores.append(round(sc, 4))
+    k = None if limit is None else offset + limit
+    # Matches are not kept (they hold each job's lowercased text); the page
+    # is re-matched for its explanations.
+    page = top_k_indices(scores, k)[offset:]
+    return [
+        _ranked_row(jobs[i], scores[i], _evaluate(jobs[i], profile, cp, cp.match(jobs[i]), now=now).reasons)
+        for i in page
+    ]
+
+
+def rank_jobs_pruned(jobs: list[dict], profile: dict, limit: int, offset: int = 0) -> tuple[list[dict], dict]:
+    """
+    Exact top-K ranking with score upper bounds (WAND-style early termination).
+
+    Each job gets a cheap bound from its title and posting date alone,
+    max(0.4*role + 0.3*best_keyword_fraction + 0.3*recency, seed bound).
+    Candidates are visited best bound first, and the scan stops once the next
+    bound rounds below the current K-th score. Skipped jobs never have their
+    text scanned. Returns the same window as rank_jobs(jobs, profile, limit,
+    offset) plus {"evaluated", "pruned", "pruned_pct"}.
+    """
+    k = offset + limit
+    n = len(jobs)
+    if k <= 0 or n == 0:
+        return [], {"evaluated": 0, "pruned": n, "pruned_pct": 100.0 if n else 0.0}
+    cp = compile_persona(profile)
+    kw_best = min(1.0, sum(cp.keyword_weights.values()) / max(1, cp.keyword_count)) if cp.keyword_count else 0.0
+    now = now_epoch()
+
+    bounds: list[float] = []
+    for j in jobs:
+        try:
+            title = (j.get("title") or "").lower()
+            s = 0.0
+            if any(r in title for r in cp.roles):
+                s += 0.4
+            s += 0.3 * kw_best
+            s += 0.3 * recency(to_epoch(j.get("posted_at")), now)
+            s = max(s, seed_upper_bound(j, profile))
+            bounds.append(round(min(1.0, max(0.0, float(s))), 4))
+        except Exception:
+            bounds.append(1.0)
+
+    # Min-heap of (score, -index): the root is the current K-th best, and on
+    # equal scores the later job is the weaker one, as in a stable sort.
+    heap: list[tuple[float, int]] = []
+    evaluated = 0
+    for i in sorted(range(n), key=bounds.__getitem__, reverse=True):
+        if len(heap) >= k and bounds[i] < heap[0][0]:
+            break
+        try:
+            sc = round(_evaluate(jobs[i], profile, cp, cp.match(jobs[i]), explain=False, now=now).score, 4)
         except Exception:
             sc = 0.0
-        jj = dict(j)
-        jj["_score"] = round(sc, 4)
-        jj["_why"] = explain_job_score(j, profile)
-        ranked.append(jj)
-    ranked.sort(key=lambda x: x.get("_score", 0.0), reverse=True)
-    return ranked
+        evaluated += 1
+        item = (sc, -i)
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    top = sorted(heap, reverse=True)[offset:]
+    rows = [
+        _ranked_row(jobs[-ni], sc, _evaluate(jobs[-ni], profile, cp, cp.match(jobs[-ni]), now=now).reasons)
+        for sc, ni in top
+    ]
+    pruned = n - evaluated
+    return rows, {"evaluated": evaluated, "pruned": pruned, "pruned_pct": round(100.0 * pruned / n, 2)}
@@ -1,9 +1,21 @@
 from __future__ import annotations
+import hashlib
+import json
+import math
 import re
+import threading
+import time
 from typing import Dict, Set
 
 from src.storage.db import get_conn
 
+from .matcher import JobMatch
+
+# How often (seconds) the seeds revision is re-read; between checks the loaded
+# index is trusted. seed-add in this process invalidates immediately.
+_REVISION_TTL = 2.0
+_MEMO_SIZE = 50_000
+
 def _read_seeds() -> list[dict]:
     con = get_conn()
     try:
@@ -31,35 +43,233 @@ def _parse_tokens(seeds: list[dict]) -> Dict[str, Set[str]]:
                 if len(t) >= 3: title_kw.add(t)
     return {"gh": gh_tokens, "lv": lv_tokens, "comp": comp_hints, "title": title_kw}
 
-_SEED_CACHE = None
+def _read_revision():
+    """
+    Current seeds revision: the trigger-maintained counter when present, else a
+    (count, max id) signature. None when there is no seeds table.
+    """
+    con = get_conn()
+    try:
+        try:
+            row = con.execute("SELECT revision FROM seeds_revision WHERE id = 1").fetchone()
+            if row is not None:
+                return ("rev", int(row["revision"]))
+        except Exception:
+            try:
+                con.rollback()
+            except Exception:
+                pass
+        try:
+            row = con.execute("SELECT COUNT(*) AS n, MAX(id) AS m FROM seeds").fetchone()
+            return ("sig", int(row["n"]), row["m"])
+        except Exception:
+            return None
+    finally:
+        con.close()
+
+
+def _any_pattern(terms) -> "re.Pattern | None":
+    # One alternation is an exact stand-in for any(t in s for t in terms).
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)))
+
+
+class SeedIndex:
+    """
+    Seed tokens parsed once per seeds revision. Provider checks are memoized per
+    job source, company hints are matched with one alternation search per
+    distinct company, and title hints with one search per title.
+    """
+
+    __slots__ = ("revision", "digest", "tokens", "empty", "_providers", "_companies", "_comp_re", "_title_re")
+
+    def __init__(self, tokens: Dict[str, Set[str]], revision=None):
+        self.revision = revision
+        self.tokens = tokens
+        self.empty = not any(tokens.values())
+        raw = json.dumps({k: sorted(v) for k, v in tokens.items()}, sort_keys=True)
+        self.digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        self._providers: Dict[str, bool] = {}
+        self._companies: Dict[str, bool] = {}
+        self._comp_re = _any_pattern(tokens["comp"])
+        self._title_re = _any_pattern(tokens["title"])
+
+    def provider(self, src: str) -> bool:
+        hit = self._providers.get(src)
+        if hit is None:
+            hit = (any(f"greenhouse:{t}" in src for t in self.tokens["gh"]) or
+                   any(f"lever:{t}" in src for t in self.tokens["lv"]))
+            if len(self._providers) < _MEMO_SIZE:
+                self._providers[src] = hit
+        return hit
+
+    def company(self, comp: str) -> bool:
+        if self._comp_re is None:
+            return False
+        hit = self._companies.get(comp)
+        if hit is None:
+            hit = self._comp_re.search(comp) is not None
+            if len(self._companies) < _MEMO_SIZE:
+                self._companies[comp] = hit
+        return hit
+
+    def title_hit(self, title: str) -> bool:
+        return self._title_re is not None and self._title_re.search(title) is not None
+
+
+_INDEX: SeedIndex | None = None
+_INDEX_LOCK = threading.Lock()
+_CHECKED_AT = 0.0
+
+
+def seed_index() -> SeedIndex:
+    """The seed index for the current seeds revision, reloaded only when it changes."""
+    global _INDEX, _CHECKED_AT
+    now = time.monotonic()
+    idx = _INDEX
+    if idx is not None and now - _CHECKED_AT < _REVISION_TTL:
+        return idx
+    with _INDEX_LOCK:
+        if _INDEX is not None and now - _CHECKED_AT < _REVISION_TTL:
+            return _INDEX
+        revision = _read_revision()
+        if _INDEX is None or revision is None or revision != _INDEX.revision:
+            _INDEX = SeedIndex(_parse_tokens(_read_seeds()), revision)
+        _CHECKED_AT = time.monotonic()
+        return _INDEX
+
+
+def invalidate_seed_index() -> None:
+    """Force a revision check on the next lookup (call after writing seeds)."""
+    global _CHECKED_AT
+    _CHECKED_AT = 0.0
+
+
+def freeze_seed_index() -> None:
+    """Stop revision checks in this process (forked ranking workers score against the parent's snapshot)."""
+    global _CHECKED_AT
+    _CHECKED_AT = math.inf
+
+
 def _get_cache():
-    global _SEED_CACHE
-    if _SEED_CACHE is None:
-        _SEED_CACHE = _parse_tokens(_read_seeds())
-    return _SEED_CACHE
-
-def seed_seedscore(job: dict, profile: dict) -> float:
-    cache = _get_cache()
-    if not any(cache.values()):
-        return 0.0
-    src = (job.get("source") or "").lower()
-    comp = (job.get("company") or "").lower()
-    title = (job.get("title") or "").lower()
+    return seed_index().tokens
+
+
+class _PersonaLists:
+    """A persona's lowercased skill and location lists, as seed scoring reads them."""
+
+    __slots__ = ("raw", "skills", "any_skill", "empty_skill", "locations")
+
+    def __init__(self, raw: tuple):
+        must, nice, locs = raw
+        skills = [str(s).lower() for s in (must or [])] + [str(s).lower() for s in (nice or [])]
+        self.raw = raw
+        self.any_skill = bool(skills)
+        self.empty_skill = "" in skills  # "" is a substring of anything
+        self.skills = tuple(dict.fromkeys(s for s in skills if s))
+        self.locations = tuple(str(l).lower() for l in (locs or []))
+
+
+_PERSONAS: Dict[int, tuple] = {}
+
+
+def _persona_lists(profile: dict) -> _PersonaLists:
+    # Keyed by profile identity and checked against copies of the raw lists, so
+    # the per-job cost is three list comparisons.
+    raw = (profile.get("must_have"), profile.get("nice_to_have"), profile.get("locations"))
+    hit = _PERSONAS.get(id(profile))
+    if hit is not None and hit[0] is profile and hit[1].raw == raw:
+        return hit[1]
+    lists = _PersonaLists(tuple(list(x) if x else x for x in raw))
+    if len(_PERSONAS) >= 64:
+        _PERSONAS.clear()
+    _PERSONAS[id(profile)] = (profile, lists)
+    return lists
+
+
+def _skills_hit(pl: _PersonaLists, title: str, job: dict, match: JobMatch | None) -> bool:
+    if not pl.any_skill:
+        return False
+    if pl.empty_skill:
+        return True
+    if match is not None:
+        # Every skill found in jd or title is also in the matched "title jd company" text.
+        if not match.hits:
+            return False
+        if any(k in title for k in match.hits):
+            return True
+        jd = (job.get("jd_text") or "").lower()
+        return any(k in jd for k in match.hits)
+    if any(k in title for k in pl.skills):
+        return True
     jd = (job.get("jd_text") or "").lower()
+    return any(k in jd for k in pl.skills)
+
+
+def _location_hit(pl: _PersonaLists, job: dict) -> bool:
     loc = (job.get("location") or "").lower()
+    return any(l in loc for l in pl.locations) if pl.locations and loc else False
 
-    provider = (any(f"greenhouse:{t}" in src for t in cache["gh"]) or
-                any(f"lever:{t}" in src for t in cache["lv"]))
-    company = any(h in comp for h in cache["comp"]) if cache["comp"] else False
-    title_hit = any(k in title for k in cache["title"]) if cache["title"] else False
 
-    must = [s.lower() for s in (profile.get("must_have") or [])]
-    nice = [s.lower() for s in (profile.get("nice_to_have") or [])]
-    skills = must + nice
-    skills_hit = any(k in jd or k in title for k in skills) if skills else False
+def seed_upper_bound(job: dict, profile: dict) -> float:
+    """
+    Upper bound on seed_seedscore() from the cheap fields only (source, company,
+    title, location): the JD skills check is assumed to hit.
+    """
+    idx = seed_index()
+    if idx.empty:
+        return 0.0
+    pl = _persona_lists(profile)
+    provider = idx.provider((job.get("source") or "").lower())
+    company = idx.company((job.get("company") or "").lower())
+    title_hit = idx.title_hit((job.get("title") or "").lower())
+    skills_hit = pl.any_skill
+    loc_hit = _location_hit(pl, job)
+
+    if provider and (title_hit or skills_hit):
+        return 1.0
+    return sum(1 for c in (provider, company, title_hit, skills_hit, loc_hit) if c) / 5
+
+def seed_job_signals(job: dict) -> tuple[bool, bool, bool] | None:
+    """
+    The persona-independent seed checks for a job: (provider, company,
+    title_hit). None when there are no seeds (every seed score is then 0.0).
+    """
+    idx = seed_index()
+    if idx.empty:
+        return None
+    return (
+        idx.provider((job.get("source") or "").lower()),
+        idx.company((job.get("company") or "").lower()),
+        idx.title_hit((job.get("title") or "").lower()),
+    )
+
+
+def seed_score_from(signals: tuple[bool, bool, bool], skills_hit: bool, loc_hit: bool) -> float:
+    """seed_seedscore() from seed_job_signals() plus the persona's skills/location checks."""
+    provider, company, title_hit = signals
+    if provider and (title_hit or skills_hit):
+        return 1.0
+    return sum(1 for c in (provider, company, title_hit, skills_hit, loc_hit) if c) / 5
+
+
+def seed_seedscore(job: dict, profile: dict, match: JobMatch | None = None) -> float:
+    """
+    Seed alignment in [0,1]. `match` (the persona's JobMatch for this job) lets
+    the skills check reuse the keyword hits instead of rescanning the JD.
+    """
+    idx = seed_index()
+    if idx.empty:
+        return 0.0
+    pl = _persona_lists(profile)
+    title = (job.get("title") or "").lower()
 
-    persona_locs = [l.lower() for l in (profile.get("locations") or [])]
-    loc_hit = any(l in loc for l in persona_locs) if persona_locs and loc else False
+    provider = idx.provider((job.get("source") or "").lower())
+    company = idx.company((job.get("company") or "").lower())
+    title_hit = idx.title_hit(title)
+    skills_hit = _skills_hit(pl, title, job, match)
+    loc_hit = _location_hit(pl, job)
 
     checks = [provider, company, title_hit, skills_hit, loc_hit]
     total = len(checks); matched = sum(1 for c in checks if c)
@@ -0,0 +1,286 @@
+# src/ranking/shards.py
+
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.storage.db import JOB_ORDER_FIELDS, get_conn, execute, is_postgres, jobs_order_columns, jobs_order_key
+
+from .dates import now_epoch
+from .matcher import compile_persona
+from .scoring import _evaluate, _ranked_row, top_k_indices
+
+# Knuth's multiplicative hash: consecutive ids (one harvest batch) spread
+# evenly, and the same partition is expressible in SQL on both backends.
+_HASH_MUL = 2654435761
+_HASH_MOD = 1 << 32
+# How often (seconds) a worker checks its shard for changed rows.
+_REFRESH_TTL = 30.0
+_TIMEOUT = 10.0
+
+
+def shard_of(job_id: int, shards: int) -> int:
+    """The shard (0..shards-1) a job id is partitioned to."""
+    return (int(job_id) * _HASH_MUL % _HASH_MOD) % shards
+
+
+def shard_urls() -> list[str]:
+    """Shard worker base URLs (JOB_BUTLER_SHARDS, comma-separated, in shard order)."""
+    return [u.strip().rstrip("/") for u in (os.getenv("JOB_BUTLER_SHARDS") or "").split(",") if u.strip()]
+
+
+def _shard_filter() -> str:
+    mod = "%%" if is_postgres() else "%"  # psycopg reads a bare % as a placeholder
+    return f"(jobs.id * {_HASH_MUL} {mod} {_HASH_MOD}) {mod} ? = ?"
+
+
+def _passes(j: dict, source: str | None, contains: str | None) -> bool:
+    # The /api/jobs filters, applied before ranking.
+    if source and not (j.get("source") or "").startswith(source):
+        return False
+    if contains:
+        hay = ((j.get("title", "") or "") + (j.get("company", "") or "") + (j.get("location", "") or "")).lower()
+        return contains.lower() in hay
+    return True
+
+
+def rank_shard(jobs: list[dict], profile: dict, k: int, now: float, keys: list | None = None) -> list[dict]:
+    """
+    rank_jobs(jobs, profile, limit=k) scored against the coordinator's clock,
+    so every shard decays recency from the same instant. With `keys` (one
+    global order key per job), each row carries its key as "_order" for the
+    coordinator's merge.
+    """
+    cp = compile_persona(profile)
+    scores: list[float] = []
+    for j in jobs:
+        try:
+            sc = _evaluate(j, profile, cp, cp.match(j), explain=False, now=now).score
+        except Exception:
+            sc = 0.0
+        scores.append(round(sc, 4))
+    out = []
+    for i in top_k_indices(scores, k):
+        row = _ranked_row(jobs[i], scores[i], _evaluate(jobs[i], profile, cp, cp.match(jobs[i]), now=now).reasons)
+        if keys is not None:
+            row["_order"] = keys[i]
+        out.append(row)
+    return out
+
+
+class ShardWorker:
+    """
+    One shard of the active corpus, held in memory: the jobs whose
+    shard_of(id) is `shard`, in jobs_query_sql() order. Reloads when the
+    shard's row count or last_seen_at changes (checked every _REFRESH_TTL
+    seconds). Pass `jobs` (and their global order `keys`, larger first) to
+    serve a fixed list instead of the database.
+    """
+
+    def __init__(self, shard: int, shards: int, jobs: list[dict] | None = None, keys: list | None = None):
+        if not 0 <= shard < shards:
+            raise ValueError(f"shard {shard} out of range for {shards} shards")
+        self.shard = shard
+        self.shards = shards
+        self.static = jobs is not None
+        self.jobs: list[dict] = jobs if jobs is not None else []
+        self.keys: list = keys if keys is not None else [[-i] for i in range(len(self.jobs))]
+        self.loaded_at = time.time() if jobs is not None else 0.0
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read_signature(self, conn):
+        active = "jobs.is_active" if is_postgres() else "jobs.is_active = 1"
+        row = execute(
+            conn,
+            f"SELECT COUNT(*) AS n, MAX(last_seen_at) AS m FROM jobs WHERE {active} AND {_shard_filter()}",
+            (self.shards, self.shard),
+        ).fetchone()
+        return (int(row["n"]), str(row["m"]))
+
+    def _load(self, conn) -> tuple[list[dict], list]:
+        active = "jobs.is_active" if is_postgres() else "jobs.is_active = 1"
+        rows = execute(
+            conn,
+            f"""
+            SELECT jobs.*, f.vocab_size AS _f_vocab, f.title_bits AS _f_title_bits, f.text_bits AS _f_text_bits,
+                   {jobs_order_columns()}
+              FROM jobs
+              LEFT JOIN job_features f ON f.job_id = jobs.id AND f.content_hash = jobs.content_hash
+             WHERE {active} AND {_shard_filter()}
+            """,
+            (self.shards, self.shard),
+        ).fetchall()
+        jobs = [dict(r) for r in rows]
+        jobs.sort(key=jobs_order_key, reverse=True)
+        keys = []
+        for j in jobs:
+            keys.append(list(jobs_order_key(j)))
+            for c in JOB_ORDER_FIELDS:
+                del j[c]
+        return jobs, keys
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the shard if it changed; returns True when it was reloaded."""
+        if self.static:
+            return False
+        now = time.monotonic()
+        if not force and now - self._checked_at < _REFRESH_TTL:
+            return False
+        with self._lock:
+            if not force and now - self._checked_at < _REFRESH_TTL:
+                return False
+            conn = get_conn()
+            try:
+                sig = self._read_signature(conn)
+                reloaded = force or sig != self._signature
+                if reloaded:
+                    self.jobs, self.keys = self._load(conn)
+                    self._signature = sig
+                    self.loaded_at = time.time()
+            finally:
+                conn.close()
+            self._checked_at = time.monotonic()
+            return reloaded
+
+    def rank(self, profile: dict, k: int, now: float, source: str | None = None, contains: str | None = None) -> dict:
+        """{"items": this shard's top-k rows (with _score, _why and _order), "total": rows passing the filters}."""
+        self.refresh()
+        jobs, keys = self.jobs, self.keys
+        if source or contains:
+            keep = [i for i, j in enumerate(jobs) if _passes(j, source, contains)]
+            jobs, keys = [jobs[i] for i in keep], [keys[i] for i in keep]
+        return {"items": rank_shard(jobs, profile, k, now, keys), "total": len(jobs)}
+
+    def health(self) -> dict:
+        return {"shard": self.shard, "shards": self.shards, "jobs": len(self.jobs), "loaded_at": self.loaded_at}
+
+
+class HttpShard:
+    """A ShardWorker served by `shard-worker` at `url`, with the same rank() contract."""
+
+    def __init__(self, url: str, timeout: float = _TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def rank(self, profile: dict, k: int, now: float, source: str | None = None, contains: str | None = None) -> dict:
+        resp = self._session.post(
+            f"{self.url}/rank",
+            json={"profile": profile, "k": k, "now": now, "source": source, "contains": contains},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    def health(self) -> dict:
+        resp = self._session.get(f"{self.url}/health", timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+
+class ShardCoordinator:
+    """
+    Scatter-gather ranking: a persona query goes to every shard at once,
+    each returns its own top-K, and the coordinator merges them. A shard's
+    top-K holds every job of the global top-K it owns, and rows are merged
+    by (score, jobs_query_sql order) as rank_jobs() breaks ties, so the page
+    is the one rank_jobs() would return over the whole active corpus.
+    A shard that fails fails the query (RuntimeError) rather than
+    silently dropping its jobs.
+    """
+
+    def __init__(self, shards: list):
+        if not shards:
+            raise ValueError("at least one shard is required")
+        self.shards = shards
+        self._pool = ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="shard")
+
+    @classmethod
+    def from_env(cls) -> "ShardCoordinator | None":
+        """Coordinator over the JOB_BUTLER_SHARDS workers, verified; None when none are configured."""
+        urls = shard_urls()
+        if not urls:
+            return None
+        coordinator = cls([HttpShard(u) for u in urls])
+        try:
+            coordinator.verify()
+        except Exception:
+            coordinator.close()
+            raise
+        return coordinator
+
+    def verify(self) -> None:
+        """
+        Check that the i-th shard reports shard i of len(shards) from its
+        health(). A worker started with another index or count holds some
+        other partition, and merging it would drop or duplicate jobs, so a
+        mismatch raises RuntimeError.
+        """
+        n = len(self.shards)
+        futures = [self._pool.submit(s.health) for s in self.shards]
+        problems = []
+        for i, f in enumerate(futures):
+            try:
+                health = f.result()
+            except Exception as e:
+                problems.append(f"shard {i} unreachable: {e}")
+                continue
+            got = (health.get("shard"), health.get("shards"))
+            if got != (i, n):
+                where = getattr(self.shards[i], "url", f"#{i}")
+                problems.append(f"{where} serves shard {got[0]}/{got[1]}, expected {i}/{n}")
+        if problems:
+            raise RuntimeError("; ".join(problems))
+
+    def __enter__(self) -> "ShardCoordinator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def rank(self, profile: dict, limit: int, offset: int = 0, source: str | None = None,
+             contains: str | None = None) -> tuple[list[dict], int]:
+        """(page, total) for rank_jobs(active jobs, profile, limit, offset) over all shards."""
+        k = offset + limit
+        now = now_epoch()
+        futures = [self._pool.submit(s.rank, profile, k, now, source, contains) for s in self.shards]
+        rows: list[dict] = []
+        total = 0
+        for i, f in enumerate(futures):
+            try:
+                part = f.result()
+            except Exception as e:
+                raise RuntimeError(f"shard {i} failed: {e}") from e
+            rows.extend(part["items"])
+            total += int(part["total"])
+        # Stable sorts: the last key is the primary one.
+        rows.sort(key=lambda r: r["_order"], reverse=True)
+        rows.sort(key=lambda r: r["_score"], reverse=True)
+        page = rows[offset:k]
+        for r in page:
+            del r["_order"]
+        return page, total
+
+
+def local_cluster(jobs: list[dict], shards: int) -> ShardCoordinator:
+    """
+    In-process shards over a job list with ids (as fetch_all_jobs() returns
+    it), for checking the merge without running workers: the coordinator's
+    pages equal rank_jobs() over `jobs`.
+    """
+    parts: list[list[dict]] = [[] for _ in range(shards)]
+    keys: list[list] = [[] for _ in range(shards)]
+    for i, j in enumerate(jobs):
+        s = shard_of(j["id"], shards)
+        parts[s].append(j)
+        keys[s].append([-i])
+    return ShardCoordinator([ShardWorker(i, shards, parts[i], keys[i]) for i in range(shards)])
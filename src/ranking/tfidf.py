@@ -0,0 +1,310 @@
+# src/ranking/tfidf.py
+
+from __future__ import annotations
+import os
+import threading
+import time
+import zlib
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from src.storage.db import get_conn, execute, is_postgres
+from src.storage.features import _TOKEN_RE, features_generation
+
+from .dates import now_epoch
+from .matcher import compile_persona
+from .scoring import _evaluate, _ranked_row, top_k_indices
+from .seed_boost import seed_index
+
+# Same catch-up policy as the inverted index: throttled checks of
+# job_features, re-reading a little behind the watermark for late commits.
+_REFRESH_TTL = 2.0
+_OVERLAP = "5 minutes"
+_REBUILD_RATIO = 0.2
+
+# Persona term weights: roles describe the job itself, so they count double.
+_ROLE_WEIGHT = 2.0
+_SEED_WEIGHT = 1.0
+
+SIMILARITY_REASON = "Text similarity to your persona: {:.2f}"
+# Below this the similarity line is left out of _why.
+_REASON_MIN = 0.1
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("numpy is required for TF-IDF similarity. Add numpy to requirements.txt.")
+
+
+def tfidf_features() -> int:
+    """Hashed feature space size (JOB_BUTLER_TFIDF_FEATURES, rounded up to a power of two)."""
+    try:
+        n = int(os.getenv("JOB_BUTLER_TFIDF_FEATURES", str(1 << 18)))
+    except ValueError:
+        n = 1 << 18
+    return 1 << max(10, (max(1, n) - 1).bit_length())
+
+
+def tfidf_weight() -> float:
+    """Share of the final score taken by TF-IDF similarity (JOB_BUTLER_TFIDF_WEIGHT)."""
+    try:
+        return min(1.0, max(0.0, float(os.getenv("JOB_BUTLER_TFIDF_WEIGHT", "0.3"))))
+    except ValueError:
+        return 0.3
+
+
+def _bucket(term: str, n_features: int) -> int:
+    # crc32 rather than hash(): str hashes are salted per process.
+    return zlib.crc32(term.encode("utf-8")) & (n_features - 1)
+
+
+def hashed_counts(title: str, body: str, n_features: int) -> dict[int, int]:
+    """
+    Hashed term counts: unigrams of title and body, plus title bigrams so
+    multi-word roles ("data engineer") have a feature of their own.
+    """
+    counts: dict[int, int] = {}
+    title_toks = _TOKEN_RE.findall((title or "").lower())
+    toks = title_toks + _TOKEN_RE.findall((body or "").lower())
+    toks += [f"{a} {b}" for a, b in zip(title_toks, title_toks[1:])]
+    for t in toks:
+        b = _bucket(t, n_features)
+        counts[b] = counts.get(b, 0) + 1
+    return counts
+
+
+def _term_buckets(term: str, n_features: int) -> list[int]:
+    toks = _TOKEN_RE.findall(term.lower())
+    grams = toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+    return [_bucket(t, n_features) for t in grams]
+
+
+class TfidfIndex:
+    """
+    Hashing-vectorizer TF-IDF over job title + JD, for bulk persona similarity.
+
+    Each job is one row of (hashed column, count) pairs; document frequencies
+    are updated as rows are added or replaced, so a harvest costs only its new
+    or changed jobs. The weighted CSR matrix (sublinear tf x smoothed idf, L2-
+    normalized rows) is assembled lazily from the rows on the next query after
+    a change. similarity() scores every job against several personas with one
+    sparse-dense product.
+    """
+
+    def __init__(self, n_features: int | None = None):
+        _require_numpy()
+        self.n_features = n_features or tfidf_features()
+        self.rows: dict[int, tuple] = {}  # id -> (content_hash, columns, counts)
+        self.df = np.zeros(self.n_features, dtype=np.int64)
+        self.watermark = None
+        # Bumped on every row change; derived indexes compare it to catch up.
+        self.revision = 0
+        self._csr = None
+        self._generation = -1
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # --- maintenance ---------------------------------------------------------
+
+    def _remove(self, job_id: int) -> None:
+        row = self.rows.pop(job_id, None)
+        if row is not None:
+            self.df[row[1]] -= 1
+            self._csr = None
+            self.revision += 1
+
+    def add(self, job_id: int, content_hash: str | None, title: str | None, jd_text: str | None) -> None:
+        """Index (or re-index) one job; a no-op when its content_hash is unchanged."""
+        row = self.rows.get(job_id)
+        if row is not None and content_hash and row[0] == content_hash:
+            return
+        self._remove(job_id)
+        counts = hashed_counts(title or "", jd_text or "", self.n_features)
+        cols = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+        vals = np.fromiter((counts[c] for c in cols.tolist()), dtype=np.float32, count=len(counts))
+        self.df[cols] += 1
+        self.rows[job_id] = (content_hash, cols, vals)
+        self._csr = None
+        self.revision += 1
+
+    def _load(self, conn, since=None) -> int:
+        sql = """
+            SELECT j.id, j.title, j.jd_text, f.content_hash, f.updated_at
+              FROM job_features f
+              JOIN jobs j ON j.id = f.job_id AND j.content_hash = f.content_hash
+        """
+        params: tuple = ()
+        if since is not None:
+            if is_postgres():
+                sql += f" WHERE f.updated_at >= ?::timestamptz - interval '{_OVERLAP}'"
+            else:
+                sql += f" WHERE f.updated_at >= datetime(?, '-{_OVERLAP}')"
+            params = (since,)
+        n = 0
+        watermark = self.watermark
+        for r in execute(conn, sql, params).fetchall():
+            self.add(r["id"], r["content_hash"], r["title"], r["jd_text"])
+            if r["updated_at"] is not None and (watermark is None or r["updated_at"] > watermark):
+                watermark = r["updated_at"]
+            n += 1
+        self.watermark = watermark
+        return n
+
+    def rebuild(self, conn=None) -> int:
+        """Index every job with current features from scratch."""
+        own = conn is None
+        conn = conn or get_conn()
+        try:
+            with self._lock:
+                fresh = TfidfIndex(self.n_features)
+                n = fresh._load(conn)
+                self.rows, self.df, self.watermark = fresh.rows, fresh.df, fresh.watermark
+                self._csr = None
+                self.revision += 1
+                self._checked_at = time.monotonic()
+            return n
+        finally:
+            if own:
+                conn.close()
+
+    def refresh(self, conn=None, force: bool = False) -> int:
+        """Catch up with job_features rows written since the last refresh."""
+        gen = features_generation()
+        now = time.monotonic()
+        if not force and gen == self._generation and now - self._checked_at < _REFRESH_TTL:
+            return 0
+        own = conn is None
+        conn = conn or get_conn()
+        try:
+            if self.watermark is None:
+                n = self.rebuild(conn)
+            else:
+                with self._lock:
+                    n = self._load(conn, self.watermark)
+                live = execute(conn, "SELECT COUNT(*) AS n FROM job_features").fetchone()["n"]
+                if len(self.rows) - int(live) > _REBUILD_RATIO * max(1, len(self.rows)):
+                    n = self.rebuild(conn)  # drop ids of deleted jobs
+            self._generation = gen
+            self._checked_at = time.monotonic()
+            return n
+        finally:
+            if own:
+                conn.close()
+
+    # --- lookup --------------------------------------------------------------
+
+    def idf(self) -> "np.ndarray":
+        n = len(self.rows)
+        return (np.log((1.0 + n) / (1.0 + self.df)) + 1.0).astype(np.float32)
+
+    def matrix(self):
+        """(ids, row of each nonzero, columns, weights) of the normalized TF-IDF matrix."""
+        with self._lock:
+            if self._csr is None:
+                ids = np.fromiter(self.rows, dtype=np.int64, count=len(self.rows))
+                rows = list(self.rows.values())
+                lengths = np.fromiter((len(r[1]) for r in rows), dtype=np.int64, count=len(rows))
+                cols = np.concatenate([r[1] for r in rows]) if rows else np.zeros(0, dtype=np.int32)
+                tf = np.concatenate([r[2] for r in rows]) if rows else np.zeros(0, dtype=np.float32)
+                row_of = np.repeat(np.arange(len(rows), dtype=np.int32), lengths)
+                data = (1.0 + np.log(tf)) * self.idf()[cols]
+                norms = np.sqrt(np.bincount(row_of, weights=data * data, minlength=len(rows)))
+                data = (data / np.maximum(norms, 1e-12)[row_of]).astype(np.float32)
+                self._csr = (ids, row_of, cols, data)
+            return self._csr
+
+    def persona_vectors(self, profiles: list[dict]) -> "np.ndarray":
+        """(features x personas) idf-weighted, L2-normalized query vectors from roles, keywords and seeds."""
+        seeds = seed_index()
+        seed_terms = sorted(seeds.tokens["comp"] | seeds.tokens["title"]) if not seeds.empty else []
+        idf = self.idf()
+        q = np.zeros((self.n_features, len(profiles)), dtype=np.float32)
+        for p, profile in enumerate(profiles):
+            cp = compile_persona(profile or {})
+            terms = [(r, _ROLE_WEIGHT) for r in cp.roles if r]
+            terms += [(k, float(cp.keyword_weights[k])) for k in cp.keywords]
+            terms += [(s, _SEED_WEIGHT) for s in seed_terms]
+            for term, w in terms:
+                for b in _term_buckets(term, self.n_features):
+                    q[b, p] += w
+            q[:, p] *= idf
+            norm = float(np.sqrt(np.dot(q[:, p], q[:, p])))
+            if norm > 0.0:
+                q[:, p] /= norm
+        return q
+
+    def similarity(self, profiles: list[dict]) -> tuple["np.ndarray", "np.ndarray"]:
+        """
+        (ids, sims): cosine similarity of every indexed job to each persona, as a
+        (jobs x personas) array. Only the nonzeros in persona columns are touched.
+        """
+        ids, row_of, cols, data = self.matrix()
+        q = self.persona_vectors(profiles)
+        sims = np.zeros((len(ids), len(profiles)), dtype=np.float64)
+        live = q.any(axis=1)
+        sel = np.flatnonzero(live[cols])
+        if sel.size:
+            r, contrib = row_of[sel], data[sel, None] * q[cols[sel]]
+            for p in range(len(profiles)):
+                sims[:, p] = np.bincount(r, weights=contrib[:, p], minlength=len(ids))
+        return ids, np.clip(sims, 0.0, 1.0)
+
+
+_INDEX: TfidfIndex | None = None
+_INDEX_LOCK = threading.Lock()
+
+
+def tfidf_index(refresh: bool = True) -> TfidfIndex:
+    """The process-wide TF-IDF index, built on first use and caught up on each call."""
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = TfidfIndex()
+    if refresh:
+        _INDEX.refresh()
+    return _INDEX
+
+
+def similarity_scores(jobs: list[dict], profiles: list[dict], index: TfidfIndex | None = None) -> "np.ndarray":
+    """(len(jobs) x personas) similarities aligned with `jobs`; 0.0 for jobs not indexed."""
+    index = index or tfidf_index()
+    ids, sims = index.similarity(profiles)
+    pos = {int(i): r for r, i in enumerate(ids.tolist())}
+    out = np.zeros((len(jobs), len(profiles)), dtype=np.float64)
+    for i, j in enumerate(jobs):
+        r = pos.get(j.get("id"))
+        if r is not None:
+            out[i] = sims[r]
+    return out
+
+
+def rank_jobs_tfidf(jobs: list[dict], profile: dict, limit: int | None = None, offset: int = 0,
+                    weight: float | None = None, index: TfidfIndex | None = None) -> list[dict]:
+    """
+    rank_jobs() with TF-IDF similarity blended in:
+    score = (1 - weight) * score_job() + weight * similarity. The similarity
+    column comes from one sparse product over the whole index; _why gains a
+    similarity line when it is notable.
+    """
+    weight = tfidf_weight() if weight is None else weight
+    sims = similarity_scores(jobs, [profile], index)[:, 0]
+    cp = compile_persona(profile)
+    now = now_epoch()
+    scores: list[float] = []
+    for i, j in enumerate(jobs):
+        try:
+            base = _evaluate(j, profile, cp, cp.match(j), explain=False, now=now).score
+        except Exception:
+            base = 0.0
+        scores.append(round((1.0 - weight) * base + weight * float(sims[i]), 4))
+    k = None if limit is None else offset + limit
+    out = []
+    for i in top_k_indices(scores, k)[offset:]:
+        why = _evaluate(jobs[i], profile, cp, cp.match(jobs[i]), now=now).reasons
+        if sims[i] >= _REASON_MIN:
+            why = why + [SIMILARITY_REASON.format(float(sims[i]))]
+        out.append(_ranked_row(jobs[i], scores[i], why))
+    return out
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from .db import (
+    get_conn,
+    execute,
+    is_postgres,
+    run_write,
+    _get_activity_retention_days,
+    _record_churn,
+)
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
+
+
+def _uid_clause(uid: str | None) -> tuple[str, tuple]:
+    if uid is None:
+        return "uid IS NULL", ()
+    return "uid = ?", (uid,)
+
+
+def _since_clause(days: int | None) -> tuple[str, tuple]:
+    if not days:
+        return "", ()
+    if is_postgres():
+        return " AND created_at >= NOW() - (? * INTERVAL '1 day')", (int(days),)
+    return " AND created_at >= datetime('now', ?)", (f"-{int(days)} days",)
+
+
+def _lookup_urls(conn, table: str, uid: str | None, job_urls: Iterable[str], extra_sql: str = "", extra_params: tuple = ()) -> set[str]:
+    urls = [u for u in dict.fromkeys(job_urls) if u]
+    found: set[str] = set()
+    if not urls:
+        return found
+    uid_sql, uid_params = _uid_clause(uid)
+    for i in range(0, len(urls), _IN_CHUNK):
+        chunk = urls[i : i + _IN_CHUNK]
+        marks = ", ".join(["?"] * len(chunk))
+        rows = execute(
+            conn,
+            f"SELECT DISTINCT job_url FROM {table} WHERE {uid_sql} AND job_url IN ({marks}){extra_sql}",
+            (*uid_params, *chunk, *extra_params),
+        ).fetchall()
+        found.update(r["job_url"] for r in rows)
+    return found
+
+
+def already_alerted(uid: str | None, job_urls: Iterable[str], within_days: int | None = None, conn=None) -> set[str]:
+    """Return the subset of job_urls already alerted to uid (optionally only in the last N days)."""
+    owns_conn = conn is None
+    if owns_conn:
+        conn = get_conn()
+    try:
+        since_sql, since_params = _since_clause(within_days)
+        return _lookup_urls(conn, "alerts", uid, job_urls, since_sql, since_params)
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def already_acted(uid: str | None, job_urls: Iterable[str], action: str | None = None, conn=None) -> set[str]:
+    """Return the subset of job_urls uid has acted on (optionally a specific action)."""
+    owns_conn = conn is None
+    if owns_conn:
+        conn = get_conn()
+    try:
+        extra_sql, extra_params = ("", ())
+        if action:
+            extra_sql, extra_params = " AND action = ?", (action,)
+        return _lookup_urls(conn, "actions", uid, job_urls, extra_sql, extra_params)
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def _record_alerts(conn, uid: str | None, jobs: list[dict]) -> int:
+    n = 0
+    for j in jobs:
+        url = j.get("url")
+        if not url:
+            continue
+        execute(
+            conn,
+            "INSERT INTO alerts (uid, job_url, score) VALUES (?, ?, ?)",
+            (uid, url, j.get("_score")),
+        )
+        n += 1
+    return n
+
+
+def _record_action(conn, uid: str | None, job_url: str, action: str, details: str | None) -> int:
+    execute(
+        conn,
+        "INSERT INTO actions (uid, job_url, action, details) VALUES (?, ?, ?, ?)",
+        (uid, job_url, action, details),
+    )
+    return 1
+
+
+def record_alerts(uid: str | None, jobs: list[dict], conn=None) -> int:
+    """Log that these jobs were alerted to uid. Returns rows written."""
+    return run_write(conn, _record_alerts, uid, list(jobs))
+
+
+def record_action(uid: str | None, job_url: str, action: str, details: str | None = None, conn=None) -> int:
+    return run_write(conn, _record_action, uid, job_url, action, details)
+
+
+def _prune_activity(conn, retention_days: int) -> dict:
+    if is_postgres():
+        cutoff_sql = "NOW() - (%s * INTERVAL '1 day')"
+        params = (retention_days,)
+        # One transaction so NOW() is the same cutoff for rollup and delete.
+        with conn.transaction():
+            conn.execute(
+                f"""
+                INSERT INTO alerts_daily (day, uid, count, score_sum)
+                SELECT created_at::date, COALESCE(uid, ''), COUNT(*), COALESCE(SUM(score), 0)
+                  FROM alerts
+                 WHERE created_at < {cutoff_sql}
+                 GROUP BY 1, 2
+                ON CONFLICT (day, uid) DO UPDATE SET
+                  count = alerts_daily.count + EXCLUDED.count,
+                  score_sum = alerts_daily.score_sum + EXCLUDED.score_sum
+                """,
+                params,
+            )
+            conn.execute(
+                f"""
+                INSERT INTO actions_daily (day, uid, action, count)
+                SELECT created_at::date, COALESCE(uid, ''), COALESCE(action, ''), COUNT(*)
+                  FROM actions
+                 WHERE created_at < {cutoff_sql}
+                 GROUP BY 1, 2, 3
+                ON CONFLICT (day, uid, action) DO UPDATE SET
+                  count = actions_daily.count + EXCLUDED.count
+                """,
+                params,
+            )
+            cur = conn.execute(f"DELETE FROM alerts WHERE created_at < {cutoff_sql}", params)
+            alerts_pruned = max(cur.rowcount or 0, 0)
+            cur = conn.execute(f"DELETE FROM actions WHERE created_at < {cutoff_sql}", params)
+            actions_pruned = max(cur.rowcount or 0, 0)
+    else:
+        cutoff = conn.execute("SELECT datetime('now', ?)", (f"-{retention_days} days",)).fetchone()[0]
+        conn.execute(
+            """
+            INSERT INTO alerts_daily (day, uid, count, score_sum)
+            SELECT date(created_at), COALESCE(uid, ''), COUNT(*), COALESCE(SUM(score), 0)
+              FROM alerts
+             WHERE created_at < ?
+             GROUP BY 1, 2
+            ON CONFLICT (day, uid) DO UPDATE SET
+              count = alerts_daily.count + excluded.count,
+              score_sum = alerts_daily.score_sum + excluded.score_sum
+            """,
+            (cutoff,),
+        )
+        conn.execute(
+            """
+            INSERT INTO actions_daily (day, uid, action, count)
+            SELECT date(created_at), COALESCE(uid, ''), COALESCE(action, ''), COUNT(*)
+              FROM actions
+             WHERE created_at < ?
+             GROUP BY 1, 2, 3
+            ON CONFLICT (day, uid, action) DO UPDATE SET
+              count = actions_daily.count + excluded.count
+            """,
+            (cutoff,),
+        )
+        alerts_pruned = conn.execute("DELETE FROM alerts WHERE created_at < ?", (cutoff,)).rowcount
+        actions_pruned = conn.execute("DELETE FROM actions WHERE created_at < ?", (cutoff,)).rowcount
+    _record_churn(conn, "alerts", alerts_pruned)
+    _record_churn(conn, "actions", actions_pruned)
+    return {"alerts_pruned": alerts_pruned, "actions_pruned": actions_pruned}
+
+
+def prune_activity(retention_days: int | None = None, conn=None) -> dict:
+    """
+    Roll alerts/actions older than the retention window (JOB_ACTIVITY_RETENTION_DAYS,
+    default 90) up into alerts_daily/actions_daily, then delete them.
+    """
+    days = retention_days if retention_days is not None else _get_activity_retention_days()
+    return run_write(conn, _prune_activity, max(int(days), 0))
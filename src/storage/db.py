@@ -1,4 +1,5 @@
-import os, sqlite3, json
+import os, sqlite3, json, hashlib, logging, queue, threading, time, atexit, contextlib
+from concurrent.futures import Future
 from pathlib import Path
 
 from src.utils.url_norm import url_hash as compute_url_hash
@@ -12,6 +13,8 @@ except Exception:
     dict_row = None
     ConnectionPool = None
 
+logger = logging.getLogger(__name__)
+
 DB_PATH = os.environ.get("JOB_BUTLER_DB", str(Path(__file__).resolve().parents[2] / "job_butler.sqlite3"))
 _PG_POOL = None
 
@@ -57,6 +60,7 @@ def close_pg_pool() -> None:
         _PG_POOL = None
 
 SQLITE_SCHEMA = """
+PRAGMA auto_vacuum=INCREMENTAL;
 PRAGMA journal_mode=WAL;
 CREATE TABLE IF NOT EXISTS jobs (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -73,6 +77,7 @@ CREATE TABLE IF NOT EXISTS jobs (
   tags TEXT,
   visa TEXT,
   score REAL,
+  content_hash TEXT,
   created_at TEXT DEFAULT (datetime('now')),
   first_seen_at TEXT,
   last_seen_at TEXT DEFAULT (datetime('now')),
@@ -85,6 +90,7 @@ CREATE INDEX IF NOT EXISTS idx_jobs_posted_at ON jobs(posted_at);
 
 CREATE TABLE IF NOT EXISTS actions (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
+  uid TEXT,
   job_url TEXT,
   action TEXT,
   details TEXT,
@@ -93,6 +99,7 @@ CREATE TABLE IF NOT EXISTS actions (
 
 CREATE TABLE IF NOT EXISTS alerts (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
+  uid TEXT,
   job_url TEXT,
   score REAL,
   created_at TEXT DEFAULT (datetime('now'))
@@ -115,6 +122,7 @@ CREATE TABLE IF NOT EXISTS jobs (
   tags TEXT,
   visa TEXT,
   score REAL,
+  content_hash TEXT,
   created_at TIMESTAMP DEFAULT NOW(),
   first_seen_at TIMESTAMPTZ,
   last_seen_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
@@ -127,6 +135,7 @@ CREATE INDEX IF NOT EXISTS idx_jobs_posted_at ON jobs(posted_at);
 
 CREATE TABLE IF NOT EXISTS actions (
   id SERIAL PRIMARY KEY,
+  uid TEXT,
   job_url TEXT,
   action TEXT,
   details TEXT,
@@ -135,6 +144,7 @@ CREATE TABLE IF NOT EXISTS actions (
 
 CREATE TABLE IF NOT EXISTS alerts (
   id SERIAL PRIMARY KEY,
+  uid TEXT,
   job_url TEXT,
   score REAL,
   created_at TIMESTAMP DEFAULT NOW()
@@ -208,6 +218,7 @@ JOB_COLUMNS = [
     "tags",
     "visa",
     "score",
+    "content_hash",
     "created_at",
     "first_seen_at",
     "last_seen_at",
@@ -215,6 +226,38 @@ JOB_COLUMNS = [
     "archived_at",
 ]
 
+# Projection for job listings that do not need the JD text (no scoring).
+JOB_LIST_COLUMNS = [
+    "id",
+    "source",
+    "company",
+    "title",
+    "location",
+    "url",
+    "posted_at",
+    "created_at",
+    "is_active",
+]
+
+def _get_sqlite_busy_timeout() -> float:
+    try:
+        return int(os.getenv("JOB_BUTLER_SQLITE_BUSY_MS", "30000")) / 1000.0
+    except ValueError:
+        return 30.0
+
+def _get_sqlite_write_window() -> float:
+    try:
+        # The writer waits this long after a write for others to share its commit.
+        return int(os.getenv("JOB_BUTLER_SQLITE_WRITE_WINDOW_MS", "5")) / 1000.0
+    except ValueError:
+        return 0.005
+
+def _get_activity_retention_days() -> int:
+    try:
+        return int(os.getenv("JOB_ACTIVITY_RETENTION_DAYS", "90"))
+    except ValueError:
+        return 90
+
 def _get_job_stale_days() -> int:
     try:
         return int(os.getenv("JOB_STALE_DAYS", "14"))
@@ -246,6 +289,8 @@ def _ensure_sqlite_job_columns(conn) -> None:
         updates.append("ALTER TABLE jobs ADD COLUMN is_active INTEGER DEFAULT 1")
     if "archived_at" not in cols:
         updates.append("ALTER TABLE jobs ADD COLUMN archived_at TEXT")
+    if "content_hash" not in cols:
+        updates.append("ALTER TABLE jobs ADD COLUMN content_hash TEXT")
     for stmt in updates:
         conn.execute(stmt)
 
@@ -268,6 +313,7 @@ def _ensure_jobs_archive(conn) -> None:
               tags TEXT,
               visa TEXT,
               score REAL,
+              content_hash TEXT,
               created_at TIMESTAMP,
               first_seen_at TIMESTAMPTZ,
               last_seen_at TIMESTAMPTZ,
@@ -280,6 +326,7 @@ def _ensure_jobs_archive(conn) -> None:
             "CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_archive_url ON jobs_archive(url)"
         )
         conn.execute("ALTER TABLE jobs_archive ADD COLUMN IF NOT EXISTS url_hash TEXT")
+        conn.execute("ALTER TABLE jobs_archive ADD COLUMN IF NOT EXISTS content_hash TEXT")
     else:
         conn.execute(
             """
@@ -298,6 +345,7 @@ def _ensure_jobs_archive(conn) -> None:
               tags TEXT,
               visa TEXT,
               score REAL,
+              content_hash TEXT,
               created_at TEXT,
               first_seen_at TEXT,
               last_seen_at TEXT,
@@ -312,6 +360,8 @@ def _ensure_jobs_archive(conn) -> None:
         cols = {row[1] for row in conn.execute("PRAGMA table_info(jobs_archive)").fetchall()}
         if "url_hash" not in cols:
             conn.execute("ALTER TABLE jobs_archive ADD COLUMN url_hash TEXT")
+        if "content_hash" not in cols:
+            conn.execute("ALTER TABLE jobs_archive ADD COLUMN content_hash TEXT")
 
 def _backfill_url_hash(conn) -> int:
     rows = execute(
@@ -337,6 +387,26 @@ def _backfill_url_hash(conn) -> int:
         updated += 1
     return updated
 
+def _backfill_content_hash(conn, batch: int = 500) -> int:
+    # Rows from before the content_hash column never match job_features or
+    # job_scores on it, so they would be rescanned on every request.
+    cols = ", ".join(["id"] + CONTENT_HASH_FIELDS)
+    updated = 0
+    while True:
+        rows = execute(
+            conn,
+            f"SELECT {cols} FROM jobs WHERE content_hash IS NULL ORDER BY id LIMIT {int(batch)}",
+        ).fetchall()
+        if not rows:
+            return updated
+        for row in rows:
+            execute(
+                conn,
+                "UPDATE jobs SET content_hash = ? WHERE id = ?",
+                (compute_content_hash(dict(row)), row["id"]),
+            )
+        updated += len(rows)
+
 def _ensure_job_indexes(conn) -> None:
     if is_postgres():
         conn.execute("ALTER TABLE jobs DROP CONSTRAINT IF EXISTS jobs_url_key")
@@ -354,6 +424,384 @@ def _ensure_job_indexes(conn) -> None:
              WHERE external_id IS NULL AND url_hash IS NOT NULL
             """
         )
+        # PG_POSTED_ORDER_KEY as a function so it can be indexed. It is
+        # declared IMMUTABLE although a posted_at without a UTC offset is read
+        # in the session TimeZone, which the server never changes. Unparseable
+        # dates sort by created_at rather than failing the write.
+        conn.execute(
+            """
+            CREATE OR REPLACE FUNCTION job_posted_order(posted_at TEXT, created_at TIMESTAMPTZ)
+            RETURNS TIMESTAMPTZ AS $$
+            BEGIN
+              IF posted_at IS NULL OR posted_at = '' OR posted_at !~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}' THEN
+                RETURN created_at;
+              END IF;
+              RETURN posted_at::timestamptz;
+            EXCEPTION WHEN data_exception THEN
+              RETURN created_at;
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE
+            """
+        )
+        # Read paths only look at the active set. Keyed on jobs_order_sql()'s
+        # terms (PG_POSTED_ORDER_KEY, unqualified) so listings are read in
+        # index order; index-only scans cover the listing projection without
+        # touching jd_text.
+        row = conn.execute("SELECT indexdef FROM pg_indexes WHERE indexname = 'idx_jobs_active_listing'").fetchone()
+        if row is not None and "job_posted_order" not in row["indexdef"]:
+            conn.execute("DROP INDEX idx_jobs_active_listing")  # keyed on created_at before
+        conn.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_jobs_active_listing
+              ON jobs (job_posted_order(posted_at, created_at) DESC, created_at DESC, id)
+              INCLUDE ({", ".join(c for c in JOB_LIST_COLUMNS if c not in ("id", "created_at"))})
+             WHERE is_active
+            """
+        )
+    else:
+        # Leading key matches the ORDER BY in jobs_query_sql; the trailing
+        # columns make it covering for the listing projection.
+        conn.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_jobs_active_listing
+              ON jobs (COALESCE(posted_at, created_at) DESC, {", ".join(JOB_LIST_COLUMNS)})
+             WHERE is_active = 1
+            """
+        )
+
+def _ensure_activity_tables(conn) -> None:
+    # actions/alerts grow per user and per click; the lookups are always
+    # "(uid, job_url) seen?" and the retention job scans by created_at.
+    # Rows past retention are rolled up into *_daily before being pruned.
+    if is_postgres():
+        conn.execute("ALTER TABLE actions ADD COLUMN IF NOT EXISTS uid TEXT")
+        conn.execute("ALTER TABLE alerts ADD COLUMN IF NOT EXISTS uid TEXT")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS actions_daily (
+              day DATE NOT NULL,
+              uid TEXT NOT NULL DEFAULT '',
+              action TEXT NOT NULL DEFAULT '',
+              count INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (day, uid, action)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alerts_daily (
+              day DATE NOT NULL,
+              uid TEXT NOT NULL DEFAULT '',
+              count INTEGER NOT NULL DEFAULT 0,
+              score_sum REAL NOT NULL DEFAULT 0,
+              PRIMARY KEY (day, uid)
+            )
+            """
+        )
+    else:
+        for table in ("actions", "alerts"):
+            cols = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+            if "uid" not in cols:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN uid TEXT")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS actions_daily (
+              day TEXT NOT NULL,
+              uid TEXT NOT NULL DEFAULT '',
+              action TEXT NOT NULL DEFAULT '',
+              count INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (day, uid, action)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alerts_daily (
+              day TEXT NOT NULL,
+              uid TEXT NOT NULL DEFAULT '',
+              count INTEGER NOT NULL DEFAULT 0,
+              score_sum REAL NOT NULL DEFAULT 0,
+              PRIMARY KEY (day, uid)
+            )
+            """
+        )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_alerts_uid_job_url ON alerts(uid, job_url, created_at)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts(created_at)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_actions_uid_job_url ON actions(uid, job_url, action)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_actions_created_at ON actions(created_at)")
+
+def _ensure_maintenance_state(conn) -> None:
+    if is_postgres():
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS db_maintenance_state (
+              table_name TEXT PRIMARY KEY,
+              churn BIGINT NOT NULL DEFAULT 0,
+              last_vacuum_at TIMESTAMPTZ,
+              updated_at TIMESTAMPTZ DEFAULT NOW()
+            )
+            """
+        )
+    else:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS db_maintenance_state (
+              table_name TEXT PRIMARY KEY,
+              churn INTEGER NOT NULL DEFAULT 0,
+              last_vacuum_at TEXT,
+              updated_at TEXT DEFAULT (datetime('now'))
+            )
+            """
+        )
+
+def _ensure_feature_tables(conn) -> None:
+    # feature_vocab is append-only: a term keeps its bit for life, so bitsets
+    # computed against an older (smaller) vocabulary stay valid.
+    if is_postgres():
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS feature_vocab (
+              term TEXT PRIMARY KEY,
+              bit INTEGER NOT NULL UNIQUE,
+              created_at TIMESTAMPTZ DEFAULT NOW()
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_features (
+              job_id BIGINT PRIMARY KEY,
+              content_hash TEXT,
+              vocab_size INTEGER NOT NULL DEFAULT 0,
+              title_bits TEXT NOT NULL DEFAULT '0',
+              text_bits TEXT NOT NULL DEFAULT '0',
+              tokens TEXT,
+              updated_at TIMESTAMPTZ DEFAULT NOW()
+            )
+            """
+        )
+    else:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS feature_vocab (
+              term TEXT PRIMARY KEY,
+              bit INTEGER NOT NULL UNIQUE,
+              created_at TEXT DEFAULT (datetime('now'))
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_features (
+              job_id INTEGER PRIMARY KEY,
+              content_hash TEXT,
+              vocab_size INTEGER NOT NULL DEFAULT 0,
+              title_bits TEXT NOT NULL DEFAULT '0',
+              text_bits TEXT NOT NULL DEFAULT '0',
+              tokens TEXT,
+              updated_at TEXT DEFAULT (datetime('now'))
+            )
+            """
+        )
+    # In-memory job indexes catch up from job_features by updated_at.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_features_updated_at ON job_features(updated_at)")
+
+def _ensure_score_cache(conn) -> None:
+    # Static (time-independent) score components per (persona, job). Rows are
+    # only used while content_hash matches the job's current content_hash.
+    if is_postgres():
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_scores (
+              persona_hash TEXT NOT NULL,
+              job_id BIGINT NOT NULL,
+              content_hash TEXT,
+              role_hit INTEGER NOT NULL,
+              keyword DOUBLE PRECISION NOT NULL,
+              seed DOUBLE PRECISION NOT NULL,
+              why TEXT,
+              updated_at TIMESTAMPTZ DEFAULT NOW(),
+              PRIMARY KEY (persona_hash, job_id)
+            )
+            """
+        )
+    else:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_scores (
+              persona_hash TEXT NOT NULL,
+              job_id INTEGER NOT NULL,
+              content_hash TEXT,
+              role_hit INTEGER NOT NULL,
+              keyword REAL NOT NULL,
+              seed REAL NOT NULL,
+              why TEXT,
+              updated_at TEXT DEFAULT (datetime('now')),
+              PRIMARY KEY (persona_hash, job_id)
+            )
+            """
+        )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_scores_job_id ON job_scores(job_id)")
+
+def _ensure_persona_feeds(conn) -> None:
+    # Per-persona ranked feeds: static score parts per job, ordered two ways.
+    # decay_key = static + 0.3 * posted_epoch / 30d orders fresh jobs by their
+    # decayed score at any read time; floor (the rounded score with recency 0)
+    # orders the rest.
+    if is_postgres():
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS persona_feeds (
+              persona_key TEXT NOT NULL,
+              job_id BIGINT NOT NULL,
+              content_hash TEXT,
+              role_hit INTEGER NOT NULL,
+              keyword DOUBLE PRECISION NOT NULL,
+              seed DOUBLE PRECISION NOT NULL,
+              floor DOUBLE PRECISION NOT NULL,
+              decay_key DOUBLE PRECISION,
+              posted_epoch DOUBLE PRECISION,
+              why TEXT,
+              updated_at TIMESTAMPTZ DEFAULT NOW(),
+              PRIMARY KEY (persona_key, job_id)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS persona_feed_state (
+              persona_key TEXT PRIMARY KEY,
+              watermark TEXT,
+              built_at TIMESTAMPTZ DEFAULT NOW(),
+              synced_at TIMESTAMPTZ DEFAULT NOW()
+            )
+            """
+        )
+    else:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS persona_feeds (
+              persona_key TEXT NOT NULL,
+              job_id INTEGER NOT NULL,
+              content_hash TEXT,
+              role_hit INTEGER NOT NULL,
+              keyword REAL NOT NULL,
+              seed REAL NOT NULL,
+              floor REAL NOT NULL,
+              decay_key REAL,
+              posted_epoch REAL,
+              why TEXT,
+              updated_at TEXT DEFAULT (datetime('now')),
+              PRIMARY KEY (persona_key, job_id)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS persona_feed_state (
+              persona_key TEXT PRIMARY KEY,
+              watermark TEXT,
+              built_at TEXT DEFAULT (datetime('now')),
+              synced_at TEXT DEFAULT (datetime('now'))
+            )
+            """
+        )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_persona_feeds_decay ON persona_feeds(persona_key, decay_key, job_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_persona_feeds_floor ON persona_feeds(persona_key, floor, job_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_persona_feeds_job_id ON persona_feeds(job_id)")
+
+def ensure_seeds_revision(conn) -> None:
+    """
+    Single-row revision counter for the seeds table, bumped by triggers on any
+    insert/update/delete, so seed caches can check for changes cheaply.
+    Requires the seeds table to exist.
+    """
+    if is_postgres():
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seeds_revision (
+              id INTEGER PRIMARY KEY CHECK (id = 1),
+              revision BIGINT NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute("INSERT INTO seeds_revision (id, revision) VALUES (1, 0) ON CONFLICT (id) DO NOTHING")
+        conn.execute(
+            """
+            CREATE OR REPLACE FUNCTION bump_seeds_revision() RETURNS trigger AS $$
+            BEGIN
+              UPDATE seeds_revision SET revision = revision + 1 WHERE id = 1;
+              RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        conn.execute("DROP TRIGGER IF EXISTS seeds_revision_bump ON seeds")
+        conn.execute(
+            """
+            CREATE TRIGGER seeds_revision_bump
+              AFTER INSERT OR UPDATE OR DELETE ON seeds
+              FOR EACH STATEMENT EXECUTE FUNCTION bump_seeds_revision()
+            """
+        )
+    else:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seeds_revision (
+              id INTEGER PRIMARY KEY CHECK (id = 1),
+              revision INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute("INSERT OR IGNORE INTO seeds_revision (id, revision) VALUES (1, 0)")
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS seeds_revision_{op.lower()}
+                  AFTER {op} ON seeds
+                BEGIN
+                  UPDATE seeds_revision SET revision = revision + 1 WHERE id = 1;
+                END
+                """
+            )
+
+def _prune_orphan_features(conn) -> int:
+    cur = conn.execute("DELETE FROM job_features WHERE job_id NOT IN (SELECT id FROM jobs)")
+    conn.execute("DELETE FROM job_scores WHERE job_id NOT IN (SELECT id FROM jobs)")
+    conn.execute("DELETE FROM persona_feeds WHERE job_id NOT IN (SELECT id FROM jobs)")
+    return max(cur.rowcount or 0, 0)
+
+def _invalidate_job_scores(conn, urls: list[str]) -> None:
+    for i in range(0, len(urls), 500):
+        chunk = urls[i : i + 500]
+        marks = ", ".join(["?"] * len(chunk))
+        execute(
+            conn,
+            f"DELETE FROM job_scores WHERE job_id IN (SELECT id FROM jobs WHERE url IN ({marks}))",
+            tuple(chunk),
+        )
+
+def _record_churn(conn, table: str, rows: int) -> None:
+    """Count deleted/rewritten rows per table so maintenance can run on churn."""
+    if not rows or rows <= 0:
+        return
+    _ensure_maintenance_state(conn)
+    ts = "NOW()" if is_postgres() else "datetime('now')"
+    execute(
+        conn,
+        f"""
+        INSERT INTO db_maintenance_state (table_name, churn, updated_at)
+        VALUES (?, ?, {ts})
+        ON CONFLICT (table_name) DO UPDATE SET
+          churn = db_maintenance_state.churn + EXCLUDED.churn,
+          updated_at = {ts}
+        """,
+        (table, int(rows)),
+    )
 
 def _ensure_harvest_packs(conn) -> None:
     if is_postgres():
@@ -383,6 +831,8 @@ def _ensure_harvest_packs(conn) -> None:
               status TEXT,
               inserted_count INTEGER,
               updated_count INTEGER,
+              unchanged_count INTEGER,
+              failed_count INTEGER,
               inactive_marked_count INTEGER,
               archived_count INTEGER,
               error_text TEXT
@@ -392,6 +842,12 @@ def _ensure_harvest_packs(conn) -> None:
         conn.execute(
             "ALTER TABLE harvest_packs ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ"
         )
+        conn.execute(
+            "ALTER TABLE harvest_pack_runs ADD COLUMN IF NOT EXISTS unchanged_count INTEGER"
+        )
+        conn.execute(
+            "ALTER TABLE harvest_pack_runs ADD COLUMN IF NOT EXISTS failed_count INTEGER"
+        )
         existing = conn.execute(
             "SELECT 1 FROM harvest_packs WHERE slug IN ('tech_core', 'tech-core')"
         ).fetchone()
@@ -437,6 +893,8 @@ def _ensure_harvest_packs(conn) -> None:
               status TEXT,
               inserted_count INTEGER,
               updated_count INTEGER,
+              unchanged_count INTEGER,
+              failed_count INTEGER,
               inactive_marked_count INTEGER,
               archived_count INTEGER,
               error_text TEXT
@@ -446,6 +904,11 @@ def _ensure_harvest_packs(conn) -> None:
         cols = {row[1] for row in conn.execute("PRAGMA table_info(harvest_packs)").fetchall()}
         if "deleted_at" not in cols:
             conn.execute("ALTER TABLE harvest_packs ADD COLUMN deleted_at TEXT")
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(harvest_pack_runs)").fetchall()}
+        if "unchanged_count" not in cols:
+            conn.execute("ALTER TABLE harvest_pack_runs ADD COLUMN unchanged_count INTEGER")
+        if "failed_count" not in cols:
+            conn.execute("ALTER TABLE harvest_pack_runs ADD COLUMN failed_count INTEGER")
         existing = conn.execute(
             "SELECT 1 FROM harvest_packs WHERE slug IN (?, ?)",
             ("tech_core", "tech-core"),
@@ -524,7 +987,7 @@ def get_conn():
         conn = psycopg.connect(url, row_factory=dict_row)
         conn.autocommit = True
         return conn
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=_get_sqlite_busy_timeout())
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -538,6 +1001,192 @@ def execute(conn, sql, params=None):
         sql = sql.replace("?", "%s")
     return conn.execute(sql, params)
 
+# --- SQLite single writer -----------------------------------------------------
+# SQLite allows one writer at a time. Instead of every request thread opening
+# its own connection and committing (and racing for the lock), write operations
+# are queued to one thread that owns the write connection and commits whatever
+# arrived within a short window as a single transaction.
+
+class SQLiteWriter:
+    def __init__(self, path: str, window: float, max_batch: int = 256):
+        self.path = path
+        self.window = window
+        self.max_batch = max_batch
+        self.pid = os.getpid()
+        self._queue: queue.Queue = queue.Queue()
+        # Set when the writer thread stops on an error it cannot recover
+        # from; queued and later submissions fail with it.
+        self._error: BaseException | None = None
+        self._state_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._error is None and self._thread.is_alive()
+
+    def submit(self, fn, *args) -> Future:
+        """Queue fn(conn, *args) on the writer; the future resolves after commit."""
+        fut: Future = Future()
+        with self._state_lock:
+            if self._error is not None:
+                fut.set_exception(self._error)
+            else:
+                self._queue.put((fn, args, fut))
+        return fut
+
+    def call(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=_get_sqlite_busy_timeout(), isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _collect(self, first) -> tuple[list, bool]:
+        # Group what arrives within the window after the first operation,
+        # bounded by max_batch, into one transaction and one commit.
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_batch(self, conn, batch: list) -> None:
+        done = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as exc:
+            for _, _, fut in batch:
+                fut.set_exception(exc)
+            return
+        for i, (fn, args, fut) in enumerate(batch):
+            # A savepoint per operation keeps one failing op from rolling
+            # back the rest of the group.
+            sp = f"op{i}"
+            conn.execute(f"SAVEPOINT {sp}")
+            try:
+                result = fn(conn, *args)
+            except Exception as exc:
+                conn.execute(f"ROLLBACK TO {sp}")
+                conn.execute(f"RELEASE {sp}")
+                fut.set_exception(exc)
+                continue
+            conn.execute(f"RELEASE {sp}")
+            done.append((fut, result))
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as exc:
+            with contextlib.suppress(Exception):
+                conn.execute("ROLLBACK")
+            for fut, _ in done:
+                fut.set_exception(exc)
+            return
+        for fut, result in done:
+            fut.set_result(result)
+
+    def _fail(self, exc: BaseException) -> None:
+        # Nothing can be queued after _error is set, so draining here leaves
+        # no caller blocked on a future.
+        with self._state_lock:
+            self._error = exc
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[2].set_exception(exc)
+
+    def _run(self) -> None:
+        conn = None
+        try:
+            conn = self._connect()
+            stop = False
+            while not stop:
+                first = self._queue.get()
+                if first is None:
+                    break
+                batch, stop = self._collect(first)
+                try:
+                    self._write_batch(conn, batch)
+                except Exception as exc:
+                    # The savepoint/transaction bookkeeping itself failed, so
+                    # the connection's state is unknown: fail what is left of
+                    # the batch and continue on a fresh connection.
+                    for _, _, fut in batch:
+                        if not fut.done():
+                            fut.set_exception(exc)
+                    with contextlib.suppress(Exception):
+                        conn.close()
+                    conn = None
+                    conn = self._connect()
+        except BaseException as exc:
+            self._fail(exc)
+        finally:
+            if conn is not None:
+                conn.close()
+
+_SQLITE_WRITER: SQLiteWriter | None = None
+_SQLITE_WRITER_LOCK = threading.Lock()
+
+def _use_sqlite_writer() -> bool:
+    if is_postgres():
+        return False
+    return os.getenv("JOB_BUTLER_SQLITE_WRITER", "1").strip().lower() not in ("0", "false", "no")
+
+def get_sqlite_writer() -> SQLiteWriter:
+    global _SQLITE_WRITER
+    with _SQLITE_WRITER_LOCK:
+        # Threads do not survive fork; a child process gets its own writer.
+        # A writer that stopped on an error is replaced on the next call.
+        if _SQLITE_WRITER is None or _SQLITE_WRITER.pid != os.getpid() or not _SQLITE_WRITER.alive:
+            _SQLITE_WRITER = SQLiteWriter(DB_PATH, _get_sqlite_write_window())
+        elif _SQLITE_WRITER.path != DB_PATH:
+            _SQLITE_WRITER.close()
+            _SQLITE_WRITER = SQLiteWriter(DB_PATH, _get_sqlite_write_window())
+        return _SQLITE_WRITER
+
+def close_sqlite_writer() -> None:
+    global _SQLITE_WRITER
+    with _SQLITE_WRITER_LOCK:
+        if _SQLITE_WRITER is not None and _SQLITE_WRITER.pid == os.getpid():
+            _SQLITE_WRITER.close()
+        _SQLITE_WRITER = None
+
+atexit.register(close_sqlite_writer)
+
+def run_write(conn, fn, *args):
+    """
+    Run fn(conn, *args) as a write: on the SQLite writer thread when no conn
+    is given, otherwise on conn (committing on SQLite), or on a fresh connection.
+    """
+    if conn is None and _use_sqlite_writer():
+        return get_sqlite_writer().call(fn, *args)
+    owns_conn = conn is None
+    if owns_conn:
+        conn = get_conn()
+    try:
+        result = fn(conn, *args)
+        if not is_postgres():
+            conn.commit()
+        return result
+    finally:
+        if owns_conn:
+            conn.close()
+
 def init_db():
     conn = get_conn()
     try:
@@ -553,6 +1202,7 @@ def init_db():
             conn.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS is_active BOOLEAN")
             conn.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ")
             conn.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS url_hash TEXT")
+            conn.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS content_hash TEXT")
             conn.execute(
                 """
                 UPDATE jobs
@@ -566,7 +1216,13 @@ def init_db():
             conn.execute("ALTER TABLE jobs ALTER COLUMN last_seen_at SET NOT NULL")
             _ensure_jobs_archive(conn)
             dedupe_jobs(conn)
+            _backfill_content_hash(conn)
             _ensure_job_indexes(conn)
+            _ensure_activity_tables(conn)
+            _ensure_maintenance_state(conn)
+            _ensure_feature_tables(conn)
+            _ensure_score_cache(conn)
+            _ensure_persona_feeds(conn)
             ensure_harvest_packs(conn)
         else:
             _ensure_sqlite_job_columns(conn)
@@ -581,13 +1237,37 @@ def init_db():
             conn.execute("UPDATE jobs SET external_id = NULL WHERE external_id = ''")
             _ensure_jobs_archive(conn)
             _backfill_url_hash(conn)
+            _backfill_content_hash(conn)
             _ensure_job_indexes(conn)
+            _ensure_activity_tables(conn)
+            _ensure_maintenance_state(conn)
+            _ensure_feature_tables(conn)
+            _ensure_score_cache(conn)
+            _ensure_persona_feeds(conn)
             ensure_harvest_packs(conn)
         if not is_postgres():
             conn.commit()
     finally:
         conn.close()
 
+CONTENT_HASH_FIELDS = [
+    "source",
+    "company",
+    "title",
+    "location",
+    "url",
+    "external_id",
+    "posted_at",
+    "jd_text",
+    "salary",
+    "tags",
+    "visa",
+]
+
+def compute_content_hash(row: dict) -> str:
+    payload = json.dumps([row.get(k) or "" for k in CONTENT_HASH_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 def _prepare_job_row(row: dict) -> dict:
     url = (row.get("url") or "").strip()
     row["url"] = url or None
@@ -597,42 +1277,13 @@ def _prepare_job_row(row: dict) -> dict:
         row["external_id"] = ext or None
     if not row.get("url_hash"):
         row["url_hash"] = compute_url_hash(url) if url else None
+    row["content_hash"] = compute_content_hash(row)
     return row
 
-def upsert_jobs(rows, conn=None):
-    owns_conn = False
-    if conn is None:
-        conn = get_conn()
-        owns_conn = True
-    for r in rows:
-        r = _prepare_job_row(dict(r))
-        if is_postgres():
-            if r.get("external_id"):
-                conn.execute(
-                    """INSERT INTO jobs(source,company,title,location,url,url_hash,external_id,posted_at,jd_text,salary,tags,visa,first_seen_at,last_seen_at,is_active)
-                       VALUES(%(source)s,%(company)s,%(title)s,%(location)s,%(url)s,%(url_hash)s,%(external_id)s,%(posted_at)s,%(jd_text)s,%(salary)s,%(tags)s,%(visa)s,NOW(),NOW(),TRUE)
-                       ON CONFLICT (source, external_id) WHERE external_id IS NOT NULL DO UPDATE SET
-                         company = COALESCE(NULLIF(EXCLUDED.company,''), jobs.company),
-                         location = COALESCE(NULLIF(EXCLUDED.location,''), jobs.location),
-                         title = COALESCE(NULLIF(EXCLUDED.title,''), jobs.title),
-                         salary = COALESCE(NULLIF(EXCLUDED.salary,''), jobs.salary),
-                         jd_text = COALESCE(NULLIF(EXCLUDED.jd_text,''), jobs.jd_text),
-                         posted_at = COALESCE(NULLIF(EXCLUDED.posted_at,''), jobs.posted_at),
-                         tags = COALESCE(NULLIF(EXCLUDED.tags,''), jobs.tags),
-                         visa = COALESCE(NULLIF(EXCLUDED.visa,''), jobs.visa),
-                         url = COALESCE(NULLIF(EXCLUDED.url,''), jobs.url),
-                         url_hash = COALESCE(EXCLUDED.url_hash, jobs.url_hash),
-                         last_seen_at = NOW(),
-                         is_active = TRUE,
-                         archived_at = NULL,
-                         first_seen_at = COALESCE(jobs.first_seen_at, NOW())""",
-                    r,
-                )
-            elif r.get("url_hash"):
-                conn.execute(
-                    """INSERT INTO jobs(source,company,title,location,url,url_hash,external_id,posted_at,jd_text,salary,tags,visa,first_seen_at,last_seen_at,is_active)
-                       VALUES(%(source)s,%(company)s,%(title)s,%(location)s,%(url)s,%(url_hash)s,%(external_id)s,%(posted_at)s,%(jd_text)s,%(salary)s,%(tags)s,%(visa)s,NOW(),NOW(),TRUE)
-                       ON CONFLICT (source, url_hash) WHERE external_id IS NULL AND url_hash IS NOT NULL DO UPDATE SET
+_PG_UPSERT_INSERT = """INSERT INTO jobs(source,company,title,location,url,url_hash,external_id,posted_at,jd_text,salary,tags,visa,content_hash,first_seen_at,last_seen_at,is_active)
+                       VALUES(%(source)s,%(company)s,%(title)s,%(location)s,%(url)s,%(url_hash)s,%(external_id)s,%(posted_at)s,%(jd_text)s,%(salary)s,%(tags)s,%(visa)s,%(content_hash)s,NOW(),NOW(),TRUE)"""
+
+_PG_UPSERT_SET = """DO UPDATE SET
                          company = COALESCE(NULLIF(EXCLUDED.company,''), jobs.company),
                          location = COALESCE(NULLIF(EXCLUDED.location,''), jobs.location),
                          title = COALESCE(NULLIF(EXCLUDED.title,''), jobs.title),
@@ -643,55 +1294,245 @@ def upsert_jobs(rows, conn=None):
                          visa = COALESCE(NULLIF(EXCLUDED.visa,''), jobs.visa),
                          url = COALESCE(NULLIF(EXCLUDED.url,''), jobs.url),
                          url_hash = COALESCE(EXCLUDED.url_hash, jobs.url_hash),
+                         content_hash = EXCLUDED.content_hash,
                          last_seen_at = NOW(),
                          is_active = TRUE,
                          archived_at = NULL,
-                         first_seen_at = COALESCE(jobs.first_seen_at, NOW())""",
-                    r,
-                )
+                         first_seen_at = COALESCE(jobs.first_seen_at, NOW())"""
+
+# xmax = 0 only for freshly inserted tuples. The prev CTE runs against the
+# statement snapshot, so it still sees the content_hash from before the update.
+_PG_UPSERT_RETURNING = "RETURNING (xmax = 0) AS inserted, (SELECT content_hash FROM prev) AS prev_hash"
+
+_PG_UPSERT_BY_EXTERNAL_ID = f"""WITH prev AS (
+                         SELECT content_hash FROM jobs
+                          WHERE source = %(source)s AND external_id = %(external_id)s
+                       )
+                       {_PG_UPSERT_INSERT}
+                       ON CONFLICT (source, external_id) WHERE external_id IS NOT NULL {_PG_UPSERT_SET}
+                       {_PG_UPSERT_RETURNING}"""
+
+_PG_UPSERT_BY_URL_HASH = f"""WITH prev AS (
+                         SELECT content_hash FROM jobs
+                          WHERE source = %(source)s AND external_id IS NULL AND url_hash = %(url_hash)s
+                       )
+                       {_PG_UPSERT_INSERT}
+                       ON CONFLICT (source, url_hash) WHERE external_id IS NULL AND url_hash IS NOT NULL {_PG_UPSERT_SET}
+                       {_PG_UPSERT_RETURNING}"""
+
+# Columns the upserts merge as COALESCE(NULLIF(new, ''), old): an empty
+# incoming value keeps the stored one.
+_MERGED_FIELDS = ("company", "location", "title", "salary", "jd_text", "posted_at", "tags", "visa", "url")
+# Columns the update never writes, so the stored value stays. On Postgres
+# they are the conflict key; SQLite matches on url alone, so another
+# source's listing of the same url keeps the stored source/external_id.
+_KEPT_FIELDS = ("source", "external_id")
+
+def _conflict_key(r: dict, pg: bool) -> tuple | None:
+    # The unique key an upsert of `r` matches an existing row on.
+    if not pg:
+        return ("url", r["url"]) if r.get("url") else None
+    if r.get("external_id"):
+        return ("ext", r.get("source"), r["external_id"])
+    if r.get("url_hash"):
+        return ("url_hash", r.get("source"), r["url_hash"])
+    return None
+
+def _stored_rows(conn, keys: list[tuple], pg: bool) -> dict:
+    """conflict key -> stored content columns, for the keys that have a row."""
+    cols = ", ".join(["source", "url_hash", "content_hash"] + [c for c in CONTENT_HASH_FIELDS if c not in ("source",)])
+    out: dict = {}
+    for kind in ("url", "ext", "url_hash"):
+        wanted = list(dict.fromkeys(k for k in keys if k[0] == kind))
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i : i + 500]
+            if kind == "url":
+                where, params = f"url IN ({', '.join('?' for _ in chunk)})", [k[1] for k in chunk]
+            elif kind == "ext":
+                where = " OR ".join("(source = ? AND external_id = ?)" for _ in chunk)
+                params = [v for k in chunk for v in k[1:]]
             else:
-                conn.execute(
-                    """INSERT INTO jobs(source,company,title,location,url,url_hash,external_id,posted_at,jd_text,salary,tags,visa,first_seen_at,last_seen_at,is_active)
-                       VALUES(%(source)s,%(company)s,%(title)s,%(location)s,%(url)s,%(url_hash)s,%(external_id)s,%(posted_at)s,%(jd_text)s,%(salary)s,%(tags)s,%(visa)s,NOW(),NOW(),TRUE)""",
-                    r,
-                )
-        else:
-            conn.execute(
-                """INSERT OR IGNORE INTO jobs(source,company,title,location,url,url_hash,external_id,posted_at,jd_text,salary,tags,visa,first_seen_at,last_seen_at,is_active)
-                   VALUES(:source,:company,:title,:location,:url,:url_hash,:external_id,:posted_at,:jd_text,:salary,:tags,:visa,datetime('now'),datetime('now'),1)""",
-                r,
+                where = " OR ".join("(source = ? AND external_id IS NULL AND url_hash = ?)" for _ in chunk)
+                params = [v for k in chunk for v in k[1:]]
+            for row in execute(conn, f"SELECT {cols} FROM jobs WHERE {where}", tuple(params)).fetchall():
+                row = dict(row)
+                out[_conflict_key(row, pg)] = row
+    return out
+
+def _merge_stored(r: dict, stored: dict | None) -> dict:
+    """The row's content as the upsert will leave it, with content_hash of those merged values."""
+    if stored is None:
+        return r
+    merged = dict(r)
+    for k in _MERGED_FIELDS:
+        if r.get(k) is None or r.get(k) == "":
+            merged[k] = stored.get(k)
+    for k in _KEPT_FIELDS:
+        merged[k] = stored.get(k)
+    # Only the hash changes: the SQL merges the columns itself, so a
+    # concurrent writer's values are not overwritten with ours.
+    r["content_hash"] = compute_content_hash(merged)
+    return r
+
+def _is_backend_error(exc: Exception) -> bool:
+    # Locks, I/O, constraint violations and broken connections are the
+    # database's problem, not the row's: they abort the batch.
+    if isinstance(exc, (sqlite3.OperationalError, sqlite3.IntegrityError)):
+        return True
+    return psycopg is not None and isinstance(exc, psycopg.Error)
+
+def _upsert_job_postgres(conn, r: dict) -> str:
+    if r.get("external_id"):
+        sql = _PG_UPSERT_BY_EXTERNAL_ID
+    elif r.get("url_hash"):
+        sql = _PG_UPSERT_BY_URL_HASH
+    else:
+        conn.execute(_PG_UPSERT_INSERT, r)
+        return "inserted"
+    row = conn.execute(sql, r).fetchone()
+    if not row or row["inserted"]:
+        return "inserted"
+    return "unchanged" if row["prev_hash"] == r["content_hash"] else "updated"
+
+def _upsert_job_sqlite(conn, r: dict) -> str:
+    # cursor.rowcount is sqlite3_changes() for the statement just run.
+    cur = conn.execute(
+        """INSERT OR IGNORE INTO jobs(source,company,title,location,url,url_hash,external_id,posted_at,jd_text,salary,tags,visa,content_hash,first_seen_at,last_seen_at,is_active)
+           VALUES(:source,:company,:title,:location,:url,:url_hash,:external_id,:posted_at,:jd_text,:salary,:tags,:visa,:content_hash,datetime('now'),datetime('now'),1)""",
+        r,
+    )
+    if cur.rowcount > 0:
+        return "inserted"
+    if not r.get("url"):
+        return "unchanged"
+    cur = conn.execute(
+        """UPDATE jobs
+              SET company = COALESCE(NULLIF(:company,''), company),
+                  location = COALESCE(NULLIF(:location,''), location),
+                  title = COALESCE(NULLIF(:title,''), title),
+                  salary = COALESCE(NULLIF(:salary,''), salary),
+                  jd_text = COALESCE(NULLIF(:jd_text,''), jd_text),
+                  posted_at = COALESCE(NULLIF(:posted_at,''), posted_at),
+                  tags = COALESCE(NULLIF(:tags,''), tags),
+                  visa = COALESCE(NULLIF(:visa,''), visa),
+                  url_hash = COALESCE(NULLIF(:url_hash,''), url_hash),
+                  content_hash = :content_hash,
+                  last_seen_at = datetime('now'),
+                  is_active = 1,
+                  archived_at = NULL,
+                  first_seen_at = COALESCE(first_seen_at, datetime('now'))
+            WHERE url = :url
+              AND content_hash IS NOT :content_hash""",
+        r,
+    )
+    if cur.rowcount > 0:
+        return "updated"
+    conn.execute(
+        """UPDATE jobs
+              SET last_seen_at = datetime('now'),
+                  is_active = 1,
+                  archived_at = NULL,
+                  first_seen_at = COALESCE(first_seen_at, datetime('now'))
+            WHERE url = :url""",
+        r,
+    )
+    return "unchanged"
+
+def _upsert_jobs(conn, rows) -> dict:
+    from .features import _index_job_features
+
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    pg = is_postgres()
+    changed: list[str] = []
+    prepared = [_prepare_job_row(dict(r)) for r in rows]
+    # Stored rows, so content_hash describes the merged result: a partial
+    # re-harvest (empty fields keep stored values) is then "unchanged".
+    stored = _stored_rows(conn, [k for k in (_conflict_key(r, pg) for r in prepared) if k], pg)
+    for r in prepared:
+        key = _conflict_key(r, pg)
+        r = _merge_stored(r, stored.get(key))
+        try:
+            outcome = _upsert_job_postgres(conn, r) if pg else _upsert_job_sqlite(conn, r)
+        except Exception as exc:
+            if _is_backend_error(exc):
+                raise
+            logger.warning("upsert failed for %s %s: %s", r.get("source"), r.get("url") or r.get("external_id"), exc)
+            stats["failed"] += 1
+            continue
+        stats[outcome] += 1
+        if key is not None:
+            # A later row of this batch with the same key merges with this one.
+            prev = stored.get(key)
+            merged = dict(prev or {})
+            merged.update(
+                {
+                    k: v
+                    for k, v in r.items()
+                    if v is not None and v != "" and not (prev is not None and k in _KEPT_FIELDS)
+                }
             )
-            if r.get("url"):
-                conn.execute(
-                    """UPDATE jobs
-                          SET company = COALESCE(NULLIF(:company,''), company),
-                              location = COALESCE(NULLIF(:location,''), location),
-                              title = COALESCE(NULLIF(:title,''), title),
-                              salary = COALESCE(NULLIF(:salary,''), salary),
-                              jd_text = COALESCE(NULLIF(:jd_text,''), jd_text),
-                              posted_at = COALESCE(NULLIF(:posted_at,''), posted_at),
-                              tags = COALESCE(NULLIF(:tags,''), tags),
-                              visa = COALESCE(NULLIF(:visa,''), visa),
-                              url_hash = COALESCE(NULLIF(:url_hash,''), url_hash),
-                              last_seen_at = datetime('now'),
-                              is_active = 1,
-                              archived_at = NULL,
-                              first_seen_at = COALESCE(first_seen_at, datetime('now'))
-                        WHERE url = :url""",
-                    r,
-                )
+            stored[key] = merged
+        if outcome != "unchanged" and r.get("url"):
+            changed.append(r["url"])
+    # Ingest-time token features; a failure here only means scoring falls
+    # back to scanning the text until refresh_job_features() catches up.
+    try:
+        _index_job_features(conn, changed)
+    except Exception as exc:
+        if _is_backend_error(exc):
+            raise
+        logger.warning("feature indexing failed: %s", exc)
+    if changed:
+        # Cached score components are keyed on content_hash, so stale rows are
+        # never used; dropping them here just keeps job_scores small.
+        try:
+            _invalidate_job_scores(conn, changed)
+        except Exception as exc:
+            if _is_backend_error(exc):
+                raise
+            logger.warning("score cache invalidation failed: %s", exc)
+    return stats
+
+def upsert_jobs(rows, conn=None) -> dict:
+    """
+    Insert or refresh job rows. Returns exact per-batch outcome counts:
+    {"inserted", "updated", "unchanged", "failed"}. A row is "unchanged" when
+    it matched an existing job whose content hash is identical; only its
+    last_seen_at/is_active bookkeeping is refreshed.
+
+    Without an explicit conn on SQLite, the batch runs on the shared writer
+    thread and is group-committed with other pending writes.
+    """
+    if conn is None and _use_sqlite_writer():
+        return get_sqlite_writer().call(_upsert_jobs, list(rows))
+    owns_conn = False
+    if conn is None:
+        conn = get_conn()
+        owns_conn = True
+    stats = _upsert_jobs(conn, rows)
     if not is_postgres():
         conn.commit()
     if owns_conn:
         conn.close()
+    return stats
 
 def maintain_jobs(conn=None):
-    stale_days = _get_job_stale_days()
-    archive_days = _get_job_archive_days()
+    if conn is None and _use_sqlite_writer():
+        return get_sqlite_writer().call(_maintain_jobs)
     owns_conn = False
     if conn is None:
         conn = get_conn()
         owns_conn = True
+    result = _maintain_jobs(conn)
+    if not is_postgres():
+        conn.commit()
+    if owns_conn:
+        conn.close()
+    return result
+
+def _maintain_jobs(conn) -> tuple[int, int]:
+    stale_days = _get_job_stale_days()
+    archive_days = _get_job_archive_days()
     marked_inactive = 0
     archived = 0
     _ensure_jobs_archive(conn)
@@ -717,13 +1558,14 @@ def maintain_jobs(conn=None):
             """
         )
         archived = max(cur.rowcount or 0, 0)
-        conn.execute(
+        cur = conn.execute(
             f"""
             DELETE FROM jobs
              WHERE COALESCE(is_active, TRUE) = FALSE
                AND last_seen_at < NOW() - INTERVAL '{archive_days} days'
             """
         )
+        deleted = max(cur.rowcount or 0, 0)
     else:
         cur = conn.execute(
             """
@@ -749,7 +1591,7 @@ def maintain_jobs(conn=None):
         cur = conn.execute("SELECT changes()")
         row = cur.fetchone()
         archived = row[0] if row else 0
-        conn.execute(
+        cur = conn.execute(
             """
             DELETE FROM jobs
              WHERE COALESCE(is_active, 1) = 0
@@ -757,10 +1599,14 @@ def maintain_jobs(conn=None):
             """,
             (f"-{archive_days} days",),
         )
-    if not is_postgres():
-        conn.commit()
-    if owns_conn:
-        conn.close()
+        deleted = max(cur.rowcount or 0, 0)
+    if deleted:
+        _ensure_feature_tables(conn)
+        _ensure_score_cache(conn)
+        _ensure_persona_feeds(conn)
+        _prune_orphan_features(conn)
+    # Marking inactive rewrites rows (dead tuples on Postgres); deletes free pages.
+    _record_churn(conn, "jobs", marked_inactive + deleted)
     return marked_inactive, archived
 
 def dedupe_jobs(conn=None) -> int:
@@ -806,12 +1652,76 @@ def dedupe_jobs(conn=None) -> int:
         """
     )
     deleted += max(cur.rowcount or 0, 0)
+    if deleted:
+        _ensure_feature_tables(conn)
+        _ensure_score_cache(conn)
+        _ensure_persona_feeds(conn)
+        _prune_orphan_features(conn)
+    _record_churn(conn, "jobs", deleted)
     if owns_conn:
         conn.close()
     return deleted
 
-def fetch_all_jobs():
+# Columns joined in from job_features when scoring; stripped before rows are returned.
+JOB_FEATURE_FIELDS = ("_f_vocab", "_f_title_bits", "_f_text_bits")
+
+# Postgres newest-first key for job reads. posted_at is TEXT in the Postgres
+# schema; job_posted_order() (created in _ensure_job_indexes) casts values
+# that look like an ISO date and falls back to created_at for the rest.
+# idx_jobs_active_listing is keyed on this exact expression.
+PG_POSTED_ORDER_KEY = "job_posted_order(jobs.posted_at, jobs.created_at)"
+
+def jobs_query_sql(include_inactive: bool = False, columns: list[str] | None = None, with_features: bool = False) -> str:
+    """
+    SELECT for job reads, newest first. Defaults to the active set so the
+    partial indexes apply; include_inactive also returns rows maintain_jobs
+    has marked stale but not yet archived. with_features joins the ingest-time
+    token features when they are current for the row's content_hash.
+    """
+    cols = ", ".join(f"jobs.{c}" for c in columns) if columns else "jobs.*"
+    join = ""
+    if with_features:
+        cols += ", f.vocab_size AS _f_vocab, f.title_bits AS _f_title_bits, f.text_bits AS _f_text_bits"
+        join = "LEFT JOIN job_features f ON f.job_id = jobs.id AND f.content_hash = jobs.content_hash"
+    if is_postgres():
+        where = "" if include_inactive else "WHERE jobs.is_active"
+        return f"""
+            SELECT {cols}
+              FROM jobs
+              {join}
+             {where}
+             ORDER BY {jobs_order_sql()}
+            """
+    where = "" if include_inactive else "WHERE jobs.is_active = 1"
+    return f"SELECT {cols} FROM jobs {join} {where} ORDER BY {jobs_order_sql()}"
+
+def jobs_order_sql() -> str:
+    """jobs_query_sql()'s ORDER BY terms, newest first: the order rank_jobs() breaks score ties in."""
+    if is_postgres():
+        return f"{PG_POSTED_ORDER_KEY} DESC, jobs.created_at DESC, jobs.id"
+    return "COALESCE(jobs.posted_at, jobs.created_at) DESC, jobs.id"
+
+JOB_ORDER_FIELDS = ("_order_key", "_order_created")
+
+def jobs_order_columns() -> str:
+    """
+    SELECT columns holding jobs_query_sql()'s sort key, so a subset of rows
+    read some other way can be put back in that order with jobs_order_key().
+    """
+    if is_postgres():
+        return (f"extract(epoch FROM {PG_POSTED_ORDER_KEY})::float8 AS _order_key, "
+                "extract(epoch FROM jobs.created_at)::float8 AS _order_created")
+    return "COALESCE(jobs.posted_at, jobs.created_at) AS _order_key, NULL AS _order_created"
+
+def jobs_order_key(row: dict) -> tuple:
+    """Sort key (with reverse=True) for jobs_order_columns() rows; NULLs go where each backend's DESC puts them."""
+    key, created = row.get("_order_key"), row.get("_order_created")
+    if is_postgres():
+        return (key is None, float(key or 0), created is None, float(created or 0), -int(row["id"]))
+    return (key is not None, str(key or ""), -int(row["id"]))
+
+def fetch_all_jobs(include_inactive: bool = False, columns: list[str] | None = None, with_features: bool = False):
     conn = get_conn()
-    cur = conn.execute("SELECT * FROM jobs ORDER BY COALESCE(posted_at, created_at) DESC")
+    cur = conn.execute(jobs_query_sql(include_inactive, columns, with_features))
     rows = [dict(r) for r in cur.fetchall()]
     conn.close(); return rows
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from .db import (
+    get_conn,
+    execute,
+    is_postgres,
+    run_write,
+    _ensure_feature_tables,
+)
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Persona fields whose terms are matched as substrings when scoring.
+_PERSONA_TERM_FIELDS = ("roles_target", "must_have", "nice_to_have")
+
+# Lowercased word-ish tokens; keeps "c++", "c#", "node.js", "a/b".
+_TOKEN_RE = re.compile(r"[0-9a-z][0-9a-z+#./&-]*")
+
+_IN_CHUNK = 500
+_REFRESH_BATCH = 2000
+
+_VOCAB_LOCK = threading.Lock()
+# pg_advisory_xact_lock key serializing vocabulary bit assignment.
+_VOCAB_ADVISORY_LOCK = 0x6A6F6276
+_VOCAB: dict[str, int] | None = None
+
+# Bumped whenever this process (re)indexes job features.
+_GENERATION = 0
+
+
+# --- vocabulary -------------------------------------------------------------
+
+def _persona_files() -> list[Path]:
+    files = [ROOT / "profile.json"]
+    personas = ROOT / "personas"
+    if personas.is_dir():
+        files.extend(sorted(personas.glob("*.json")))
+    return files
+
+
+def _persona_terms(profile: dict) -> set[str]:
+    terms = set()
+    for field in _PERSONA_TERM_FIELDS:
+        for t in profile.get(field) or []:
+            t = str(t).lower()
+            if t:
+                terms.add(t)
+    return terms
+
+
+def _seed_terms() -> set[str]:
+    from src.ranking.seed_boost import _parse_tokens, _read_seeds
+
+    parsed = _parse_tokens(_read_seeds())
+    return set(parsed["title"]) | set(parsed["comp"])
+
+
+def known_personas() -> list[dict]:
+    """The personas on disk: profile.json and personas/*.json (unreadable files are skipped)."""
+    out = []
+    for path in _persona_files():
+        try:
+            out.append(json.loads(path.read_text(encoding="utf-8")))
+        except Exception:
+            continue
+    return out
+
+
+def vocabulary_terms(profiles: Iterable[dict] = ()) -> set[str]:
+    """All persona role/skill terms (profile.json, personas/*.json, extras) plus seed hints."""
+    terms: set[str] = set()
+    for p in known_personas():
+        terms |= _persona_terms(p or {})
+    for p in profiles:
+        terms |= _persona_terms(p or {})
+    terms |= _seed_terms()
+    return terms
+
+
+def _load_vocabulary(conn) -> dict[str, int]:
+    rows = execute(conn, "SELECT term, bit FROM feature_vocab").fetchall()
+    return {r["term"]: int(r["bit"]) for r in rows}
+
+
+def _assign_bits(conn, terms: set[str]) -> dict[str, int]:
+    vocab = _load_vocabulary(conn)
+    # Append-only: existing bit positions never move, so stored bitsets stay valid.
+    new = sorted(t for t in terms if t not in vocab)
+    next_bit = max(vocab.values(), default=-1) + 1
+    for term in new:
+        execute(conn, "INSERT INTO feature_vocab (term, bit) VALUES (?, ?)", (term, next_bit))
+        vocab[term] = next_bit
+        next_bit += 1
+    return vocab
+
+
+def _sync_vocabulary(conn, terms: set[str]) -> dict[str, int]:
+    global _VOCAB
+    _ensure_feature_tables(conn)
+    # Reading MAX(bit) and inserting after it must be one write transaction,
+    # or two processes can hand out the same bits.
+    if is_postgres():
+        with conn.transaction():
+            execute(conn, "SELECT pg_advisory_xact_lock(?)", (_VOCAB_ADVISORY_LOCK,))
+            vocab = _assign_bits(conn, terms)
+    else:
+        if conn.in_transaction:
+            # Take the write lock before reading (the writer thread already
+            # holds it under BEGIN IMMEDIATE).
+            execute(conn, "UPDATE feature_vocab SET bit = bit WHERE 0 = 1")
+        else:
+            execute(conn, "BEGIN IMMEDIATE")
+        vocab = _assign_bits(conn, terms)
+    with _VOCAB_LOCK:
+        _VOCAB = vocab
+    return vocab
+
+
+def sync_vocabulary(profiles: Iterable[dict] = (), conn=None) -> int:
+    """
+    Add any new persona/seed terms to the global vocabulary. Returns the
+    vocabulary size; jobs indexed against a smaller vocabulary are brought
+    up to date by refresh_job_features().
+    """
+    terms = vocabulary_terms(profiles)
+    return len(run_write(conn, _sync_vocabulary, terms))
+
+
+def cached_vocabulary() -> dict[str, int]:
+    """term -> bit for the current vocabulary, loaded once per process."""
+    global _VOCAB
+    if _VOCAB is None:
+        conn = get_conn()
+        try:
+            _ensure_feature_tables(conn)
+            vocab = _load_vocabulary(conn)
+            if not is_postgres():
+                conn.commit()
+        finally:
+            conn.close()
+        with _VOCAB_LOCK:
+            _VOCAB = vocab
+    return _VOCAB
+
+
+def _reload_vocabulary(conn) -> dict[str, int]:
+    global _VOCAB
+    vocab = _load_vocabulary(conn)
+    with _VOCAB_LOCK:
+        _VOCAB = vocab
+    return vocab
+
+
+# --- per-job features -------------------------------------------------------
+
+def normalize_tokens(text: str) -> list[str]:
+    return sorted(set(_TOKEN_RE.findall(text.lower())))
+
+
+def _term_bits(text: str, vocab: dict[str, int], min_bit: int = 0) -> int:
+    bits = 0
+    for term, bit in vocab.items():
+        if bit >= min_bit and term in text:
+            bits |= 1 << bit
+    return bits
+
+
+def compute_job_features(job: dict, vocab: dict[str, int]) -> dict:
+    """
+    Bitsets of vocabulary terms found in the lowercased title and in
+    "title jd company" (the text score_job matches keywords against), plus
+    the normalized token list.
+    """
+    title = (job.get("title") or "").lower()
+    text = " ".join((title, (job.get("jd_text") or ""), (job.get("company") or ""))).lower()
+    return {
+        "title_bits": _term_bits(title, vocab),
+        "text_bits": _term_bits(text, vocab),
+        "tokens": " ".join(normalize_tokens(text)),
+    }
+
+
+def _extend_job_features(job: dict, vocab: dict[str, int], vocab_size: int, title_bits: int, text_bits: int) -> dict:
+    # Only terms added since vocab_size need scanning.
+    title = (job.get("title") or "").lower()
+    text = " ".join((title, (job.get("jd_text") or ""), (job.get("company") or ""))).lower()
+    return {
+        "title_bits": title_bits | _term_bits(title, vocab, vocab_size),
+        "text_bits": text_bits | _term_bits(text, vocab, vocab_size),
+    }
+
+
+def encode_bits(bits: int) -> str:
+    return format(bits, "x")
+
+
+def decode_bits(raw) -> int:
+    return int(raw, 16) if raw else 0
+
+
+def _store_features(conn, job_id: int, content_hash: str | None, vocab_size: int, feats: dict) -> None:
+    ts = "NOW()" if is_postgres() else "datetime('now')"
+    if "tokens" in feats:
+        execute(
+            conn,
+            f"""
+            INSERT INTO job_features (job_id, content_hash, vocab_size, title_bits, text_bits, tokens, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, {ts})
+            ON CONFLICT (job_id) DO UPDATE SET
+              content_hash = EXCLUDED.content_hash,
+              vocab_size = EXCLUDED.vocab_size,
+              title_bits = EXCLUDED.title_bits,
+              text_bits = EXCLUDED.text_bits,
+              tokens = EXCLUDED.tokens,
+              updated_at = EXCLUDED.updated_at
+            """,
+            (job_id, content_hash, vocab_size, encode_bits(feats["title_bits"]), encode_bits(feats["text_bits"]), feats["tokens"]),
+        )
+    else:
+        execute(
+            conn,
+            f"""
+            UPDATE job_features
+               SET vocab_size = ?, title_bits = ?, text_bits = ?, updated_at = {ts}
+             WHERE job_id = ?
+            """,
+            (vocab_size, encode_bits(feats["title_bits"]), encode_bits(feats["text_bits"]), job_id),
+        )
+
+
+def _bump_generation(n: int) -> None:
+    global _GENERATION
+    if n:
+        _GENERATION += 1
+
+
+def features_generation() -> int:
+    """Changes whenever this process writes job_features rows."""
+    return _GENERATION
+
+
+def _index_job_features(conn, urls: list[str]) -> int:
+    """Recompute features for the stored rows behind these URLs (called from upsert_jobs)."""
+    urls = [u for u in dict.fromkeys(urls) if u]
+    if not urls:
+        return 0
+    _ensure_feature_tables(conn)
+    vocab = _VOCAB if _VOCAB is not None else _reload_vocabulary(conn)
+    vocab_size = len(vocab)
+    n = 0
+    for i in range(0, len(urls), _IN_CHUNK):
+        chunk = urls[i : i + _IN_CHUNK]
+        marks = ", ".join(["?"] * len(chunk))
+        rows = execute(
+            conn,
+            f"SELECT id, title, jd_text, company, content_hash FROM jobs WHERE url IN ({marks})",
+            tuple(chunk),
+        ).fetchall()
+        for r in map(dict, rows):
+            _store_features(conn, r["id"], r["content_hash"], vocab_size, compute_job_features(r, vocab))
+            n += 1
+    _bump_generation(n)
+    return n
+
+
+def _refresh_job_features(conn, limit: int) -> int:
+    _ensure_feature_tables(conn)
+    vocab = _reload_vocabulary(conn)
+    vocab_size = len(vocab)
+    distinct = "IS DISTINCT FROM" if is_postgres() else "IS NOT"
+    rows = execute(
+        conn,
+        f"""
+        SELECT j.id, j.title, j.jd_text, j.company, j.content_hash,
+               f.job_id AS f_job_id, f.content_hash AS f_hash, f.vocab_size AS f_vocab,
+               f.title_bits AS f_title_bits, f.text_bits AS f_text_bits
+          FROM jobs j
+          LEFT JOIN job_features f ON f.job_id = j.id
+         WHERE f.job_id IS NULL
+            OR f.content_hash {distinct} j.content_hash
+            OR f.vocab_size < ?
+         LIMIT ?
+        """,
+        (vocab_size, limit),
+    ).fetchall()
+    for r in map(dict, rows):
+        if r["f_job_id"] is not None and r["f_hash"] == r["content_hash"]:
+            feats = _extend_job_features(
+                r, vocab, int(r["f_vocab"] or 0), decode_bits(r["f_title_bits"]), decode_bits(r["f_text_bits"])
+            )
+        else:
+            feats = compute_job_features(r, vocab)
+        _store_features(conn, r["id"], r["content_hash"], vocab_size, feats)
+    _bump_generation(len(rows))
+    return len(rows)
+
+
+def refresh_job_features(batch: int = _REFRESH_BATCH, conn=None) -> int:
+    """
+    Bring job_features up to date: index jobs that have none, recompute jobs
+    whose content_hash changed, and scan only the new terms for jobs indexed
+    against an older vocabulary. Runs in batches so the SQLite writer is not
+    held for the whole backfill. Returns rows (re)indexed.
+    """
+    total = 0
+    while True:
+        n = run_write(conn, _refresh_job_features, batch)
+        total += n
+        if n < batch:
+            return total
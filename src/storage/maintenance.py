@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+
+from . import db
+from .db import (
+    get_conn,
+    execute,
+    is_postgres,
+    _ensure_maintenance_state,
+    _get_sqlite_busy_timeout,
+)
+
+# Tables that see deletes/rewrites. Names are interpolated into VACUUM/ANALYZE,
+# so only these are ever maintained.
+MAINTAINED_TABLES = ["jobs", "jobs_archive", "alerts", "actions"]
+
+
+def _get_min_churn() -> int:
+    try:
+        return int(os.getenv("JOB_BUTLER_VACUUM_MIN_CHURN", "1000"))
+    except ValueError:
+        return 1000
+
+
+def _get_churn_ratio() -> float:
+    try:
+        return float(os.getenv("JOB_BUTLER_VACUUM_CHURN_RATIO", "0.2"))
+    except ValueError:
+        return 0.2
+
+
+def _sqlite_maintenance_conn():
+    # VACUUM cannot run inside a transaction, so use an autocommit connection
+    # separate from the writer thread.
+    conn = sqlite3.connect(db.DB_PATH, timeout=_get_sqlite_busy_timeout(), isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _table_exists(conn, table: str) -> bool:
+    if is_postgres():
+        row = execute(conn, "SELECT to_regclass(?) AS oid", (table,)).fetchone()
+        return bool(row and row["oid"])
+    row = execute(conn, "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+    return row is not None
+
+
+def _read_churn(conn) -> dict[str, dict]:
+    _ensure_maintenance_state(conn)
+    rows = execute(conn, "SELECT table_name, churn, last_vacuum_at FROM db_maintenance_state").fetchall()
+    return {r["table_name"]: dict(r) for r in rows}
+
+
+def _sqlite_report(conn) -> dict:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    objects: dict[str, dict] = {}
+    try:
+        # dbstat is only present when SQLite was built with SQLITE_ENABLE_DBSTAT_VTAB.
+        for r in conn.execute(
+            """
+            SELECT m.name AS name, m.type AS type, m.tbl_name AS tbl_name,
+                   SUM(s.pgsize) AS bytes, SUM(s.unused) AS unused
+              FROM dbstat s
+              JOIN sqlite_master m ON m.name = s.name
+             GROUP BY m.name
+            """
+        ).fetchall():
+            objects[r["name"]] = {
+                "type": r["type"],
+                "table": r["tbl_name"],
+                "bytes": r["bytes"] or 0,
+                "unused_bytes": r["unused"] or 0,
+            }
+    except sqlite3.Error:
+        objects = {}
+    tables = {}
+    for table in MAINTAINED_TABLES:
+        if not _table_exists(conn, table):
+            continue
+        entry = {"table_bytes": None, "index_bytes": None}
+        if objects:
+            entry["table_bytes"] = objects.get(table, {}).get("bytes", 0)
+            entry["index_bytes"] = sum(
+                o["bytes"] for o in objects.values() if o["type"] == "index" and o["table"] == table
+            )
+        tables[table] = entry
+    return {
+        "backend": "sqlite",
+        "file_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist,
+        "free_ratio": round(freelist / page_count, 4) if page_count else 0.0,
+        "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(auto_vacuum, str(auto_vacuum)),
+        "tables": tables,
+    }
+
+
+def _postgres_report(conn) -> dict:
+    rows = conn.execute(
+        """
+        SELECT relname,
+               n_live_tup,
+               n_dead_tup,
+               pg_relation_size(relid) AS table_bytes,
+               pg_indexes_size(relid) AS index_bytes,
+               pg_total_relation_size(relid) AS total_bytes,
+               GREATEST(last_vacuum, last_autovacuum) AS last_vacuum,
+               GREATEST(last_analyze, last_autoanalyze) AS last_analyze
+          FROM pg_stat_user_tables
+         WHERE relname = ANY(%s)
+        """,
+        (MAINTAINED_TABLES,),
+    ).fetchall()
+    tables = {}
+    for r in rows:
+        live = r["n_live_tup"] or 0
+        dead = r["n_dead_tup"] or 0
+        tables[r["relname"]] = {
+            "live_rows": live,
+            "dead_rows": dead,
+            "dead_ratio": round(dead / (live + dead), 4) if live + dead else 0.0,
+            "table_bytes": r["table_bytes"],
+            "index_bytes": r["index_bytes"],
+            "total_bytes": r["total_bytes"],
+            "last_vacuum": r["last_vacuum"].isoformat() if r["last_vacuum"] else None,
+            "last_analyze": r["last_analyze"].isoformat() if r["last_analyze"] else None,
+        }
+    return {"backend": "postgres", "tables": tables}
+
+
+def db_size_report(conn=None) -> dict:
+    """Table/index sizes, dead-tuple (Postgres) or free-page (SQLite) ratios, and pending churn."""
+    owns_conn = conn is None
+    if owns_conn:
+        conn = get_conn()
+    try:
+        report = _postgres_report(conn) if is_postgres() else _sqlite_report(conn)
+        churn = _read_churn(conn)
+        for table, entry in report["tables"].items():
+            state = churn.get(table) or {}
+            entry["churn"] = state.get("churn", 0)
+            entry["last_maintained_at"] = str(state["last_vacuum_at"]) if state.get("last_vacuum_at") else None
+        return report
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def _live_rows(conn, table: str) -> int:
+    if is_postgres():
+        row = conn.execute(
+            "SELECT n_live_tup FROM pg_stat_user_tables WHERE relname = %s", (table,)
+        ).fetchone()
+        return int(row["n_live_tup"] or 0) if row else 0
+    # Prefer the row estimate from the last ANALYZE over a full COUNT(*).
+    try:
+        row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table,)).fetchone()
+        if row is None:
+            row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)).fetchone()
+        if row and row["stat"]:
+            return int(str(row["stat"]).split()[0])
+    except sqlite3.Error:
+        pass
+    return int(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+
+
+def tables_due_for_maintenance(conn) -> list[str]:
+    min_churn = _get_min_churn()
+    ratio = _get_churn_ratio()
+    due = []
+    for table, state in _read_churn(conn).items():
+        if table not in MAINTAINED_TABLES:
+            continue
+        churn = int(state.get("churn") or 0)
+        if churn <= 0:
+            continue
+        if churn >= min_churn:
+            due.append(table)
+            continue
+        live = _live_rows(conn, table)
+        if live and churn / live >= ratio:
+            due.append(table)
+    return due
+
+
+def _reset_churn(conn, tables: list[str]) -> None:
+    ts = "NOW()" if is_postgres() else "datetime('now')"
+    for table in tables:
+        execute(
+            conn,
+            f"""
+            INSERT INTO db_maintenance_state (table_name, churn, last_vacuum_at, updated_at)
+            VALUES (?, 0, {ts}, {ts})
+            ON CONFLICT (table_name) DO UPDATE SET
+              churn = 0,
+              last_vacuum_at = {ts},
+              updated_at = {ts}
+            """,
+            (table,),
+        )
+
+
+def run_db_maintenance(tables: list[str] | None = None, full: bool = False) -> dict:
+    """
+    Reclaim space and refresh planner statistics.
+      - SQLite: PRAGMA incremental_vacuum + ANALYZE. Databases created before
+        auto_vacuum=INCREMENTAL need one full=True run (VACUUM) to convert.
+      - Postgres: VACUUM (ANALYZE) on each table (FULL when full=True).
+    """
+    tables = [t for t in (tables or MAINTAINED_TABLES) if t in MAINTAINED_TABLES]
+    started = time.time()
+    conn = get_conn() if is_postgres() else _sqlite_maintenance_conn()
+    try:
+        tables = [t for t in tables if _table_exists(conn, t)]
+        before = db_size_report(conn)
+        notes: list[str] = []
+        if is_postgres():
+            opts = "FULL, ANALYZE" if full else "ANALYZE"
+            for table in tables:
+                conn.execute(f"VACUUM ({opts}) {table}")
+        else:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if full:
+                if mode != 2:
+                    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            elif mode == 2:
+                # execute() steps the pragma once (one page); executescript runs it to completion.
+                conn.executescript("PRAGMA incremental_vacuum;")
+            else:
+                notes.append("auto_vacuum is off; run with full=True once to enable incremental vacuum")
+            for table in tables:
+                conn.execute(f"ANALYZE {table}")
+            conn.execute("PRAGMA optimize")
+        _reset_churn(conn, tables)
+        after = db_size_report(conn)
+    finally:
+        conn.close()
+    result = {
+        "tables": tables,
+        "full": full,
+        "elapsed_s": round(time.time() - started, 3),
+        "before": before,
+        "after": after,
+        "notes": notes,
+    }
+    if not is_postgres():
+        result["reclaimed_bytes"] = max(before["file_bytes"] - after["file_bytes"], 0)
+    return result
+
+
+def maybe_run_db_maintenance() -> dict | None:
+    """Run maintenance on tables whose churn crossed the thresholds; None if nothing is due."""
+    conn = get_conn()
+    try:
+        due = tables_due_for_maintenance(conn)
+        if not is_postgres():
+            conn.commit()
+    finally:
+        conn.close()
+    if not due:
+        return None
+    return run_db_maintenance(due)
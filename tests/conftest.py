@@ -0,0 +1,19 @@
+import pytest
+
+from src.ranking import seed_boost
+from src.storage import db
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """A fresh SQLite database for the test, with the schema applied."""
+    path = str(tmp_path / "job_butler.sqlite3")
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setenv("JOB_BUTLER_DB", path)
+    monkeypatch.setattr(db, "DB_PATH", path)
+    # The seed index is per process; drop the one read from another database.
+    monkeypatch.setattr(seed_boost, "_INDEX", None)
+    db.close_sqlite_writer()
+    db.init_db()
+    yield path
+    db.close_sqlite_writer()
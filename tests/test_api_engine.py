@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.server import app
+from src.ranking.engines import SERVING_ENGINES
+from src.storage import db
+
+
+@pytest.fixture
+def client(sqlite_db, monkeypatch):
+    monkeypatch.delenv("JOB_BUTLER_SHARDS", raising=False)
+    monkeypatch.delenv("JOB_BUTLER_RANK_ENGINE", raising=False)
+    db.upsert_jobs([
+        {
+            "source": "greenhouse:acme", "company": "Acme", "title": f"Senior Data Analyst {n}", "location": "Remote",
+            "url": f"https://boards.greenhouse.io/acme/jobs/{n}", "external_id": str(n),
+            "posted_at": f"2026-01-{n + 1:02d}T00:00:00Z", "jd_text": "SQL Python Tableau",
+            "salary": None, "tags": None, "visa": None,
+        }
+        for n in range(6)
+    ])
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("engine", ["rank_jobs", "parallel", "pruned", "feed"])
+def test_engines_return_the_default_ranking(client, engine):
+    expected = client.get("/api/jobs", params={"limit": 4}).json()
+    got = client.get("/api/jobs", params={"limit": 4, "engine": engine})
+    assert got.status_code == 200
+    assert [j["id"] for j in got.json()["items"]] == [j["id"] for j in expected["items"]]
+
+
+@pytest.mark.parametrize("params", [
+    {"engine": "nope"},
+    {"engine": "batch"},
+    {"engine": "feed", "source": "greenhouse:"},
+    {"engine": "feed", "include_inactive": "true"},
+    {"engine": "pushdown"},
+    {"engine": "sharded"},
+    {"engine": "pruned", "use_scoring": "false"},
+])
+def test_unknown_or_conflicting_engine_is_rejected(client, params):
+    assert client.get("/api/jobs", params=params).status_code == 400
+
+
+def test_serving_engines_are_registered():
+    from src.ranking.evaluation import ENGINES
+
+    assert set(SERVING_ENGINES) <= set(ENGINES)
+
+
+@pytest.mark.parametrize("params", [
+    {"source": "greenhouse:"},
+    {"include_inactive": "true"},
+])
+def test_env_default_falls_back_when_it_cannot_serve(client, monkeypatch, params):
+    expected = client.get("/api/jobs", params={"limit": 4, **params}).json()
+    monkeypatch.setenv("JOB_BUTLER_RANK_ENGINE", "feed")
+    got = client.get("/api/jobs", params={"limit": 4, **params})
+    assert got.status_code == 200
+    assert [j["id"] for j in got.json()["items"]] == [j["id"] for j in expected["items"]]
@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+
+from src.api.server import app
+from src.storage import db
+
+
+def _job(n: int, posted: str) -> dict:
+    return {
+        "source": "greenhouse:acme", "company": "Acme", "title": f"Data Analyst {n}", "location": "Remote",
+        "url": f"https://boards.greenhouse.io/acme/jobs/{n}", "external_id": str(n), "posted_at": posted,
+        "jd_text": f"SQL and Python {n}", "salary": "100k", "tags": "data", "visa": "no",
+    }
+
+
+def test_unscored_listing_returns_full_rows(sqlite_db):
+    db.upsert_jobs([_job(n, f"2026-01-{n + 1:02d}T00:00:00Z") for n in range(5)])
+    client = TestClient(app)
+    resp = client.get("/api/jobs", params={"use_scoring": "false", "limit": 2, "offset": 1})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] == 5 and body["nextOffset"] == 3
+    assert [j["title"] for j in body["items"]] == ["Data Analyst 3", "Data Analyst 2"]
+    for j in body["items"]:
+        assert j["jd_text"].startswith("SQL and Python")
+        assert (j["salary"], j["tags"], j["visa"]) == ("100k", "data", "no")
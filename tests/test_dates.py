@@ -0,0 +1,17 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.ranking.dates import parse_dt, to_epoch
+
+
+@pytest.mark.parametrize("val", [1e20, 10**30, -1e20, float("inf"), "9" * 30, "1" * 400])
+def test_parse_dt_out_of_range_is_none(val):
+    assert parse_dt(val) is None
+
+
+def test_parse_dt_in_range():
+    expected = datetime(2024, 4, 5, 19, 21, 18, tzinfo=timezone.utc)
+    assert parse_dt(1712344878) == expected
+    assert parse_dt("1712344878000") == expected
+    assert to_epoch("2024-04-05T19:21:18Z") == expected.timestamp()
@@ -0,0 +1,44 @@
+import sqlite3
+
+from src.storage import db
+
+
+def _job(**kw):
+    row = {k: None for k in db.CONTENT_HASH_FIELDS}
+    row.update(source="greenhouse", company="Acme", title="Data Engineer", url="https://acme.example/1")
+    row.update(kw)
+    return row
+
+
+def test_init_db_backfills_content_hash(sqlite_db):
+    db.upsert_jobs([_job()])
+    conn = sqlite3.connect(sqlite_db)
+    conn.execute("UPDATE jobs SET content_hash = NULL")
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+
+    conn = db.get_conn()
+    try:
+        row = dict(conn.execute("SELECT * FROM jobs").fetchone())
+    finally:
+        conn.close()
+    assert row["content_hash"] == db.compute_content_hash(row)
+
+
+def test_upsert_hash_matches_stored_row(sqlite_db):
+    # SQLite matches on url: the update keeps the stored source, so the hash
+    # must describe that row, and a repeat of the same listing is unchanged.
+    db.upsert_jobs([_job()])
+    other = _job(source="lever", external_id="L-1", title="Senior Data Engineer")
+    assert db.upsert_jobs([other])["updated"] == 1
+    assert db.upsert_jobs([other])["unchanged"] == 1
+
+    conn = db.get_conn()
+    try:
+        row = dict(conn.execute("SELECT * FROM jobs").fetchone())
+    finally:
+        conn.close()
+    assert (row["source"], row["external_id"]) == ("greenhouse", None)
+    assert row["content_hash"] == db.compute_content_hash(row)
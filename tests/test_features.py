@@ -0,0 +1,32 @@
+import multiprocessing
+
+from src.storage import db, features
+
+
+def _sync_terms(worker: int) -> None:
+    conn = db.get_conn()
+    try:
+        for n in range(20):
+            profile = {"must_have": [f"skill-{worker}-{n}", f"shared-{n}"]}
+            features.sync_vocabulary([profile], conn=conn)
+    finally:
+        conn.close()
+
+
+def test_concurrent_vocabulary_sync_assigns_distinct_bits(sqlite_db):
+    features.sync_vocabulary()
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_sync_terms, args=(w,)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+    assert [p.exitcode for p in procs] == [0] * len(procs)
+
+    conn = db.get_conn()
+    try:
+        vocab = features._load_vocabulary(conn)
+    finally:
+        conn.close()
+    assert {f"skill-{w}-{n}" for w in range(4) for n in range(20)} <= set(vocab)
+    assert sorted(vocab.values()) == list(range(len(vocab)))
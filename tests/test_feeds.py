@@ -0,0 +1,85 @@
+import pytest
+
+from src.ranking import feeds, scoring
+from src.ranking.feeds import read_feed
+from src.ranking.scoring import rank_jobs
+from src.storage import db
+
+NOW = 1773576000.0  # 2026-03-15T12:00:00Z
+
+PROFILE = {"roles_target": ["Data Analyst"], "must_have": ["SQL", "Python"], "nice_to_have": ["Tableau"],
+           "locations": ["Remote"]}
+
+_POSTED = ["2026-03-14T00:00:00Z", "2026-03-01T00:00:00Z", "2025-12-01T00:00:00Z", None, "1773057600", ""]
+_TITLES = ["Data Analyst", "Senior Data Analyst", "Office Manager"]
+_JDS = ["SQL Python Tableau", "SQL", ""]
+
+
+def _rows() -> list[dict]:
+    # Few distinct (title, jd, posted_at) combinations, so most scores tie.
+    return [
+        {
+            "source": "remoteok", "company": "Acme", "title": _TITLES[n % 3], "location": "Remote",
+            "url": f"https://remoteok.com/jobs/{n}", "external_id": str(n), "posted_at": _POSTED[(n // 3) % len(_POSTED)],
+            "jd_text": _JDS[(n // 7) % 3], "salary": None, "tags": None, "visa": None,
+        }
+        for n in range(400)
+    ]
+
+
+@pytest.mark.parametrize("limit,offset", [(10, 0), (50, 30), (100, 250), (200, 180)])
+def test_feed_page_matches_rank_jobs(sqlite_db, monkeypatch, limit, offset):
+    monkeypatch.setattr(feeds, "now_epoch", lambda: NOW)
+    monkeypatch.setattr(scoring, "now_epoch", lambda: NOW)
+    db.upsert_jobs(_rows())
+    expected = rank_jobs(db.fetch_all_jobs(), PROFILE, limit=limit, offset=offset)
+    page = read_feed(PROFILE, limit, offset)
+    assert [(j["id"], j["_score"], j["_why"]) for j in page] == [(j["id"], j["_score"], j["_why"]) for j in expected]
+
+
+def test_failed_incremental_write_does_not_skip_jobs(sqlite_db, monkeypatch):
+    monkeypatch.setattr(feeds, "now_epoch", lambda: NOW)
+    monkeypatch.setattr(scoring, "now_epoch", lambda: NOW)
+    rows = _rows()
+    db.upsert_jobs(rows[:100])
+    feeds.sync_feed(PROFILE, force=True)
+
+    def stored_watermark():
+        conn = db.get_conn()
+        try:
+            return conn.execute("SELECT watermark FROM persona_feed_state WHERE persona_key = ?",
+                                (feeds.feed_key(PROFILE),)).fetchone()[0]
+        finally:
+            conn.close()
+
+    before = stored_watermark()
+    db.upsert_jobs(rows[100:])
+    conn = db.get_conn()
+    try:
+        # Later harvest: its features are stamped after the first sync's watermark.
+        conn.execute("UPDATE job_features SET updated_at = datetime(updated_at, '+1 hour') "
+                     "WHERE job_id > (SELECT MIN(id) + 99 FROM jobs)")
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setattr(feeds, "_WRITE_CHUNK", 50)
+    real_run_write, calls = feeds.run_write, []
+
+    def failing_second_chunk(conn, fn, *args):
+        calls.append(fn)
+        if len(calls) == 2:
+            raise RuntimeError("writer died")
+        return real_run_write(conn, fn, *args)
+
+    monkeypatch.setattr(feeds, "run_write", failing_second_chunk)
+    with pytest.raises(RuntimeError):
+        feeds.sync_feed(PROFILE, force=True)
+    monkeypatch.setattr(feeds, "run_write", real_run_write)
+    assert stored_watermark() == before
+
+    # The first chunk landed; the rest are picked up because the watermark did not move.
+    assert feeds.sync_feed(PROFILE, force=True)["merged"] == 250
+    expected = rank_jobs(db.fetch_all_jobs(), PROFILE)
+    assert feeds.feed_total(PROFILE) == len(expected) == 400
+    page = read_feed(PROFILE, 400, 0, sync=False)
+    assert [j["id"] for j in page] == [j["id"] for j in expected]
@@ -0,0 +1,69 @@
+import sys
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.ranking.lsh import LshIndex
+from src.ranking.tfidf import TfidfIndex
+
+WORDS = ["sql", "python", "tableau", "spark", "airflow", "dbt", "excel", "looker"]
+
+
+def _text(i: int) -> str:
+    return " ".join(WORDS[(i + k) % len(WORDS)] for k in range(4))
+
+
+@pytest.fixture
+def fast_switching():
+    # Switch threads often so unlocked reads would see half-applied updates.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_sync_and_query_while_tfidf_refreshes(fast_switching):
+    tfidf = TfidfIndex(n_features=1 << 12)
+    for i in range(200):
+        tfidf.add(i, f"h{i}", "Data Engineer", _text(i))
+    lsh = LshIndex(tfidf)
+    lsh.sync()
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def refresh():
+        # What TfidfIndex.refresh() does: re-index rows under the index lock.
+        n = 0
+        while not stop.is_set():
+            with tfidf._lock:
+                for i in range(n % 50, 200, 50):
+                    tfidf.add(i, f"h{i}-{n}", "Data Engineer", _text(i + n))
+                tfidf._remove(1000 + n % 7)
+                tfidf.add(1000 + (n + 1) % 7, f"x{n}", "Analyst", _text(n))
+            n += 1
+
+    def read():
+        try:
+            while not stop.is_set():
+                lsh.sync()
+                sig = lsh.signature_of(3)
+                if sig is not None:
+                    lsh.query(sig, limit=5, exclude=3)
+        except BaseException as exc:  # pragma: no cover - the failure being tested for
+            errors.append(exc)
+
+    threads = [threading.Thread(target=refresh)] + [threading.Thread(target=read) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    lsh.sync()
+    assert set(lsh.sigs) == set(tfidf.rows)
+    assert all(lsh.sigs[i][0] == tfidf.rows[i][0] for i in tfidf.rows)
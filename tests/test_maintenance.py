@@ -0,0 +1,13 @@
+from src.storage import db
+from src.storage.maintenance import run_db_maintenance
+
+
+def test_maintenance_uses_current_db_path(sqlite_db):
+    assert db.upsert_jobs([{
+        "source": "greenhouse:acme", "company": "acme", "title": "Analyst", "location": "Remote",
+        "url": "https://boards.greenhouse.io/acme/jobs/1", "external_id": "1",
+        "posted_at": None, "jd_text": "SQL", "salary": None, "tags": None, "visa": None,
+    }])["inserted"] == 1
+    result = run_db_maintenance(["jobs"])
+    assert result["tables"] == ["jobs"]
+    assert result["before"]["file_bytes"] > 0
@@ -0,0 +1,24 @@
+import threading
+
+from src.ranking import matcher
+
+
+def test_compile_persona_cache_is_thread_safe():
+    profiles = [{"roles_target": [f"role {i}"], "must_have": [f"kw{i}", "sql"]} for i in range(matcher._CACHE_SIZE * 2)]
+    errors: list[BaseException] = []
+
+    def worker(offset: int) -> None:
+        try:
+            for n in range(500):
+                p = profiles[(n * 7 + offset) % len(profiles)]
+                assert matcher.compile_persona(p).roles == (p["roles_target"][0],)
+        except BaseException as exc:  # noqa: BLE001 - recorded for the assertion
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(matcher._COMPILED) <= matcher._CACHE_SIZE
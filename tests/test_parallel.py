@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from src.ranking import matcher, parallel
+from src.ranking.parallel import ParallelRanker, fork_available, rank_jobs_parallel
+from src.ranking.scoring import rank_jobs
+
+pytestmark = pytest.mark.skipif(not fork_available(), reason="parallel ranking needs fork")
+
+PROFILE = {"roles_target": ["Data Analyst"], "must_have": ["SQL", "Python"], "nice_to_have": ["Tableau"]}
+
+
+def _jobs(n: int = 600) -> list[dict]:
+    titles = ["Senior Data Analyst", "Data Engineer", "Office Manager"]
+    jds = ["SQL Python Tableau", "SQL", "", None]
+    return [
+        {"id": i, "title": titles[i % 3], "company": "Acme", "source": "remoteok", "jd_text": jds[i % 4],
+         "location": "Remote", "posted_at": f"2026-01-{i % 28 + 1:02d}T00:00:00Z"}
+        for i in range(n)
+    ]
+
+
+def _ids(rows):
+    return [(r["id"], r["_score"], r["_why"]) for r in rows]
+
+
+def test_pool_matches_rank_jobs(monkeypatch):
+    monkeypatch.setenv("JOB_BUTLER_RANK_PARALLEL_MIN", "100")
+    jobs = _jobs()
+    for limit, offset in ((10, 0), (25, 40), (None, 0)):
+        expected = rank_jobs(jobs, PROFILE, limit=limit, offset=offset)
+        assert _ids(rank_jobs_parallel(jobs, PROFILE, limit=limit, offset=offset, workers=2)) == _ids(expected)
+
+
+def test_workers_do_not_inherit_held_locks(monkeypatch):
+    monkeypatch.setenv("JOB_BUTLER_RANK_TIMEOUT_S", "20")
+    jobs = _jobs()
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with matcher._COMPILED_LOCK:
+            held.set()
+            release.wait(10)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    held.wait(5)
+    with ParallelRanker(jobs, workers=2) as ranker:
+        ranker._start()  # forked while another thread holds the lock
+        release.set()
+        t.join()
+        started = time.monotonic()
+        pairs = ranker.scores(PROFILE, 10)
+        assert ranker.parallel, "workers deadlocked and the ranker fell back"
+        assert time.monotonic() - started < 15
+    assert pairs == [(r["_score"], r["id"]) for r in rank_jobs(jobs, PROFILE, limit=10)]
+
+
+def _stuck_chunk(*args):
+    time.sleep(30)
+
+
+def test_stuck_workers_fall_back_to_serial(monkeypatch):
+    monkeypatch.setenv("JOB_BUTLER_RANK_TIMEOUT_S", "0.5")
+    monkeypatch.setattr(parallel, "_score_chunk", _stuck_chunk)
+    jobs = _jobs()
+    started = time.monotonic()
+    with ParallelRanker(jobs, workers=2) as ranker:
+        page = ranker.rank(PROFILE, limit=10)
+        assert not ranker.parallel
+    assert time.monotonic() - started < 10
+    assert _ids(page) == _ids(rank_jobs(jobs, PROFILE, limit=10))
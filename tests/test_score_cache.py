@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.ranking.feeds import feed_key, prune_stale_rankings, read_feed
+from src.ranking.score_cache import fill_scores, rank_jobs_cached, scores_key
+from src.ranking.scoring import rank_jobs
+from src.storage import db
+from src.storage.features import known_personas
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _jobs() -> list[dict]:
+    db.upsert_jobs([
+        {
+            "source": "greenhouse:acme", "company": "Acme", "title": f"Data Analyst {n}", "location": "Remote",
+            "url": f"https://boards.greenhouse.io/acme/jobs/{n}", "external_id": str(n),
+            "posted_at": "2026-01-01T00:00:00Z", "jd_text": "SQL Python", "salary": None, "tags": None, "visa": None,
+        }
+        for n in range(3)
+    ])
+    conn = db.get_conn()
+    try:
+        return [dict(r) for r in conn.execute(db.jobs_query_sql()).fetchall()]
+    finally:
+        conn.close()
+
+
+def _keys(table: str, column: str) -> set[str]:
+    conn = db.get_conn()
+    try:
+        return {r[0] for r in conn.execute(f"SELECT DISTINCT {column} FROM {table}")}
+    finally:
+        conn.close()
+
+
+def test_prune_drops_rows_of_unknown_personas(sqlite_db):
+    jobs = _jobs()
+    current = json.loads((ROOT / "profile.json").read_text(encoding="utf-8"))
+    retired = {"roles_target": ["data analyst"], "must_have": ["sql"], "nice_to_have": ["retired-term"]}
+    known = {scores_key(p) for p in known_personas()}
+    fill_scores([retired])
+    for profile in (current, retired):
+        assert len(rank_jobs_cached(jobs, profile, limit=2)) == 2
+        read_feed(profile, 2, 0)
+    assert _keys("job_scores", "persona_hash") == known | {scores_key(retired)}
+    assert _keys("persona_feeds", "persona_key") == {feed_key(current), feed_key(retired)}
+
+    pruned = prune_stale_rankings()
+    assert pruned == {"job_scores": 3, "persona_feeds": 3}
+    assert _keys("job_scores", "persona_hash") == known
+    assert _keys("persona_feeds", "persona_key") == {feed_key(current)}
+    assert _keys("persona_feed_state", "persona_key") == {feed_key(current)}
+
+
+def test_cached_ranking_only_reads_and_matches_rank_jobs(sqlite_db):
+    jobs = _jobs()
+    profile = {"roles_target": ["data analyst"], "must_have": ["sql"], "nice_to_have": ["airflow"]}
+    # Recent, but a title that cannot be matched: rank_jobs scores it 0.
+    bad = {**jobs[0], "id": 999, "title": 123, "posted_at": datetime.now(timezone.utc).isoformat()}
+
+    def ranked(rows):
+        return [(r["id"], r["_score"], r["_why"]) for r in rows]
+
+    expected = ranked(rank_jobs(jobs, profile, limit=2))
+    assert ranked(rank_jobs_cached(jobs + [bad], profile, limit=2)) == expected
+    assert rank_jobs_cached(jobs + [bad], profile)[-1]["_score"] == 0.0
+    assert _keys("job_scores", "persona_hash") == set()
+
+    assert fill_scores([profile]) >= len(jobs)
+    assert scores_key(profile) in _keys("job_scores", "persona_hash")
+    assert ranked(rank_jobs_cached(jobs + [bad], profile, limit=2)) == expected
+    assert fill_scores([profile]) == 0
@@ -0,0 +1,281 @@
+"""
+score_job, explain_job_score and rank_jobs against the implementation they
+replaced (frozen below as _ref_*), on a fixed corpus, seeds and clock.
+
+The one intended difference: the old parser could not read epoch or RFC 2822
+strings and gave those jobs zero recency. They must now score exactly as
+the same instant written in ISO 8601.
+"""
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src.main import ensure_seeds_table
+from src.ranking import scoring
+from src.ranking.scoring import explain_job_score, rank_jobs, score_job
+from src.ranking.seed_boost import invalidate_seed_index
+from src.storage import db
+
+ROOT = Path(__file__).resolve().parents[1]
+
+NOW = datetime(2026, 3, 15, 12, 0, 0, tzinfo=timezone.utc)
+
+SEEDS = [
+    {"url": "https://boards.greenhouse.io/acme/jobs/1", "title_hint": "Data Analyst, BI", "company_hint": "Acme"},
+    {"url": "https://jobs.lever.co/globex/abc", "title_hint": "ML", "company_hint": None},
+    {"url": "https://example.com/careers", "title_hint": None, "company_hint": "Initech"},
+]
+
+PERSONAS = [
+    json.loads((ROOT / "profile.json").read_text(encoding="utf-8")),
+    {"roles_target": ["Data Analyst", "Senior Data Analyst"], "must_have": ["SQL", "sql", "Python"],
+     "nice_to_have": ["Tableau", ""], "locations": ["Bangalore", "Remote"]},
+    {"roles_target": ["", "Engineer"], "must_have": ["Java"], "locations": []},
+    {"roles_target": [], "must_have": [], "nice_to_have": ["NLP"]},
+    {},
+]
+
+# ISO equivalents of the epoch/RFC 2822 strings in _DATES.
+_EQUIVALENT = {
+    "1773576000": "2026-03-15T12:00:00Z",
+    "1773057600000": "2026-03-09T12:00:00+00:00",
+    "1770000000.5": "2026-02-02T02:40:00.500000+00:00",
+    "Mon, 09 Mar 2026 08:30:00 +0530": "2026-03-09T03:00:00+00:00",
+}
+
+_DATES = [
+    "2026-03-15T11:00:00Z", "2026-03-14T00:00:00+05:30", "2026-03-10T09:15:00", "2026-03-01",
+    "2026-02-20T00:00:00Z", "2026-01-01T00:00:00Z", "2026-04-01T00:00:00Z",
+    None, "", "   ", "not a date", "20260310",
+    *_EQUIVALENT,
+]
+
+_TITLES = ["Senior Data Analyst", "Data Analyst (BI)", "ML Engineer", "Java Developer", "Analytics Manager",
+           "Office Manager", "", None]
+_COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", None]
+_SOURCES = ["greenhouse:acme", "lever:globex", "remoteok", "greenhouse:umbrella", None]
+_JDS = ["We use SQL, Python and Tableau daily.", "Java, Spring, microservices.", "", None,
+        "NLP research with PySpark and dbt on GCP; A/B testing.", "python sql"]
+_LOCATIONS = ["Bangalore, India", "Remote", "Berlin", "", None]
+
+
+def _corpus() -> list[dict]:
+    jobs = []
+    for i in range(160):
+        jobs.append({
+            "id": i + 1,
+            "title": _TITLES[i % len(_TITLES)],
+            "company": _COMPANIES[i % len(_COMPANIES)],
+            "source": _SOURCES[(i // 2) % len(_SOURCES)],
+            "jd_text": _JDS[(i // 3) % len(_JDS)],
+            "location": _LOCATIONS[(i // 5) % len(_LOCATIONS)],
+            "posted_at": _DATES[i % len(_DATES)],
+            "url": f"https://jobs.example.com/{i}",
+        })
+    return jobs
+
+
+# --- the pre-series implementation, with the clock and seeds passed in ------
+
+def _ref_parse_dt(val):
+    if not val:
+        return None
+    if isinstance(val, datetime):
+        return val if val.tzinfo else val.replace(tzinfo=timezone.utc)
+    if isinstance(val, str):
+        s = val.strip()
+        if s.endswith("Z"):
+            s = s[:-1] + "+00:00"
+        try:
+            dt = datetime.fromisoformat(s)
+        except Exception:
+            return None
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return None
+
+
+def _ref_normalize_age(posted_at, days=30):
+    dt = _ref_parse_dt(posted_at)
+    if not dt:
+        return 0.0
+    age_days = max(0.0, (NOW - dt).total_seconds() / 86400.0)
+    if age_days >= days:
+        return 0.0
+    return max(0.0, 1.0 - (age_days / float(days)))
+
+
+def _ref_keyword_score(text, keywords):
+    if not text or not keywords:
+        return 0.0
+    t = text.lower()
+    hits = sum(1 for k in keywords if k and k.lower() in t)
+    return min(1.0, hits / max(1, len(keywords)))
+
+
+def _ref_tokens(seeds):
+    gh_tokens, lv_tokens, comp_hints, title_kw = set(), set(), set(), set()
+    for s in seeds:
+        u = (s.get("url") or "").lower()
+        m = re.search(r"boards\.greenhouse\.io/([^/?#]+)", u)
+        if m:
+            gh_tokens.add(m.group(1))
+        m = re.search(r"jobs\.lever\.co/([^/?#]+)", u)
+        if m:
+            lv_tokens.add(m.group(1))
+        c = (s.get("company_hint") or "").strip().lower()
+        if c:
+            comp_hints.add(c)
+        th = (s.get("title_hint") or "").lower()
+        if th:
+            for t in re.split(r"[,\|/;]+", th):
+                t = t.strip()
+                if len(t) >= 3:
+                    title_kw.add(t)
+    return {"gh": gh_tokens, "lv": lv_tokens, "comp": comp_hints, "title": title_kw}
+
+
+_REF_SEEDS = _ref_tokens(SEEDS)
+
+
+def _ref_seedscore(job, profile):
+    cache = _REF_SEEDS
+    if not any(cache.values()):
+        return 0.0
+    src = (job.get("source") or "").lower()
+    comp = (job.get("company") or "").lower()
+    title = (job.get("title") or "").lower()
+    jd = (job.get("jd_text") or "").lower()
+    loc = (job.get("location") or "").lower()
+    provider = (any(f"greenhouse:{t}" in src for t in cache["gh"]) or
+                any(f"lever:{t}" in src for t in cache["lv"]))
+    company = any(h in comp for h in cache["comp"]) if cache["comp"] else False
+    title_hit = any(k in title for k in cache["title"]) if cache["title"] else False
+    skills = [s.lower() for s in (profile.get("must_have") or [])] + [s.lower() for s in (profile.get("nice_to_have") or [])]
+    skills_hit = any(k in jd or k in title for k in skills) if skills else False
+    persona_locs = [loc_.lower() for loc_ in (profile.get("locations") or [])]
+    loc_hit = any(loc_ in loc for loc_ in persona_locs) if persona_locs and loc else False
+    checks = [provider, company, title_hit, skills_hit, loc_hit]
+    matched = sum(1 for c in checks if c)
+    if provider and (title_hit or skills_hit):
+        return 1.0
+    return matched / len(checks)
+
+
+def _ref_score_job(j, profile):
+    title = (j.get("title") or "").lower()
+    jd = (j.get("jd_text") or "").lower()
+    comp = (j.get("company") or "").lower()
+    roles = [r.lower() for r in (profile.get("roles_target") or [])]
+    kw = (profile.get("must_have") or []) + (profile.get("nice_to_have") or [])
+    s = 0.0
+    if any(r in title for r in roles):
+        s += 0.4
+    s += 0.3 * _ref_keyword_score(" ".join((title, jd, comp)), kw)
+    s += 0.3 * _ref_normalize_age(j.get("posted_at"))
+    s = max(s, _ref_seedscore(j, profile))
+    return min(1.0, max(0.0, float(s)))
+
+
+def _ref_explain(j, profile):
+    reasons = []
+    title = (j.get("title") or "")
+    text = " ".join((title, j.get("jd_text") or "", j.get("company") or "")).lower()
+    roles = [r.lower() for r in (profile.get("roles_target") or [])]
+    kw = (profile.get("must_have") or []) + (profile.get("nice_to_have") or [])
+    matched_roles = [r for r in roles if r and r in title.lower()]
+    if matched_roles:
+        reasons.append("Title matches target role(s): " + ", ".join(sorted(set(matched_roles))))
+    elif roles:
+        reasons.append("Title does not match any target roles in your persona")
+    hits = [k for k in kw if k and k.lower() in text]
+    if hits:
+        reasons.append("Contains your skills/keywords: " + ", ".join(sorted(set(hits))))
+    elif kw:
+        reasons.append("Missing most of your specified skills/keywords")
+    rec = _ref_normalize_age(j.get("posted_at"))
+    if rec >= 0.8:
+        reasons.append("Very recent posting (last few days)")
+    elif rec >= 0.5:
+        reasons.append("Recent posting (roughly within last 1–2 weeks)")
+    elif rec > 0.0:
+        reasons.append("Older posting (over ~2 weeks old)")
+    else:
+        reasons.append("Posting date missing or older than 30 days")
+    if _ref_seedscore(j, profile) >= 0.5:
+        reasons.append("Matches your high-priority seeds (company/title/url)")
+    return reasons
+
+
+def _ref_rank_jobs(jobs, profile):
+    ranked = []
+    for j in jobs:
+        try:
+            sc = float(_ref_score_job(j, profile))
+        except Exception:
+            sc = 0.0
+        jj = dict(j)
+        jj["_score"] = round(sc, 4)
+        jj["_why"] = _ref_explain(j, profile)
+        ranked.append(jj)
+    ranked.sort(key=lambda x: x.get("_score", 0.0), reverse=True)
+    return ranked
+
+
+# --- tests ------------------------------------------------------------------
+
+def _as_reference(j: dict) -> dict:
+    """The job with any posted_at the old parser could not read rewritten as ISO."""
+    posted = j.get("posted_at")
+    return {**j, "posted_at": _EQUIVALENT[posted]} if posted in _EQUIVALENT else j
+
+
+@pytest.fixture
+def fixed_world(sqlite_db, monkeypatch):
+    ensure_seeds_table()
+    conn = db.get_conn()
+    try:
+        for s in SEEDS:
+            conn.execute("INSERT INTO seeds (url, title_hint, company_hint) VALUES (?, ?, ?)",
+                         (s["url"], s["title_hint"], s["company_hint"]))
+        conn.commit()
+    finally:
+        conn.close()
+    invalidate_seed_index()
+    monkeypatch.setattr(scoring, "now_epoch", lambda: NOW.timestamp())
+    return _corpus()
+
+
+@pytest.mark.parametrize("persona", range(len(PERSONAS)))
+def test_score_and_explain_match_reference(fixed_world, persona):
+    profile = PERSONAS[persona]
+    for j in fixed_world:
+        ref = _as_reference(j)
+        assert score_job(j, profile) == pytest.approx(_ref_score_job(ref, profile), abs=1e-12), j
+        assert explain_job_score(j, profile) == _ref_explain(ref, profile), j
+
+
+@pytest.mark.parametrize("persona", range(len(PERSONAS)))
+def test_rank_jobs_matches_reference(fixed_world, persona):
+    profile = PERSONAS[persona]
+    ref = _ref_rank_jobs([_as_reference(j) for j in fixed_world], profile)
+    expected = [(r["id"], r["_score"], r["_why"]) for r in ref]
+
+    got = rank_jobs(fixed_world, profile)
+    assert [(r["id"], r["_score"], r["_why"]) for r in got] == expected
+    for limit, offset in ((10, 0), (7, 13), (50, 140)):
+        page = rank_jobs(fixed_world, profile, limit=limit, offset=offset)
+        assert [(r["id"], r["_score"], r["_why"]) for r in page] == expected[offset:offset + limit]
+
+
+def test_corpus_exercises_seeds_dates_and_epoch_strings(fixed_world):
+    profile = PERSONAS[1]
+    seed_scores = {_ref_seedscore(j, profile) for j in fixed_world}
+    assert 1.0 in seed_scores and any(0 < s < 0.5 for s in seed_scores)
+    assert any(j["posted_at"] in (None, "", "   ") for j in fixed_world)
+    for raw in _EQUIVALENT:
+        # The old parser gave these no recency; they now count as their ISO instant.
+        assert _ref_normalize_age(raw) == 0.0
+        assert scoring.normalize_age(raw, now=NOW) == pytest.approx(_ref_normalize_age(_EQUIVALENT[raw]), abs=1e-12)
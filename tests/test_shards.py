@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.shard_worker import create_shard_app
+from src.ranking import shards
+from src.ranking.shards import ShardCoordinator, ShardWorker, shard_of
+from src.storage import db
+
+
+def _coordinator(*parts):
+    return ShardCoordinator([ShardWorker(i, n, []) for i, n in parts])
+
+
+def test_worker_app_loads_its_shard_at_startup(sqlite_db):
+    db.upsert_jobs([
+        {
+            "source": "greenhouse:acme", "company": "Acme", "title": f"Data Analyst {n}", "location": "Remote",
+            "url": f"https://boards.greenhouse.io/acme/jobs/{n}", "external_id": str(n),
+            "posted_at": "2026-01-01T00:00:00Z", "jd_text": "SQL", "salary": None, "tags": None, "visa": None,
+        }
+        for n in range(8)
+    ])
+    conn = db.get_conn()
+    try:
+        ids = [r["id"] for r in conn.execute("SELECT id FROM jobs").fetchall()]
+    finally:
+        conn.close()
+    with TestClient(create_shard_app(1, 2)) as client:
+        health = client.get("/health").json()
+    assert (health["shard"], health["shards"]) == (1, 2)
+    assert health["jobs"] == sum(1 for i in ids if shard_of(i, 2) == 1)
+
+
+def test_coordinator_verifies_shard_order_and_count():
+    with _coordinator((0, 2), (1, 2)) as ok:
+        ok.verify()
+    for parts in (((1, 2), (0, 2)), ((0, 3), (1, 3))):
+        with _coordinator(*parts) as bad, pytest.raises(RuntimeError, match="expected"):
+            bad.verify()
+
+
+def test_from_env_rejects_misconfigured_workers(monkeypatch):
+    monkeypatch.setenv("JOB_BUTLER_SHARDS", "http://shard-a,http://shard-b")
+    # Both workers were started as shard 0.
+    monkeypatch.setattr(shards.HttpShard, "health", lambda self: {"shard": 0, "shards": 2})
+    with pytest.raises(RuntimeError, match="http://shard-b serves shard 0/2, expected 1/2"):
+        ShardCoordinator.from_env()
@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src.storage import db
+
+
+def _rows(tid: int, op: int, batch: int) -> list[dict]:
+    return [
+        {
+            "source": f"greenhouse:stress{tid}",
+            "company": f"stress{tid}",
+            "title": f"Data Analyst {tid}-{op}-{k}",
+            "location": "Remote",
+            "url": f"https://boards.greenhouse.io/stress{tid}/jobs/{tid}-{op}-{k}",
+            "external_id": f"{tid}-{op}-{k}",
+            "posted_at": "2026-01-01T00:00:00Z",
+            "jd_text": "SQL Python Tableau",
+            "salary": None,
+            "tags": None,
+            "visa": None,
+        }
+        for k in range(batch)
+    ]
+
+
+def test_concurrent_writes_never_lock(sqlite_db):
+    threads, ops, batch = 8, 25, 4
+    errors: list[BaseException] = []
+    failed = []
+
+    def worker(tid: int) -> None:
+        for op in range(ops):
+            try:
+                failed.append(db.upsert_jobs(_rows(tid, op, batch))["failed"])
+            except BaseException as exc:  # noqa: BLE001 - recorded for the assertion
+                errors.append(exc)
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join(timeout=60)
+    assert not any(t.is_alive() for t in pool), "a write never resolved"
+    assert errors == []
+    assert len(failed) == threads * ops and sum(failed) == 0
+    conn = db.get_conn()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == threads * ops * batch
+    finally:
+        conn.close()
+
+
+def test_connect_failure_fails_futures_and_writer_is_replaced(sqlite_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "missing" / "db.sqlite3"))
+    broken = db.get_sqlite_writer()
+    with pytest.raises(sqlite3.OperationalError):
+        broken.submit(lambda conn: 1).result(timeout=5)
+    with pytest.raises(sqlite3.OperationalError):
+        broken.submit(lambda conn: 1).result(timeout=5)
+    assert not broken.alive
+
+    monkeypatch.setattr(db, "DB_PATH", sqlite_db)
+    assert db.get_sqlite_writer() is not broken
+    assert db.run_write(None, lambda conn: conn.execute("SELECT 1").fetchone()[0]) == 1
+
+
+def test_broken_transaction_fails_batch_and_writer_recovers(sqlite_db):
+    def ends_transaction(conn):
+        conn.execute("COMMIT")
+
+    with pytest.raises(sqlite3.Error):
+        db.run_write(None, ends_transaction)
+    assert db.upsert_jobs(_rows(0, 0, 2))["inserted"] == 2
+
+
+def test_failing_operation_does_not_roll_back_its_batch(sqlite_db):
+    writer = db.get_sqlite_writer()
+
+    def boom(conn):
+        db._upsert_jobs(conn, _rows(0, 0, 1))
+        raise ValueError("boom")
+
+    bad = writer.submit(boom)
+    good = writer.submit(db._upsert_jobs, _rows(1, 0, 1))
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    assert good.result(timeout=5)["inserted"] == 1
+    conn = db.get_conn()
+    try:
+        assert [r[0] for r in conn.execute("SELECT source FROM jobs")] == ["greenhouse:stress1"]
+    finally:
+        conn.close()
+
+
+def test_window_groups_later_writes(tmp_path):
+    writer = db.SQLiteWriter(str(tmp_path / "w.sqlite3"), window=0.3)
+    try:
+        first = writer.submit(lambda conn: 1)
+        time.sleep(0.05)
+        # Still inside the first write's window: it has not committed yet.
+        assert not first.done()
+        second = writer.submit(lambda conn: 2)
+        assert first.result(timeout=5) == 1 and second.result(timeout=5) == 2
+    finally:
+        writer.close()